@@ -0,0 +1,62 @@
+"""
+Metagame analytics (see deck_analytics.py) over a corpus of synthetic decks:
+time to build the deck-by-card matrix, and to compute each aggregate. Run with
+and without NumPy (and SciPy) installed to compare vectorised and pure Python
+aggregates.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_analytics --decks 5000
+"""
+from argparse import ArgumentParser
+import json
+
+from benchmarks.common import DEFAULT_DB_FILEPATH, best_of, synthetic_decklists
+from cli import load_cards_db
+from data import ScryfallDB
+from deck import Deck
+from deck_analytics import DeckCardMatrix, MetagameAnalytics, card_columns
+import deck_analytics
+from deck_parser import DeckParser
+
+
+def run(db: ScryfallDB, no_decks: int, seed: int, repeat: int) -> dict:
+    deck_parser = DeckParser(cards_db=db)
+    decks = [
+        Deck(deck_parser.parse_card_list(dl))
+        for dl in synthetic_decklists(db, no_decks, seed=seed)
+    ]
+    columns = card_columns(db)
+    matrix = DeckCardMatrix(decks, columns)
+    analytics = MetagameAnalytics(matrix)
+    return {
+        "decks": no_decks,
+        "numpy": deck_analytics.np is not None,
+        "scipy": deck_analytics.sparse is not None,
+        "matrix_seconds": best_of(lambda: DeckCardMatrix(decks, columns), repeat),
+        "inclusion_rates_seconds": best_of(analytics.inclusion_rates, repeat),
+        "average_copies_seconds": best_of(analytics.average_copies, repeat),
+        "co_occurrences_seconds": best_of(analytics.co_occurrences, repeat),
+        "colour_shares_seconds": best_of(analytics.colour_shares, repeat),
+    }
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Metagame analytics benchmark")
+    parser.add_argument(
+        "--db",
+        default=DEFAULT_DB_FILEPATH,
+        dest="db_filepath",
+        help="Cards DB file (JSON, SQLite, or mmap: see cli.load_cards_db)",
+    )
+    parser.add_argument("--decks", type=int, default=5000, dest="no_decks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", default=None, dest="json_output")
+    args = parser.parse_args()
+
+    stats = run(load_cards_db(args.db_filepath), args.no_decks, args.seed, args.repeat)
+    for key, value in stats.items():
+        print(f"{key:>24}: {value}")
+    if args.json_output:
+        with open(args.json_output, "w") as json_file:
+            json.dump(stats, json_file, indent=2)
@@ -0,0 +1,119 @@
+"""
+Archetype classification (see deck_archetypes.py) against a synthetic library:
+each archetype is a random core of cards, and its reference (and test) decks
+play most of the core, along with random cards. Reports the classification
+latency per deck, and the share of test decks classified as their archetype.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_archetypes --archetypes 100 --references 5000
+"""
+from argparse import ArgumentParser
+import json
+import random
+import time
+
+from benchmarks.common import BASIC_LANDS, DEFAULT_DB_FILEPATH
+from cli import load_cards_db
+from data import ScryfallDB
+from deck import Deck
+from deck_archetypes import ArchetypeLibrary
+from deck_parser import DeckParser
+
+
+def _decklist(rnd: random.Random, core: list[str], names: list[str]) -> str:
+    cards = rnd.sample(core, 12) + rnd.sample(names, 4)
+    lines = [f"{rnd.randint(2, 4)} {name}" for name in cards]
+    lines.append(f"20 {rnd.choice(BASIC_LANDS)}")
+    return "\n".join(lines)
+
+
+def _card_copies(rnd: random.Random, core: list[str], names: list[str]) -> dict:
+    # as the deck list above, without parsing (see deck_card_copies)
+    cards = rnd.sample(core, 12) + rnd.sample(names, 4)
+    return {ScryfallDB.make_dbentry(name): rnd.randint(2, 4) for name in cards}
+
+
+def _spell_names(db: ScryfallDB) -> list[str]:
+    return sorted(
+        {card.name for card in db if card.type_line and "Land" not in card.type_line}
+    )
+
+
+def synthetic_archetypes(
+    db: ScryfallDB, no_archetypes: int, seed: int = 42
+) -> dict[str, list[str]]:
+    """Core cards of each (synthetic) archetype"""
+    rnd = random.Random(seed)
+    names = _spell_names(db)
+    return {f"Archetype {i}": rnd.sample(names, 16) for i in range(no_archetypes)}
+
+
+def run(
+    db: ScryfallDB, no_archetypes: int, no_references: int, no_decks: int, seed: int
+) -> dict:
+    rnd = random.Random(seed)
+    deck_parser = DeckParser(cards_db=db)
+    names = _spell_names(db)
+    archetypes = synthetic_archetypes(db, no_archetypes, seed=seed)
+    labels = sorted(archetypes)
+
+    start = time.perf_counter()
+    library = ArchetypeLibrary()
+    for i in range(no_references):
+        label = labels[i % len(labels)]
+        cards = _card_copies(rnd, archetypes[label], names)
+        library.add_cards(label, f"{label} #{i}", cards)
+    library.classify(Deck(deck_parser.parse_card_list("4 Dark Ritual")))  # weights
+    build_seconds = time.perf_counter() - start
+
+    test_decks = list()
+    for _ in range(no_decks):
+        label = rnd.choice(labels)
+        decklist = _decklist(rnd, archetypes[label], names)
+        test_decks.append((label, Deck(deck_parser.parse_card_list(decklist))))
+    latencies = list()
+    no_correct = 0
+    for label, deck in test_decks:
+        start = time.perf_counter()
+        matches = library.classify(deck, k=3)
+        latencies.append(time.perf_counter() - start)
+        no_correct += bool(matches) and matches[0].archetype == label
+    latencies.sort()
+    return {
+        "archetypes": no_archetypes,
+        "references": no_references,
+        "decks": no_decks,
+        "build_seconds": round(build_seconds, 3),
+        "classify_mean_ms": round(sum(latencies) / len(latencies) * 1e3, 3),
+        "classify_p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1e3, 3),
+        "accuracy": round(no_correct / no_decks, 4),
+    }
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Archetype classification benchmark")
+    parser.add_argument(
+        "--db",
+        default=DEFAULT_DB_FILEPATH,
+        dest="db_filepath",
+        help="Cards DB file (JSON, SQLite, or mmap: see cli.load_cards_db)",
+    )
+    parser.add_argument("--archetypes", type=int, default=100, dest="no_archetypes")
+    parser.add_argument("--references", type=int, default=5000, dest="no_references")
+    parser.add_argument("--decks", type=int, default=1000, dest="no_decks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, dest="json_output")
+    args = parser.parse_args()
+
+    stats = run(
+        load_cards_db(args.db_filepath),
+        args.no_archetypes,
+        args.no_references,
+        args.no_decks,
+        args.seed,
+    )
+    for key, value in stats.items():
+        print(f"{key:>18}: {value}")
+    if args.json_output:
+        with open(args.json_output, "w") as json_file:
+            json.dump(stats, json_file, indent=2)
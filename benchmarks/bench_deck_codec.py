@@ -0,0 +1,91 @@
+"""
+Compact deck serialisation (see deck_codec.py) vs. full card records (see
+Deck.mainboard_to_json): stored bytes per deck, and throughput of encoding
+and reloading decks (i.e. rebuilding them from card IDs), compared with
+parsing the deck lists all over again.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_deck_codec --decks 1000
+"""
+from argparse import ArgumentParser
+import json
+
+from benchmarks.common import DEFAULT_DB_FILEPATH, best_of, synthetic_decklists
+from cli import load_cards_db
+from data import ScryfallDB
+from deck import Deck
+from deck_codec import decode_deck, decode_deck_binary
+from deck_codec import encode_deck, encode_deck_binary
+from deck_parser import DeckParser
+
+
+def _full_json(deck: Deck) -> str:
+    return deck.mainboard_to_json() + deck.sideboard_to_json()
+
+
+def run(db: ScryfallDB, no_decks: int, seed: int, repeat: int) -> dict:
+    decklists = synthetic_decklists(db, no_decks, seed=seed)
+    deck_parser = DeckParser(cards_db=db)
+    decks = [Deck(deck_parser.parse_card_list(dl)) for dl in decklists]
+    db.card_by_id(decks[0].cards["Main"][0].card.cid)  # build the ID index
+
+    full = [_full_json(deck) for deck in decks]
+    compact = [json.dumps(encode_deck(deck), separators=(",", ":")) for deck in decks]
+    binary = [encode_deck_binary(deck) for deck in decks]
+
+    def per_sec(seconds: float) -> float:
+        return round(no_decks / seconds, 1)
+
+    return {
+        "decks": no_decks,
+        "bytes_per_deck": {
+            "full_json": round(sum(map(len, full)) / no_decks, 1),
+            "compact_json": round(sum(map(len, compact)) / no_decks, 1),
+            "binary": round(sum(map(len, binary)) / no_decks, 1),
+        },
+        "encode_decks_per_sec": {
+            "full_json": per_sec(best_of(lambda: list(map(_full_json, decks)), repeat)),
+            "compact_json": per_sec(
+                best_of(lambda: [json.dumps(encode_deck(d)) for d in decks], repeat)
+            ),
+            "binary": per_sec(
+                best_of(lambda: list(map(encode_deck_binary, decks)), repeat)
+            ),
+        },
+        "load_decks_per_sec": {
+            "parse_decklist": per_sec(
+                best_of(
+                    lambda: [Deck(deck_parser.parse_card_list(dl)) for dl in decklists],
+                    repeat,
+                )
+            ),
+            "compact_json": per_sec(
+                best_of(lambda: [decode_deck(p, db) for p in compact], repeat)
+            ),
+            "binary": per_sec(
+                best_of(lambda: [decode_deck_binary(p, db) for p in binary], repeat)
+            ),
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Compact deck serialisation benchmark")
+    parser.add_argument(
+        "--db",
+        default=DEFAULT_DB_FILEPATH,
+        dest="db_filepath",
+        help="Cards DB file (JSON, SQLite, or mmap: see cli.load_cards_db)",
+    )
+    parser.add_argument("--decks", type=int, default=1000, dest="no_decks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", default=None, dest="json_output")
+    args = parser.parse_args()
+
+    stats = run(load_cards_db(args.db_filepath), args.no_decks, args.seed, args.repeat)
+    for key, value in stats.items():
+        print(f"{key:>20}: {value}")
+    if args.json_output:
+        with open(args.json_output, "w") as json_file:
+            json.dump(stats, json_file, indent=2)
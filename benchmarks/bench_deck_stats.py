@@ -0,0 +1,85 @@
+"""
+Deck stats (see Deck.stats) over a corpus of synthetic decks: time to compute
+the stats of all the decks from the precomputed card features, against
+re-parsing mana costs and type lines of each card (i.e. as rendering mana symbols
+in deck lists does). Card features are precomputed upfront, and timed apart.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_deck_stats --decks 5000
+"""
+from argparse import ArgumentParser
+import json
+import re
+
+from benchmarks.common import DEFAULT_DB_FILEPATH, best_of, synthetic_decklists
+from cli import load_cards_db
+from data import Color, ScryfallDB
+from deck import Deck
+from deck_parser import DeckParser, MAIN_DECK
+
+_TYPES = ("Artifact", "Creature", "Enchantment", "Instant", "Land", "Sorcery")
+
+
+def reparsed_stats(deck: Deck) -> dict:
+    """Stats of the Main deck, re-parsing the mana cost and type line of cards"""
+    stats = {"lands": 0, "spells": 0, "curve": {}, "pips": {}, "types": {}}
+    for token in deck.cards[MAIN_DECK.name]:
+        card, quantity = token.card, token.quantity
+        type_line = card.type_line or ""
+        if "Land" in type_line:
+            stats["lands"] += quantity
+        else:
+            stats["spells"] += quantity
+            cmc = min(int(card.cmc or 0), 7)
+            stats["curve"][cmc] = stats["curve"].get(cmc, 0) + quantity
+        for symbol in re.findall(r"{([^}]*)}", card.mana_cost or ""):
+            for part in symbol.upper().split("/"):
+                if part in Color.__members__:
+                    colour = Color[part]
+                    stats["pips"][colour] = stats["pips"].get(colour, 0) + quantity
+        for card_type in _TYPES:
+            if card_type in type_line:
+                stats["types"][card_type] = stats["types"].get(card_type, 0) + quantity
+    return stats
+
+
+def run(db: ScryfallDB, no_decks: int, seed: int, repeat: int) -> dict:
+    deck_parser = DeckParser(cards_db=db)
+    decklists = list(synthetic_decklists(db, no_decks, seed=seed))
+    decks = [Deck(deck_parser.parse_card_list(dl)) for dl in decklists]
+
+    def compute_stats():
+        for deck in decks:
+            deck._stats.clear()  # time the computation, not the memoised stats
+            deck.stats()
+
+    return {
+        "decks": no_decks,
+        "precompute_features_seconds": best_of(db.precompute_card_features, 1),
+        "stats_seconds": best_of(compute_stats, repeat),
+        "reparse_seconds": best_of(
+            lambda: [reparsed_stats(deck) for deck in decks], repeat
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Deck stats benchmark")
+    parser.add_argument(
+        "--db",
+        default=DEFAULT_DB_FILEPATH,
+        dest="db_filepath",
+        help="Cards DB file (JSON, SQLite, or mmap: see cli.load_cards_db)",
+    )
+    parser.add_argument("--decks", type=int, default=5000, dest="no_decks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", default=None, dest="json_output")
+    args = parser.parse_args()
+
+    stats = run(load_cards_db(args.db_filepath), args.no_decks, args.seed, args.repeat)
+    for key, value in stats.items():
+        print(f"{key:>28}: {value}")
+    if args.json_output:
+        with open(args.json_output, "w") as json_file:
+            json.dump(stats, json_file, indent=2)
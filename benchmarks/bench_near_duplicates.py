@@ -0,0 +1,160 @@
+"""
+Near-duplicate deck detection (see deck_similarity.py) on a synthetic corpus:
+random decks, along with near-duplicates of some of them (differing by up to
+three sideboard cards). Reports the time to sign and index all the decks, and
+to find the candidate pairs, the recall of the planted near-duplicates, and
+the time to compare all the pairs of decks (i.e. without LSH), extrapolated
+from a sample of decks.
+
+Decks are built straight from card tokens (i.e. not parsed from deck lists).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_near_duplicates --decks 10000
+"""
+from argparse import ArgumentParser
+import json
+import random
+import time
+
+from benchmarks.common import BASIC_LANDS, DEFAULT_DB_FILEPATH, load_db
+from data import Card, ScryfallDB
+from deck import Deck
+from deck_parser import DeckSection, Token, TokenType, MAIN_DECK, SIDEBOARD
+from deck_similarity import LSHIndex, MinHasher, deck_shingles
+
+
+def _card_token(card: Card, count: int, section: DeckSection) -> Token:
+    return Token.CardToken(
+        token_type=TokenType.LEGAL_CARD,
+        card=card,
+        count=count,
+        deck_section=section,
+        card_has_setcode=True,
+    )
+
+
+def synthetic_corpus(
+    db: ScryfallDB, no_decks: int, duplicates_share: float, seed: int = 42
+) -> tuple[list[Deck], set[tuple[int, int]]]:
+    """Random decks, and the pairs (of indices) of planted near-duplicates"""
+    rnd = random.Random(seed)
+    cards = dict()
+    for card in db:
+        if card.type_line and "Basic Land" not in card.type_line:
+            cards.setdefault(card.name, card)
+    cards = [cards[name] for name in sorted(cards)]
+    basics = [next(db.lookup(name)) for name in BASIC_LANDS]
+
+    decks_tokens: list[list[Token]] = list()
+    planted = set()
+    for deck_index in range(no_decks):
+        if decks_tokens and rnd.random() < duplicates_share:
+            original = rnd.randrange(len(decks_tokens))
+            tokens = list(decks_tokens[original])
+            for _ in range(rnd.randint(1, 3)):  # swap sideboard cards
+                position = rnd.randrange(len(tokens) - 5, len(tokens))
+                tokens[position] = _card_token(
+                    rnd.choice(cards), tokens[position].quantity, SIDEBOARD
+                )
+            planted.add((original, deck_index))
+        else:
+            tokens = list()
+            main_count = 0
+            for card in rnd.sample(cards, 16):
+                copies = rnd.randint(1, 4)
+                tokens.append(_card_token(card, copies, MAIN_DECK))
+                main_count += copies
+            tokens.append(_card_token(rnd.choice(basics), 60 - main_count, MAIN_DECK))
+            tokens.extend(
+                _card_token(card, 3, SIDEBOARD) for card in rnd.sample(cards, 5)
+            )
+        decks_tokens.append(tokens)
+    return [Deck(tokens) for tokens in decks_tokens], planted
+
+
+def _jaccard(first: set, second: set) -> float:
+    return len(first & second) / len(first | second)
+
+
+def run(
+    db: ScryfallDB,
+    no_decks: int,
+    duplicates_share: float,
+    threshold: float,
+    no_sampled: int,
+    seed: int,
+) -> dict:
+    decks, planted = synthetic_corpus(db, no_decks, duplicates_share, seed=seed)
+
+    start = time.perf_counter()
+    hasher = MinHasher()
+    index = LSHIndex()
+    for deck_index, deck in enumerate(decks):
+        index.add(deck_index, hasher.deck_signature(deck))
+    index_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    pairs = index.near_duplicates(threshold)
+    pairs_seconds = time.perf_counter() - start
+
+    found = {(pair.first, pair.second) for pair in pairs}
+    shingles = [set(deck_shingles(deck)) for deck in decks]
+    # share of planted pairs found, among those of (exact) similarity >= threshold
+    expected = {
+        (a, b) for a, b in planted if _jaccard(shingles[a], shingles[b]) >= threshold
+    }
+    errors = [
+        abs(pair.similarity - _jaccard(shingles[pair.first], shingles[pair.second]))
+        for pair in pairs
+    ]
+
+    # all pairs of (a sample of) decks, with exact similarities
+    sample = shingles[:no_sampled]
+    start = time.perf_counter()
+    for i, first in enumerate(sample):
+        for second in sample[i + 1 :]:
+            _jaccard(first, second)
+    sample_seconds = time.perf_counter() - start
+    no_pairs = no_decks * (no_decks - 1) / 2
+    no_sampled_pairs = len(sample) * (len(sample) - 1) / 2
+    return {
+        "decks": no_decks,
+        "planted_pairs": len(planted),
+        "index_seconds": round(index_seconds, 3),
+        "pairs_seconds": round(pairs_seconds, 3),
+        "pairs_found": len(pairs),
+        "recall": round(len(expected & found) / len(expected), 4) if expected else None,
+        "mean_similarity_error": (
+            round(sum(errors) / len(errors), 4) if errors else None
+        ),
+        "all_pairs_seconds_estimate": round(
+            sample_seconds * no_pairs / no_sampled_pairs, 1
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="MinHash/LSH near-duplicate decks benchmark")
+    parser.add_argument("--db", default=DEFAULT_DB_FILEPATH, dest="db_filepath")
+    parser.add_argument("--decks", type=int, default=10000, dest="no_decks")
+    parser.add_argument(
+        "--duplicates", type=float, default=0.1, dest="duplicates_share"
+    )
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--sample", type=int, default=1000, dest="no_sampled")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, dest="json_output")
+    args = parser.parse_args()
+
+    stats = run(
+        load_db(args.db_filepath),
+        args.no_decks,
+        args.duplicates_share,
+        args.threshold,
+        args.no_sampled,
+        args.seed,
+    )
+    for key, value in stats.items():
+        print(f"{key:>28}: {value}")
+    if args.json_output:
+        with open(args.json_output, "w") as json_file:
+            json.dump(stats, json_file, indent=2)
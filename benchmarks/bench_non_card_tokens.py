@@ -0,0 +1,93 @@
+"""
+Classification speed of non-card lines (section headers, comments, card type,
+rarity, CMC and mana placeholders), on comment-heavy and header-heavy deck lists
+like those exported by Deckstats.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_non_card_tokens --decks 200
+"""
+from argparse import ArgumentParser
+import json
+import random
+
+from benchmarks.common import DEFAULT_DB_FILEPATH, best_of, load_db
+from data import ScryfallDB
+from deck_parser import DeckParser
+
+HEADERS = (
+    "//Main",
+    "//Sideboard",
+    "Creatures (20)",
+    "Instants",
+    "Sorceries",
+    "Enchantments",
+    "Artifacts",
+    "Lands",
+    "Common",
+    "Uncommon",
+    "Rare",
+    "CMC 1",
+    "CMC 3",
+    "White Blue",
+    "{R}-{G}",
+    "Deck: Benchmark",
+)
+COMMENTS = (
+    "// sideboard plan vs. aggro",
+    "# TODO: check the mana base",
+    "// Spells",
+    "random notes about this list",
+)
+
+
+def header_heavy_decklist(rnd: random.Random, card_names: list[str]) -> list[str]:
+    lines = list()
+    for name in rnd.sample(card_names, 20):
+        lines.append(rnd.choice(HEADERS))
+        lines.append(rnd.choice(COMMENTS))
+        lines.append(f"{rnd.randint(1, 4)} [{name[1]}] {name[0]}")
+    return lines
+
+
+def run(db: ScryfallDB, no_decks: int, seed: int, repeat: int) -> dict:
+    rnd = random.Random(seed)
+    card_names = sorted({(card.name, card.set_code.upper()) for card in db})
+    decklists = [header_heavy_decklist(rnd, card_names) for _ in range(no_decks)]
+    non_card_lines = [l for dl in decklists for l in dl if l in HEADERS or l in COMMENTS]
+    all_lines = sum(len(dl) for dl in decklists)
+    deck_parser = DeckParser(cards_db=db)
+
+    def classify():
+        for line in non_card_lines:
+            deck_parser._parse_non_card_token(line)
+
+    def parse():
+        for decklist in decklists:
+            deck_parser.parse_card_list(decklist)
+
+    classify_time = best_of(classify, repeat=repeat)
+    parse_time = best_of(parse, repeat=repeat)
+    return {
+        "decks": no_decks,
+        "non_card_lines": len(non_card_lines),
+        "non_card_lines_per_sec": round(len(non_card_lines) / classify_time, 2),
+        "lines": all_lines,
+        "parse_lines_per_sec": round(all_lines / parse_time, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Non-card token classification benchmark")
+    parser.add_argument("--db", default=DEFAULT_DB_FILEPATH, dest="db_filepath")
+    parser.add_argument("--decks", type=int, default=200, dest="no_decks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", default=None, dest="json_output")
+    args = parser.parse_args()
+
+    stats = run(load_db(args.db_filepath), args.no_decks, args.seed, args.repeat)
+    for key, value in stats.items():
+        print(f"{key:>24}: {value}")
+    if args.json_output:
+        with open(args.json_output, "w") as json_file:
+            json.dump(stats, json_file, indent=2)
@@ -0,0 +1,61 @@
+"""
+Speed of the line normalisation stage (DeckParser.normalise_line), measured
+separately from card matching, on a mix of plain, markdown, linked, split-card
+and commented deck list lines.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_normalise --lines 100000
+"""
+from argparse import ArgumentParser
+import json
+import random
+
+from benchmarks.common import best_of
+from deck_parser import DeckParser
+
+LINES = (
+    "4 Goblin Lackey",
+    "4 Mogg Fanatic (TMP) 190",
+    "4 [ICE] Pyroblast",
+    "2 Fire / Ice",
+    "1 Fire // Ice",
+    "* 4 [Goblin Lackey](https://scryfall.com/card/usg/190/goblin-lackey)",
+    "* 4 Gempalm Incinerator",
+    "4 Lim-Dûl’s Vault",
+    "# Creatures",
+    "// Sideboard",
+    "1 Goblin Ringleader #!Commander",
+    "",
+)
+
+
+def run(no_lines: int, seed: int, repeat: int) -> dict:
+    rnd = random.Random(seed)
+    lines = [rnd.choice(LINES) for _ in range(no_lines)]
+
+    def normalise():
+        for line in lines:
+            DeckParser.normalise_line(line)
+
+    elapsed = best_of(normalise, repeat=repeat)
+    return {
+        "lines": no_lines,
+        "seconds": round(elapsed, 4),
+        "lines_per_sec": round(no_lines / elapsed, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Line normalisation benchmark")
+    parser.add_argument("--lines", type=int, default=100_000, dest="no_lines")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", default=None, dest="json_output")
+    args = parser.parse_args()
+
+    stats = run(args.no_lines, args.seed, args.repeat)
+    for key, value in stats.items():
+        print(f"{key:>14}: {value}")
+    if args.json_output:
+        with open(args.json_output, "w") as json_file:
+            json.dump(stats, json_file, indent=2)
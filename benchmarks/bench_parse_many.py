@@ -0,0 +1,60 @@
+"""
+Throughput of DeckParser.parse_many against the number of worker processes,
+on a synthetic (deterministic) corpus of deck lists.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_parse_many --decks 1000 --workers 1 2 4
+"""
+from argparse import ArgumentParser
+import json
+import os
+import time
+
+from benchmarks.common import DEFAULT_DB_FILEPATH, load_db, synthetic_decklists
+from data import ScryfallDB
+from deck_parser import DeckParser
+
+
+def run(db: ScryfallDB, decklists: list[str], workers: int, chunksize: int) -> dict:
+    deck_parser = DeckParser(cards_db=db)
+    start = time.perf_counter()
+    results = deck_parser.parse_many(decklists, workers=workers, chunksize=chunksize)
+    elapsed = time.perf_counter() - start
+    return {
+        "workers": workers,
+        "chunksize": chunksize,
+        "decks": len(decklists),
+        "errors": sum(1 for r in results if not r.ok),
+        "seconds": round(elapsed, 4),
+        "decks_per_sec": round(len(decklists) / elapsed, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="DeckParser.parse_many throughput benchmark")
+    parser.add_argument("--db", default=DEFAULT_DB_FILEPATH, dest="db_filepath")
+    parser.add_argument("--decks", type=int, default=1000, dest="no_decks")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="*",
+        default=sorted({1, 2, os.cpu_count() or 1}),
+    )
+    parser.add_argument("--chunksize", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, dest="json_output")
+    args = parser.parse_args()
+
+    cards_db = load_db(args.db_filepath)
+    corpus = synthetic_decklists(cards_db, args.no_decks, seed=args.seed)
+    report = list()
+    for no_workers in args.workers:
+        stats = run(cards_db, corpus, no_workers, args.chunksize)
+        report.append(stats)
+        print(
+            f"workers={stats['workers']:>2}  decks/s={stats['decks_per_sec']:>9}  "
+            f"time={stats['seconds']}s  errors={stats['errors']}"
+        )
+    if args.json_output:
+        with open(args.json_output, "w") as json_file:
+            json.dump(report, json_file, indent=2)
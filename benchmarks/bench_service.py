@@ -0,0 +1,166 @@
+"""
+Load test of the deck checking HTTP service (see service.py), with the standard
+library only: the service is started in-process on a free local port, and
+a number of concurrent keep-alive clients send synthetic deck lists to it.
+
+Reports throughput, latency percentiles, and responses per HTTP status
+(e.g. 503 responses when backpressure kicks in).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_service --requests 2000 --concurrency 64 --workers 2
+"""
+from argparse import ArgumentParser
+import asyncio
+from collections import Counter
+import json
+import os
+import time
+
+from benchmarks.common import DEFAULT_DB_FILEPATH, load_db, synthetic_decklists
+from deck_parser import DeckParser
+from service import ACTIONS, VALIDATE, DeckWorker, ServiceLimits, start_service
+
+
+async def _client(
+    host: str,
+    port: int,
+    action: str,
+    bodies: list[bytes],
+    latencies: list[float],
+    statuses: Counter,
+) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            request = (
+                f"POST /{action} HTTP/1.1\r\nHost: {host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+            ).encode("latin-1") + body
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status_line = await reader.readline()
+            content_length = 0
+            while True:
+                header_line = (await reader.readline()).decode("latin-1").strip()
+                if not header_line:
+                    break
+                name, _, value = header_line.partition(":")
+                if name.lower() == "content-length":
+                    content_length = int(value)
+            await reader.readexactly(content_length)
+            latencies.append(time.perf_counter() - start)
+            statuses[int(status_line.split()[1])] += 1
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+async def run(
+    db_filepath: str,
+    no_requests: int,
+    concurrency: int,
+    workers: int,
+    batch_size: int,
+    batch_window: float,
+    max_pending: int,
+    action: str = VALIDATE,
+    seed: int = 42,
+) -> dict:
+    cards_db = load_db(db_filepath)
+    worker = DeckWorker(DeckParser(cards_db), cards_db)
+    decklists = synthetic_decklists(cards_db, min(no_requests, 500), seed=seed)
+    payload = {"format": "mtg_arena"} if action == "export" else {}
+    bodies = [
+        json.dumps(dict(payload, decklist=decklists[i % len(decklists)])).encode()
+        for i in range(no_requests)
+    ]
+
+    server, batcher_task, executor = await start_service(
+        worker,
+        host="127.0.0.1",
+        port=0,
+        workers=workers,
+        max_batch_size=batch_size,
+        batch_window=batch_window,
+        limits=ServiceLimits(max_pending=max_pending),
+    )
+    host, port = server.sockets[0].getsockname()[:2]
+    latencies = list()
+    statuses = Counter()
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(
+            *(
+                _client(
+                    host, port, action, bodies[i::concurrency], latencies, statuses
+                )
+                for i in range(concurrency)
+            )
+        )
+    finally:
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0.1)  # let connection handlers see clients hanging up
+        server.close()
+        await server.wait_closed()
+        batcher_task.cancel()
+        executor.shutdown(cancel_futures=True)
+
+    return {
+        "action": action,
+        "requests": no_requests,
+        "concurrency": concurrency,
+        "workers": workers,
+        "batch_size": batch_size,
+        "batch_window_ms": batch_window * 1000,
+        "max_pending": max_pending,
+        "seconds": round(elapsed, 4),
+        "requests_per_sec": round(no_requests / elapsed, 2),
+        "latency_ms": {
+            f"p{p}": round(_percentile(latencies, p) * 1000, 2) for p in (50, 95, 99)
+        },
+        "statuses": {str(status): n for status, n in sorted(statuses.items())},
+    }
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Deck checking HTTP service load test")
+    parser.add_argument("--db", default=DEFAULT_DB_FILEPATH, dest="db_filepath")
+    parser.add_argument("--requests", type=int, default=1000, dest="no_requests")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=16, dest="batch_size")
+    parser.add_argument(
+        "--batch-window-ms", type=float, default=5.0, dest="batch_window_ms"
+    )
+    parser.add_argument("--max-pending", type=int, default=256, dest="max_pending")
+    parser.add_argument("--action", choices=ACTIONS, default=VALIDATE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, dest="json_output")
+    args = parser.parse_args()
+
+    stats = asyncio.run(
+        run(
+            args.db_filepath,
+            args.no_requests,
+            args.concurrency,
+            args.workers,
+            args.batch_size,
+            args.batch_window_ms / 1000,
+            args.max_pending,
+            action=args.action,
+            seed=args.seed,
+        )
+    )
+    for key, value in stats.items():
+        print(f"{key:>16}: {value}")
+    if args.json_output:
+        with open(args.json_output, "w") as json_file:
+            json.dump(stats, json_file, indent=2)
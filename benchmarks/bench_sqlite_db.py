@@ -0,0 +1,192 @@
+"""
+Benchmark of the SQLite-backed (see sqlite_cards_db.py) and memory-mapped (see
+mmap_cards_db.py) cards DB backends vs. the default in-memory one: DB load time,
+card lookup latency (cold, i.e. first lookup of each card name, and warm),
+deck list parsing throughput, peak RSS, and private (i.e. not file-backed) RSS.
+Pages of memory-mapped files are shared by all the processes mapping them,
+therefore the private RSS is the memory cost of each further worker process.
+
+Each backend is measured in a fresh (spawned) process, so that RSS figures are
+not affected by each other (nor by building the DB files, if needed).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_sqlite_db --lookups 2000 --decks 200
+"""
+from argparse import ArgumentParser
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from typing import Optional
+
+from benchmarks.common import DEFAULT_DB_FILEPATH, load_db, synthetic_decklists
+from deck_parser import DeckParser
+
+MEMORY = "memory"
+SQLITE = "sqlite"
+MMAP = "mmap"
+BACKENDS = (MEMORY, SQLITE, MMAP)
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def _latency_stats(latencies: list[float]) -> dict:
+    return {
+        "mean_us": round(sum(latencies) / len(latencies) * 1e6, 2),
+        "p50_us": round(_percentile(latencies, 50) * 1e6, 2),
+        "p99_us": round(_percentile(latencies, 99) * 1e6, 2),
+    }
+
+
+def _proc_status_bytes(entry: str) -> Optional[int]:
+    try:
+        with open("/proc/self/status") as status_file:
+            for line in status_file:
+                if line.startswith(f"{entry}:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None  # not on Linux
+
+
+def _peak_rss_bytes() -> int:
+    # on Linux, ru_maxrss survives exec (i.e. it would include the parent process
+    # peak RSS at spawn time), whereas the VmHWM of the process memory does not
+    peak = _proc_status_bytes("VmHWM")
+    if peak is not None:
+        return peak
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # KB on Linux
+
+
+def measure(
+    backend: str, db_filepath: str, card_names: list[str], decklists: list[str]
+) -> dict:
+    """Measure a single backend (meant to run in a fresh process)"""
+    base_rss = _peak_rss_bytes()
+    start = time.perf_counter()
+    if backend == SQLITE:
+        from sqlite_cards_db import SQLiteScryfallDB
+
+        cards_db = SQLiteScryfallDB.from_file(db_filepath)
+    elif backend == MMAP:
+        from mmap_cards_db import MmapScryfallDB
+
+        cards_db = MmapScryfallDB.from_file(db_filepath)
+    else:
+        cards_db = load_db(db_filepath)
+    load_seconds = time.perf_counter() - start
+    load_rss = _peak_rss_bytes()
+
+    stats = {"backend": backend, "load_seconds": round(load_seconds, 4)}
+    for run in ("cold", "warm"):
+        latencies = list()
+        for card_name in card_names:
+            start = time.perf_counter()
+            tuple(cards_db.lookup(card_name))
+            latencies.append(time.perf_counter() - start)
+        stats[f"lookup_{run}"] = _latency_stats(latencies)
+
+    deck_parser = DeckParser(cards_db)
+    no_lines = sum(len(dl.splitlines()) for dl in decklists)
+    start = time.perf_counter()
+    for decklist in decklists:
+        deck_parser.parse_card_list(decklist)
+    parse_seconds = time.perf_counter() - start
+    stats["parse_lines_per_sec"] = round(no_lines / parse_seconds, 2)
+    stats["rss_base_bytes"] = base_rss
+    stats["rss_after_load_bytes"] = load_rss
+    stats["rss_peak_bytes"] = _peak_rss_bytes()
+    stats["rss_private_bytes"] = _proc_status_bytes("RssAnon")
+    return stats
+
+
+def run(
+    db_filepath: str,
+    sqlite_filepath: str,
+    mmap_filepath: str,
+    no_lookups: int,
+    no_decks: int,
+    seed: int = 42,
+) -> dict:
+    cards_db = load_db(db_filepath)
+    if not os.path.exists(sqlite_filepath):
+        from sqlite_cards_db import build_sqlite_db
+
+        build_sqlite_db(cards_db, sqlite_filepath)
+    if not os.path.exists(mmap_filepath):
+        from mmap_cards_db import build_mmap_db
+
+        build_mmap_db(cards_db, mmap_filepath)
+    card_names = sorted({card.name for card in cards_db})
+    card_names = random.Random(seed).sample(
+        card_names, min(no_lookups, len(card_names))
+    )
+    decklists = synthetic_decklists(cards_db, no_decks, seed=seed)
+    del cards_db
+
+    report = dict()
+    mp_context = multiprocessing.get_context("spawn")
+    filepaths = {MEMORY: db_filepath, SQLITE: sqlite_filepath, MMAP: mmap_filepath}
+    for backend in BACKENDS:
+        with mp_context.Pool(processes=1) as pool:
+            report[backend] = pool.apply(
+                measure, (backend, filepaths[backend], card_names, decklists)
+            )
+    report["sqlite_db_bytes"] = os.path.getsize(sqlite_filepath)
+    report["mmap_db_bytes"] = os.path.getsize(mmap_filepath)
+    return report
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="SQLite vs. in-memory cards DB benchmark")
+    parser.add_argument("--db", default=DEFAULT_DB_FILEPATH, dest="db_filepath")
+    parser.add_argument(
+        "--sqlite",
+        default=None,
+        dest="sqlite_filepath",
+        help="SQLite cards DB file (default: built from --db in a temporary folder)",
+    )
+    parser.add_argument(
+        "--mmap",
+        default=None,
+        dest="mmap_filepath",
+        help="Memory-mappable cards DB file (default: built from --db, as --sqlite)",
+    )
+    parser.add_argument("--lookups", type=int, default=2000, dest="no_lookups")
+    parser.add_argument("--decks", type=int, default=200, dest="no_decks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, dest="json_output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bench_report = run(
+            args.db_filepath,
+            args.sqlite_filepath or os.path.join(tmp_dir, "cards.sqlite"),
+            args.mmap_filepath or os.path.join(tmp_dir, "cards.mmap"),
+            args.no_lookups,
+            args.no_decks,
+            seed=args.seed,
+        )
+    for backend in BACKENDS:
+        stats = bench_report[backend]
+        private_rss = stats["rss_private_bytes"]
+        print(
+            f"{backend:>7}: load={stats['load_seconds']}s  "
+            f"lookup cold={stats['lookup_cold']}  warm={stats['lookup_warm']}  "
+            f"parse lines/s={stats['parse_lines_per_sec']}  "
+            f"peak RSS={stats['rss_peak_bytes'] / 2**20:.1f} MB  "
+            f"private RSS={private_rss / 2**20 if private_rss else 0:.1f} MB"
+        )
+    print(f"SQLite DB file: {bench_report['sqlite_db_bytes'] / 2**20:.1f} MB")
+    print(f"mmap DB file: {bench_report['mmap_db_bytes'] / 2**20:.1f} MB")
+    if args.json_output:
+        with open(args.json_output, "w") as json_file:
+            json.dump(bench_report, json_file, indent=2)
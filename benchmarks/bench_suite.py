@@ -0,0 +1,228 @@
+"""
+Benchmark suite of the whole deck list pipeline, on a deterministic synthetic
+corpus (see benchmarks.corpus) covering all the supported deck list formats.
+
+Measured stages:
+- DB load time (from the shipped compressed DB file);
+- parsing throughput (lines and decks per second), per format;
+- card art harmonisation cost (parsing with vs. without optimise_card_art);
+- grouping throughput, per grouping strategy;
+- validation throughput;
+- export throughput, per exporter;
+- memory allocated while parsing the whole corpus (peak and retained).
+
+Results are printed, and optionally saved to JSON so that runs can be compared.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_suite --decks 200 --json bench_results.json
+"""
+from argparse import ArgumentParser
+import json
+import platform
+import time
+import tracemalloc
+from typing import Callable
+
+from benchmarks.common import DEFAULT_DB_FILEPATH, best_of, load_db
+from benchmarks.corpus import FORMATS, generate_corpus
+from data import ScryfallDB
+from deck import Deck
+from deck_export import DECK_EXPORTERS
+from deck_parser import DeckParser, ParseResult
+
+
+def _rate(amount: int, seconds: float) -> float:
+    return round(amount / seconds, 2) if seconds else 0.0
+
+
+def _best_of_fresh_decks(
+    func: Callable[[list[Deck]], object], parse_results: list[ParseResult], repeat: int
+) -> float:
+    """Return the best wall time over `repeat` runs of func, on fresh decks at each
+    run (built before timing): decks memoise deck lists and validation, which
+    would otherwise make any run after the first a mere lookup"""
+    timings = list()
+    for _ in range(repeat):
+        decks = [Deck(tokens) for tokens in parse_results]
+        start = time.perf_counter()
+        func(decks)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_db_load(db_filepath: str, repeat: int) -> dict:
+    return {"seconds": round(best_of(lambda: load_db(db_filepath), repeat), 4)}
+
+
+def bench_parse(db: ScryfallDB, corpus: dict[str, list[str]], repeat: int) -> dict:
+    deck_parser = DeckParser(cards_db=db)
+    stats = dict()
+    for fmt, decklists in corpus.items():
+        no_lines = sum(len(dl.splitlines()) for dl in decklists)
+        seconds = best_of(
+            lambda: [deck_parser.parse_card_list(dl) for dl in decklists], repeat
+        )
+        stats[fmt] = {
+            "decks": len(decklists),
+            "lines": no_lines,
+            "seconds": round(seconds, 4),
+            "lines_per_sec": _rate(no_lines, seconds),
+            "decks_per_sec": _rate(len(decklists), seconds),
+        }
+    return stats
+
+
+def bench_harmonise(db: ScryfallDB, decklists: list[str], repeat: int) -> dict:
+    plain_parser = DeckParser(cards_db=db)
+    harmonising_parser = DeckParser(cards_db=db, optimise_card_art=True)
+    plain = best_of(
+        lambda: [plain_parser.parse_card_list(dl) for dl in decklists], repeat
+    )
+    harmonised = best_of(
+        lambda: [harmonising_parser.parse_card_list(dl) for dl in decklists], repeat
+    )
+    return {
+        "decks": len(decklists),
+        "plain_seconds": round(plain, 4),
+        "harmonised_seconds": round(harmonised, 4),
+        "overhead_ratio": round(harmonised / plain, 3) if plain else 0.0,
+    }
+
+
+def bench_grouping(parse_results: list[ParseResult], repeat: int) -> dict:
+    stats = dict()
+    for grouping in (Deck.NOGROUP,) + Deck.SUPPORTED_GROUPS:
+        seconds = _best_of_fresh_decks(
+            lambda decks: [deck.deck_list(grouping) for deck in decks],
+            parse_results,
+            repeat,
+        )
+        stats[grouping] = {
+            "seconds": round(seconds, 4),
+            "decks_per_sec": _rate(len(parse_results), seconds),
+        }
+    return stats
+
+
+def bench_validation(parse_results: list[ParseResult], repeat: int) -> dict:
+    seconds = _best_of_fresh_decks(
+        lambda decks: [deck.validate() for deck in decks], parse_results, repeat
+    )
+    return {
+        "seconds": round(seconds, 4),
+        "decks_per_sec": _rate(len(parse_results), seconds),
+    }
+
+
+def bench_export(
+    db: ScryfallDB, parse_results: list[ParseResult], repeat: int
+) -> dict:
+    stats = dict()
+    for exporter_name, exporter_cls in DECK_EXPORTERS.items():
+        exporter = exporter_cls(db)
+        seconds = _best_of_fresh_decks(
+            lambda decks: [exporter.export(deck) for deck in decks],
+            parse_results,
+            repeat,
+        )
+        stats[exporter_name] = {
+            "seconds": round(seconds, 4),
+            "decks_per_sec": _rate(len(parse_results), seconds),
+        }
+    return stats
+
+
+def bench_memory(db: ScryfallDB, decklists: list[str]) -> dict:
+    deck_parser = DeckParser(cards_db=db)
+    deck_parser.parse_card_list(decklists[0])  # warm up
+    tracemalloc.start()
+    results = [deck_parser.parse_card_list(dl) for dl in decklists]
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "decks": len(results),
+        "retained_bytes": retained,
+        "peak_bytes": peak,
+    }
+
+
+def run(
+    db_filepath: str,
+    no_decks: int,
+    formats: tuple[str, ...] = FORMATS,
+    seed: int = 42,
+    repeat: int = 3,
+) -> dict:
+    start = time.perf_counter()
+    db = load_db(db_filepath)
+    corpus = generate_corpus(db, no_decks, formats, seed=seed)
+    all_decklists = [dl for decklists in corpus.values() for dl in decklists]
+    deck_parser = DeckParser(cards_db=db)
+    parse_results = [deck_parser.parse_card_list(dl) for dl in all_decklists]
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "db": db_filepath,
+            "decks_per_format": no_decks,
+            "formats": list(corpus),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "db_load": bench_db_load(db_filepath, repeat),
+        "parse": bench_parse(db, corpus, repeat),
+        "harmonise": bench_harmonise(db, all_decklists, repeat),
+        "grouping": bench_grouping(parse_results, repeat),
+        "validation": bench_validation(parse_results, repeat),
+        "export": bench_export(db, parse_results, repeat),
+        "memory": bench_memory(db, all_decklists),
+    }
+    report["meta"]["total_seconds"] = round(time.perf_counter() - start, 2)
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(f"DB load: {report['db_load']['seconds']}s")
+    print("Parsing:")
+    for fmt, stats in report["parse"].items():
+        print(
+            f"  {fmt:>12}  lines/s={stats['lines_per_sec']:>10}  "
+            f"decks/s={stats['decks_per_sec']:>9}"
+        )
+    harmonise = report["harmonise"]
+    print(
+        f"Harmonisation: {harmonise['harmonised_seconds']}s vs "
+        f"{harmonise['plain_seconds']}s (x{harmonise['overhead_ratio']})"
+    )
+    print("Grouping:")
+    for grouping, stats in report["grouping"].items():
+        print(f"  {grouping:>12}  decks/s={stats['decks_per_sec']:>9}")
+    print(f"Validation: decks/s={report['validation']['decks_per_sec']}")
+    print("Export:")
+    for exporter_name, stats in report["export"].items():
+        print(f"  {exporter_name:>16}  decks/s={stats['decks_per_sec']:>9}")
+    memory = report["memory"]
+    print(
+        f"Memory (parsing {memory['decks']} decks): peak={memory['peak_bytes']} B  "
+        f"retained={memory['retained_bytes']} B"
+    )
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Deck list pipeline benchmark suite")
+    parser.add_argument("--db", default=DEFAULT_DB_FILEPATH, dest="db_filepath")
+    parser.add_argument("--decks", type=int, default=100, dest="no_decks")
+    parser.add_argument("--formats", nargs="*", choices=FORMATS, default=FORMATS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", default=None, dest="json_output")
+    args = parser.parse_args()
+
+    bench_report = run(
+        args.db_filepath, args.no_decks, tuple(args.formats), args.seed, args.repeat
+    )
+    print_report(bench_report)
+    if args.json_output:
+        with open(args.json_output, "w") as json_file:
+            json.dump(bench_report, json_file, indent=2)
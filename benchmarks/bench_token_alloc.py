@@ -0,0 +1,65 @@
+"""
+Memory allocated by Token instances over a large batch parse: size of a single
+card token, and memory retained (and allocated at peak) by the parsed tokens
+of the whole batch, traced with tracemalloc.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_token_alloc --decks 1000
+"""
+from argparse import ArgumentParser
+import json
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import DEFAULT_DB_FILEPATH, load_db, synthetic_decklists
+from data import ScryfallDB
+from deck_parser import DeckParser
+
+
+def token_size(token) -> int:
+    size = sys.getsizeof(token)
+    if hasattr(token, "__dict__"):
+        size += sys.getsizeof(token.__dict__)
+    return size
+
+
+def run(db: ScryfallDB, no_decks: int, seed: int) -> dict:
+    decklists = synthetic_decklists(db, no_decks, seed=seed)
+    deck_parser = DeckParser(cards_db=db)
+    deck_parser.parse_card_list(decklists[0].splitlines())  # warm up
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    batch = [deck_parser.parse_card_list(dl.splitlines()) for dl in decklists]
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    no_tokens = sum(len(tokens) for tokens in batch)
+    card_token = next(t for tokens in batch for t in tokens if t.is_card_token)
+    return {
+        "decks": no_decks,
+        "tokens": no_tokens,
+        "card_token_bytes": token_size(card_token),
+        "retained_bytes": retained,
+        "retained_bytes_per_token": round(retained / no_tokens, 1),
+        "peak_bytes": peak,
+        "seconds": round(elapsed, 4),
+    }
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Token allocation benchmark")
+    parser.add_argument("--db", default=DEFAULT_DB_FILEPATH, dest="db_filepath")
+    parser.add_argument("--decks", type=int, default=1000, dest="no_decks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, dest="json_output")
+    args = parser.parse_args()
+
+    stats = run(load_db(args.db_filepath), args.no_decks, args.seed)
+    for key, value in stats.items():
+        print(f"{key:>26}: {value}")
+    if args.json_output:
+        with open(args.json_output, "w") as json_file:
+            json.dump(stats, json_file, indent=2)
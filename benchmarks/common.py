@@ -0,0 +1,52 @@
+"""Shared helpers for benchmark scripts."""
+import os
+import random
+import time
+from typing import Callable
+
+from data import ScryfallDB
+
+DEFAULT_DB_FILEPATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "premodern_db_compressed.bz",
+)
+
+BASIC_LANDS = ("Plains", "Island", "Swamp", "Mountain", "Forest")
+
+
+def synthetic_decklists(db: ScryfallDB, no_decks: int, seed: int = 42) -> list[str]:
+    rnd = random.Random(seed)
+    names = sorted(
+        {
+            card.name
+            for card in db
+            if card.type_line and "Basic Land" not in card.type_line
+        }
+    )
+    decklists = list()
+    for _ in range(no_decks):
+        main = list()
+        main_count = 0
+        for name in rnd.sample(names, 16):
+            copies = rnd.randint(1, 4)
+            main.append(f"{copies} {name}")
+            main_count += copies
+        main.append(f"{60 - main_count} {rnd.choice(BASIC_LANDS)}")
+        side = [f"{rnd.randint(1, 3)} {name}" for name in rnd.sample(names, 5)]
+        decklists.append("\n".join(main + ["", "Sideboard"] + side))
+    return decklists
+
+
+def load_db(db_filepath: str = DEFAULT_DB_FILEPATH) -> ScryfallDB:
+    return ScryfallDB.from_file(db_filepath)
+
+
+def best_of(func: Callable[[], object], repeat: int = 5) -> float:
+    """Return the best wall time (in seconds) over `repeat` runs of func"""
+    timings = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
@@ -0,0 +1,258 @@
+"""
+Deterministic generator of synthetic deck list corpora, drawn from the cards DB.
+
+The same (DB, seed, number of decks) always generate the very same corpus, in each
+of the deck list formats accepted by the parser (and emitted by the exporters):
+Arena, MTGGoldfish, XMage, Forge, Deckstats, MTGO, Markdown (e.g. TappedOut),
+plus a mixed/noisy text format (comments, headers, links, typos, odd spacing).
+
+Usage (from the repository root), to dump a corpus on disk:
+    python -m benchmarks.corpus --decks 100 --output-dir /tmp/corpus
+"""
+from argparse import ArgumentParser
+from dataclasses import dataclass
+import os
+import random
+from typing import Callable, Iterable
+
+from benchmarks.common import BASIC_LANDS, DEFAULT_DB_FILEPATH, load_db
+from data import Card, ScryfallDB
+
+ARENA = "arena"
+MTGGOLDFISH = "mtggoldfish"
+XMAGE = "xmage"
+FORGE = "forge"
+DECKSTATS = "deckstats"
+MTGO = "mtgo"
+MARKDOWN = "markdown"
+NOISY = "noisy"
+
+FORMATS = (ARENA, MTGGOLDFISH, XMAGE, FORGE, DECKSTATS, MTGO, MARKDOWN, NOISY)
+
+
+@dataclass
+class DeckSpec:
+    """Cards (and copies) of a synthetic deck, before being written in any format"""
+
+    name: str
+    main: list[tuple[Card, int]]
+    side: list[tuple[Card, int]]
+
+
+class CardPool:
+    """Printings of non-basic (and not banned) cards, with basic lands kept apart.
+    Only printings with a numeric collector number are drawn (e.g. no World
+    Championship decks' cards), as required by the XMage and Arena formats.
+    Cards are sorted, so that random draws only depend on the seed."""
+
+    def __init__(self, db: ScryfallDB):
+        printings = dict()
+        for card in db:
+            if not card.type_line or db.in_banned_list(card_name=card.name):
+                continue
+            if not card.collector_number.isdigit():
+                continue
+            printings.setdefault(card.name, list()).append(card)
+        self._printings = {
+            name: sorted(cards, key=lambda c: (c.set_code, c.collector_number))
+            for name, cards in printings.items()
+        }
+        self._basic_lands = tuple(n for n in BASIC_LANDS if n in self._printings)
+        self._names = sorted(
+            name
+            for name, cards in self._printings.items()
+            if "Basic Land" not in cards[0].type_line
+        )
+
+    def sample_cards(self, rnd: random.Random, no_cards: int) -> list[Card]:
+        names = rnd.sample(self._names, no_cards)
+        return [rnd.choice(self._printings[name]) for name in names]
+
+    def basic_land(self, rnd: random.Random) -> Card:
+        return rnd.choice(self._printings[rnd.choice(self._basic_lands)])
+
+
+def deck_spec(pool: CardPool, rnd: random.Random, deck_no: int) -> DeckSpec:
+    main = list()
+    main_count = 0
+    for card in pool.sample_cards(rnd, 16):
+        copies = rnd.randint(1, 4)
+        main.append((card, copies))
+        main_count += copies
+    main.append((pool.basic_land(rnd), 60 - main_count))
+    side = [(card, rnd.randint(1, 3)) for card in pool.sample_cards(rnd, 5)]
+    return DeckSpec(name=f"Synthetic Deck {deck_no}", main=main, side=side)
+
+
+# ==============
+# FORMAT WRITERS
+# ==============
+
+
+def write_arena(deck: DeckSpec, rnd: random.Random) -> list[str]:
+    def entry(card, copies):
+        set_code = card.set_code.upper()
+        return f"{copies} {card.name} ({set_code}) {card.collector_number}"
+
+    return (
+        ["Deck"]
+        + [entry(c, n) for c, n in deck.main]
+        + ["", "Sideboard"]
+        + [entry(c, n) for c, n in deck.side]
+    )
+
+
+def write_mtggoldfish(deck: DeckSpec, rnd: random.Random) -> list[str]:
+    def entry(card, copies):
+        return f"{copies} {card.name} [{card.set_code.upper()}]"
+
+    # sideboard only separated by an empty line
+    main = [entry(c, n) for c, n in deck.main]
+    return main + [""] + [entry(c, n) for c, n in deck.side]
+
+
+def write_xmage(deck: DeckSpec, rnd: random.Random) -> list[str]:
+    def entry(card, copies):
+        set_code = card.set_code.upper()
+        return f"{copies} [{set_code}:{card.collector_number}] {card.name}"
+
+    return (
+        [f"NAME:{deck.name}"]
+        + [entry(c, n) for c, n in deck.main]
+        + ["SB: " + entry(c, n) for c, n in deck.side]
+    )
+
+
+def write_forge(deck: DeckSpec, rnd: random.Random) -> list[str]:
+    def entry(card, copies):
+        return f"{copies} {card.name}|{card.set_code.upper()}|1"
+
+    return (
+        ["[metadata]", f"Name={deck.name}", "[Main]"]
+        + [entry(c, n) for c, n in deck.main]
+        + ["[Sideboard]"]
+        + [entry(c, n) for c, n in deck.side]
+    )
+
+
+def write_deckstats(deck: DeckSpec, rnd: random.Random) -> list[str]:
+    def entry(card, copies):
+        return f"{copies} [{card.set_code.upper()}] {card.name}"
+
+    return (
+        ["//Main"]
+        + [entry(c, n) for c, n in deck.main]
+        + ["", "//Sideboard"]
+        + [entry(c, n) for c, n in deck.side]
+    )
+
+
+def write_mtgo(deck: DeckSpec, rnd: random.Random) -> list[str]:
+    def entry(card, copies):
+        return f"{copies} {card.name}"
+
+    main = [entry(c, n) for c, n in deck.main]
+    return main + [""] + [entry(c, n) for c, n in deck.side]
+
+
+def write_markdown(deck: DeckSpec, rnd: random.Random) -> list[str]:
+    def entry(card, copies):
+        return (
+            f"* {copies} [{card.name}](https://scryfall.com/card/"
+            f"{card.set_code}/{card.collector_number})"
+        )
+
+    return (
+        [f"# {deck.name}", "", "## Main"]
+        + [entry(c, n) for c, n in deck.main]
+        + ["", "## Sideboard"]
+        + [entry(c, n) for c, n in deck.side]
+    )
+
+
+def write_noisy(deck: DeckSpec, rnd: random.Random) -> list[str]:
+    """Mix of entry styles, with comments, type headers, links, typos
+    (i.e. unknown cards), odd case and spacing"""
+
+    def entry(card, copies):
+        style = rnd.randrange(8)
+        name = card.name
+        if style == 0:
+            name = name.lower()
+        elif style == 1 and len(name) > 6:  # typo
+            cut = rnd.randrange(1, len(name) - 1)
+            name = name[:cut] + name[cut + 1 :]
+        elif style == 2:
+            return f"{copies}x {name}   "
+        elif style == 3:
+            set_code = card.set_code.upper()
+            return f"{copies} {name} ({set_code}) {card.collector_number}"
+        elif style == 4:
+            return f"{copies} [{card.set_code.upper()}] {name}"
+        elif style == 5:
+            return f"{copies} {name} https://scryfall.com/card/{card.set_code}"
+        return f"{copies}  {name}"
+
+    lines = [f"Deck: {deck.name}", "// imported from a forum post", ""]
+    lines.append(f"Creatures ({rnd.randint(8, 24)})")
+    for card, copies in deck.main:
+        if rnd.random() < 0.1:
+            lines.append(rnd.choice(("# notes", "", "Lands", "About")))
+        lines.append(entry(card, copies))
+    lines += ["", "Sideboard:"]
+    lines += [entry(c, n) for c, n in deck.side]
+    return lines
+
+
+FORMAT_WRITERS: dict[str, Callable[[DeckSpec, random.Random], list[str]]] = {
+    ARENA: write_arena,
+    MTGGOLDFISH: write_mtggoldfish,
+    XMAGE: write_xmage,
+    FORGE: write_forge,
+    DECKSTATS: write_deckstats,
+    MTGO: write_mtgo,
+    MARKDOWN: write_markdown,
+    NOISY: write_noisy,
+}
+
+
+def generate_corpus(
+    db: ScryfallDB,
+    no_decks: int,
+    formats: Iterable[str] = FORMATS,
+    seed: int = 42,
+) -> dict[str, list[str]]:
+    """Generate `no_decks` deck lists (as text) for each of the requested formats.
+    Each format draws its own decks, from a random generator seeded with
+    both seed and format name."""
+    pool = CardPool(db)
+    corpus = dict()
+    for fmt in formats:
+        writer = FORMAT_WRITERS[fmt]
+        rnd = random.Random(f"{seed}-{fmt}")
+        corpus[fmt] = [
+            "\n".join(writer(deck_spec(pool, rnd, deck_no), rnd))
+            for deck_no in range(1, no_decks + 1)
+        ]
+    return corpus
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Synthetic deck lists corpus generator")
+    parser.add_argument("--db", default=DEFAULT_DB_FILEPATH, dest="db_filepath")
+    parser.add_argument("--decks", type=int, default=100, dest="no_decks")
+    parser.add_argument("--formats", nargs="*", choices=FORMATS, default=FORMATS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output-dir", required=True, dest="output_dir")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(
+        load_db(args.db_filepath), args.no_decks, args.formats, seed=args.seed
+    )
+    for fmt, decklists in corpus.items():
+        fmt_dir = os.path.join(args.output_dir, fmt)
+        os.makedirs(fmt_dir, exist_ok=True)
+        for deck_no, decklist in enumerate(decklists, start=1):
+            with open(os.path.join(fmt_dir, f"deck_{deck_no:05d}.txt"), "w") as f:
+                f.write(decklist + "\n")
+        print(f"{fmt:>12}: {len(decklists)} deck lists")
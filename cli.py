@@ -0,0 +1,326 @@
+"""
+Headless command-line entry point, for bulk deck lists intake outside the browser.
+
+The cards DB is loaded once, from a local DB file, then each deck list is parsed,
+validated and (optionally) exported. One JSON object per deck list is written
+on a line of its own (JSON lines), reporting validation errors, warnings,
+and unknown cards.
+
+Usage:
+    python cli.py decks/*.txt --jobs 4 --format mtg_arena > results.jsonl
+    cat decklist.txt | python cli.py
+    python cli.py event.txt --split  # a single file with many deck lists
+    python cli.py decks/*.txt --cache results.sqlite  # reuse results across runs
+    python cli.py decks/*.txt --archetypes archetypes/  # classify deck lists
+    python cli.py decks/*.txt --stats  # mana curve, colour pips, and card types
+"""
+from argparse import ArgumentParser, BooleanOptionalAction
+import json
+import os
+import sys
+from typing import Iterable, Iterator, Optional
+
+from data import ScryfallDB
+from deck import Deck
+from deck_archetypes import ArchetypeLibrary
+from deck_export import DECK_EXPORTERS, DeckExporter
+from deck_formats import FORMAT_PROFILES, FormatProfile
+from deck_parser import DeckParser, MAIN_DECK, SIDEBOARD
+from result_cache import ResultCache
+
+DEFAULT_DB_FILEPATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "premodern_db_compressed.bz"
+)
+
+STDIN = "-"
+
+SQLITE_DB_EXTENSIONS = (".sqlite", ".sqlite3", ".db")
+MMAP_DB_EXTENSIONS = (".mmap",)
+
+
+def load_cards_db(db_filepath: str, **kwargs) -> ScryfallDB:
+    """Load the cards DB from file: SQLite (see sqlite_cards_db.py) and
+    memory-mappable (see mmap_cards_db.py) DB files are opened as they are,
+    whereas JSON DB files are loaded in memory."""
+    if db_filepath.endswith(SQLITE_DB_EXTENSIONS):
+        from sqlite_cards_db import SQLiteScryfallDB
+
+        return SQLiteScryfallDB.from_file(db_filepath, **kwargs)
+    if db_filepath.endswith(MMAP_DB_EXTENSIONS):
+        from mmap_cards_db import MmapScryfallDB
+
+        return MmapScryfallDB.from_file(db_filepath, **kwargs)
+    return ScryfallDB.from_file(db_filepath, **kwargs)
+
+
+class DeckListProcessor:
+    """Parse, validate and (optionally) export a single deck list into a
+    JSON-serialisable record. Deck lists are validated according to the format
+    profile, if any (see Deck.validate), and classified against the archetype
+    library, if any (top `top_archetypes` matches). Deck stats (see Deck.stats) are
+    reported if `stats` is set. Parsed and validated deck lists are looked up in
+    (and stored to) the result cache, if any."""
+
+    def __init__(
+        self,
+        deck_parser: DeckParser,
+        exporter: Optional[DeckExporter] = None,
+        cache: Optional[ResultCache] = None,
+        profile: Optional[FormatProfile] = None,
+        archetypes: Optional[ArchetypeLibrary] = None,
+        top_archetypes: int = 3,
+        stats: bool = False,
+    ):
+        self._deck_parser = deck_parser
+        self._exporter = exporter
+        self._cache = cache
+        self._profile = profile
+        self._archetypes = archetypes
+        self._top_archetypes = top_archetypes
+        self._stats = stats
+
+    def process(self, entry: tuple[dict, Optional[list[str]]]) -> dict:
+        record, lines = entry
+        record = dict(record)
+        if lines is None:  # deck list could not be read
+            return record
+        try:
+            if self._cache is not None:
+                cached_deck = self._cache.parse_and_validate(
+                    self._deck_parser, lines, self._profile
+                )
+                deck = Deck(cached_deck.tokens)
+                errors = cached_deck.errors
+                warnings = cached_deck.warnings
+                unknown_cards = cached_deck.unknown_cards
+            else:
+                deck = Deck(self._deck_parser.parse_card_list(lines))
+                errors, warnings, unknown_cards = deck.validate(self._profile)
+            record.update(
+                {
+                    "deck_name": deck.name or None,
+                    "valid": not errors,
+                    "main": deck.total_cards_in(MAIN_DECK.name),
+                    "sideboard": deck.total_cards_in(SIDEBOARD.name),
+                    "errors": [str(e) for e in errors],
+                    "warnings": [str(w) for w in warnings],
+                    "unknown_cards": [str(u) for u in unknown_cards],
+                }
+            )
+            if self._archetypes is not None:
+                record["archetypes"] = [
+                    match.to_json()
+                    for match in self._archetypes.classify(deck, self._top_archetypes)
+                ]
+            if self._stats:
+                record["stats"] = {
+                    section.name: deck.stats(section.name).to_json()
+                    for section in (MAIN_DECK, SIDEBOARD)
+                }
+            if self._exporter is not None:
+                record["export"] = self._exporter.export(deck)
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        return record
+
+
+def read_decklists(
+    sources: Iterable[str], split: bool
+) -> Iterator[tuple[dict, Optional[list[str]]]]:
+    """Lazily read deck lists from files (or stdin), along with the base
+    record identifying each one in the output. Files that cannot be read
+    are reported in their record, with no deck list lines (None)."""
+    for source in sources:
+        try:
+            if source == STDIN:
+                lines = sys.stdin.read().splitlines()
+            else:
+                with open(source, encoding="utf-8", errors="replace") as dl_file:
+                    lines = dl_file.read().splitlines()
+        except OSError as e:
+            yield {"source": source, "error": f"{type(e).__name__}: {e}"}, None
+            continue
+        if not split:
+            yield {"source": source}, lines
+            continue
+        for index, span in enumerate(DeckParser.split_decklists(lines)):
+            yield {
+                "source": source,
+                "index": index,
+                "start": span.start,
+                "end": span.end,
+            }, span.lines
+
+
+def process_all(
+    processor: DeckListProcessor,
+    entries: Iterable[tuple[dict, Optional[list[str]]]],
+    jobs: int = 1,
+    chunksize: int = 4,
+) -> Iterator[dict]:
+    """Process all the deck lists, in input order, on `jobs` worker processes"""
+    if jobs <= 1:
+        yield from map(processor.process, entries)
+        return
+
+    import multiprocessing
+
+    # workers are forked whenever possible, to inherit the (already loaded) cards DB
+    if "fork" in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context("fork")
+    else:
+        mp_context = multiprocessing.get_context()
+    with mp_context.Pool(
+        processes=jobs, initializer=_init_worker, initargs=(processor,)
+    ) as pool:
+        yield from pool.imap(_process_in_worker, entries, chunksize=max(1, chunksize))
+
+
+_WORKER_PROCESSOR: Optional[DeckListProcessor] = None
+
+
+def _init_worker(processor: DeckListProcessor) -> None:
+    global _WORKER_PROCESSOR
+    _WORKER_PROCESSOR = processor
+
+
+def _process_in_worker(entry: tuple[dict, Optional[list[str]]]) -> dict:
+    return _WORKER_PROCESSOR.process(entry)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = ArgumentParser(
+        description="Parse, validate and export deck lists (JSON lines output)."
+    )
+    parser.add_argument(
+        "sources",
+        nargs="*",
+        default=[STDIN],
+        help="Deck list files to process (default: read from stdin)",
+    )
+    parser.add_argument(
+        "--db",
+        default=DEFAULT_DB_FILEPATH,
+        dest="db_filepath",
+        help="Path to the cards DB file (JSON, bz2-compressed JSON, SQLite, or mmap)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes (default: 1)",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=sorted(DECK_EXPORTERS),
+        default=None,
+        dest="export_format",
+        help="Export each deck in the given format (included in the output)",
+    )
+    parser.add_argument(
+        "--split",
+        default=False,
+        action=BooleanOptionalAction,
+        help="Whether each file may contain multiple deck lists (one per deck name)",
+    )
+    parser.add_argument(
+        "--rules",
+        choices=sorted(FORMAT_PROFILES),
+        default=None,
+        help="Validate deck lists according to the rules of the format "
+        "(default: Premodern)",
+    )
+    parser.add_argument(
+        "--archetypes",
+        default=None,
+        dest="archetypes_path",
+        help="Archetype library (JSON file, or folder of deck lists per archetype) "
+        "to classify deck lists against",
+    )
+    parser.add_argument(
+        "--top-archetypes",
+        type=int,
+        default=3,
+        dest="top_archetypes",
+        help="Number of archetype matches reported per deck list (default: 3)",
+    )
+    parser.add_argument(
+        "--stats",
+        default=False,
+        action=BooleanOptionalAction,
+        help="Whether to report the mana curve, colour pips and card types of decks",
+    )
+    parser.add_argument(
+        "--optimise-card-art",
+        default=False,
+        action=BooleanOptionalAction,
+        dest="optimise_card_art",
+        help="Whether to harmonise card art across each deck",
+    )
+    parser.add_argument(
+        "--cache",
+        default=None,
+        dest="cache_filepath",
+        help="SQLite file caching parsed and validated deck lists across runs",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=64,
+        dest="cache_max_mb",
+        help="Maximum size of cached results, in MB (default: 64)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        dest="output_filepath",
+        help="Output JSON lines file (default: stdout)",
+    )
+    args = parser.parse_args(argv)
+
+    cards_db = load_cards_db(args.db_filepath)
+    deck_parser = DeckParser(cards_db, optimise_card_art=args.optimise_card_art)
+    exporter = (
+        DECK_EXPORTERS[args.export_format](cards_db) if args.export_format else None
+    )
+    cache = (
+        ResultCache(args.cache_filepath, max_bytes=args.cache_max_mb * 1024 * 1024)
+        if args.cache_filepath
+        else None
+    )
+    profile = FORMAT_PROFILES[args.rules] if args.rules else None
+    archetypes = (
+        ArchetypeLibrary.load(args.archetypes_path, deck_parser)
+        if args.archetypes_path
+        else None
+    )
+    if args.stats and args.jobs > 1:
+        cards_db.precompute_card_features()  # once, before forking workers
+    processor = DeckListProcessor(
+        deck_parser,
+        exporter,
+        cache,
+        profile,
+        archetypes,
+        args.top_archetypes,
+        stats=args.stats,
+    )
+
+    output = open(args.output_filepath, "w") if args.output_filepath else sys.stdout
+    has_failures = False
+    try:
+        entries = read_decklists(args.sources, split=args.split)
+        for record in process_all(processor, entries, jobs=args.jobs):
+            has_failures = has_failures or "error" in record
+            output.write(json.dumps(record) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 1 if has_failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
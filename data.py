@@ -1,14 +1,23 @@
+import bz2
+import hashlib
+import json
+from bisect import bisect_right
+
 # Cards
 from dataclasses import dataclass, field
 from itertools import chain
-from enum import Enum
+import re
+from enum import Enum, IntFlag
 from datetime import date, datetime
+from time import perf_counter
 
 # ScryfallDB
-from typing import Iterable, Generator, Sequence, Optional
+from typing import Iterable, Generator, NamedTuple, Sequence, Optional
 
 from pytrie import StringTrie as Trie
 
+from instrumentation import ParserInstrumentation
+
 
 # -----
 # Cards
@@ -106,6 +115,96 @@ class Card:
         return json_repr
 
 
+class CardType(IntFlag):
+    ARTIFACT = 1
+    CREATURE = 2
+    ENCHANTMENT = 4
+    INSTANT = 8
+    LAND = 16
+    PLANESWALKER = 32
+    SORCERY = 64
+    TRIBAL = 128
+    # supertypes
+    BASIC = 256
+    LEGENDARY = 512
+    SNOW = 1024
+
+
+MANA_SYMBOL_PATTERN = re.compile(r"{([^}]*)}")
+
+# Layout of card stats vectors (see CardFeatures.stats_vector): no. of lands and
+# spells, colour pips (in Color order), no. of cards of each card type (in
+# CardType order), and (for spells only) mana curve buckets (cmc 0 to 7+) and cmc.
+STATS_LANDS = 0
+STATS_SPELLS = 1
+STATS_PIPS = 2
+STATS_TYPES = STATS_PIPS + len(Color)
+STATS_CURVE = STATS_TYPES + len(CardType)
+MAX_CURVE_CMC = 7
+STATS_CMC = STATS_CURVE + MAX_CURVE_CMC + 1
+STATS_VECTOR_SIZE = STATS_CMC + 1
+
+
+class CardFeatures(NamedTuple):
+    """Features of a card, parsed once from its mana cost and type line"""
+
+    # mana symbols (lowercase, without braces), e.g. ("2", "w", "w")
+    mana_symbols: tuple[str, ...]
+    # coloured mana symbols of each colour (in Color order), counting hybrid
+    # symbols towards each of their colours
+    pips: tuple[int, ...]
+    type_mask: CardType
+    cmc: int
+    # non-zero (position, value) entries of the card stats vector (see STATS_*)
+    stats_vector: tuple[tuple[int, int], ...]
+
+    @property
+    def is_land(self) -> bool:
+        return bool(self.type_mask & CardType.LAND)
+
+    @classmethod
+    def from_card(cls, card: Card) -> "CardFeatures":
+        mana_symbols = tuple(
+            symbol.strip().lower()
+            for symbol in MANA_SYMBOL_PATTERN.findall(card.mana_cost or "")
+        )
+        pips = [0] * len(Color)
+        for symbol in mana_symbols:
+            for part in symbol.split("/"):
+                if part in ("w", "u", "b", "r", "g"):
+                    pips[Color[part.upper()].value] += 1
+
+        type_mask = CardType(0)
+        for type_line in (card.type_line or "").split("//"):
+            for word in type_line.split("—")[0].split():
+                card_type = CardType.__members__.get(word.upper())
+                if card_type is not None:
+                    type_mask |= card_type
+        cmc = int(card.cmc or 0)
+
+        stats_vector = dict()
+        if type_mask & CardType.LAND:
+            stats_vector[STATS_LANDS] = 1
+        else:
+            stats_vector[STATS_SPELLS] = 1
+            stats_vector[STATS_CURVE + min(cmc, MAX_CURVE_CMC)] = 1
+            if cmc:
+                stats_vector[STATS_CMC] = cmc
+        for colour_index, no_pips in enumerate(pips):
+            if no_pips:
+                stats_vector[STATS_PIPS + colour_index] = no_pips
+        for type_index, card_type in enumerate(CardType):
+            if type_mask & card_type:
+                stats_vector[STATS_TYPES + type_index] = 1
+        return cls(
+            mana_symbols=mana_symbols,
+            pips=tuple(pips),
+            type_mask=type_mask,
+            cmc=cmc,
+            stats_vector=tuple(sorted(stats_vector.items())),
+        )
+
+
 # -----------
 # Scryfall DB
 # -----------
@@ -289,6 +388,10 @@ class ScryfallDB:
     (See PREMODERN_SETS and PREMODERN_EXTENDED_SETS as examples)
     """
 
+    # card features per (mana cost, type line, cmc), i.e. the card fields they are
+    # parsed from (see card_features)
+    _card_features: dict[tuple, CardFeatures] = dict()
+
     # Map of different set code between Scryfall and MTGO
     SET_RECODE_MAP = {
         "te": "tmp",
@@ -353,6 +456,9 @@ class ScryfallDB:
     ):
         self._db = json_db
         self._cards_map = Trie()
+        # per card name: release ordinals of printings (in preferred sets), and
+        # the printing to pick as the newest one up to each ordinal (lazily built)
+        self._release_index: dict[str, tuple[list[int], list[Card]]] = dict()
         self._load_cards_from_db()
         self._mtg_sets_map = self._init_mtg_sets_map()
         self._preferred_sets = preferred_sets
@@ -363,88 +469,114 @@ class ScryfallDB:
         self._restricted_list = tuple(
             [self.make_dbentry(card_name) for card_name in restricted_list]
         )
+        # optional lookups instrumentation (see ParserInstrumentation)
+        self.instrumentation: Optional[ParserInstrumentation] = None
+        self._version: Optional[str] = None
+        # index of cards by (Scryfall) ID, built on first use (see card_by_id)
+        self._cards_by_id: Optional[dict[str, Card]] = None
+
+    @classmethod
+    def from_file(cls, db_filepath: str, **kwargs) -> "ScryfallDB":
+        """Load the DB from a local (JSON) cards file, e.g. data/premodern_db_compressed.bz.
+        Files with a `.bz` or `.bz2` extension are decompressed first.
+        Any further keyword argument is passed through to the class constructor."""
+        with open(db_filepath, "rb") as db_file:
+            data = db_file.read()
+        if db_filepath.endswith((".bz", ".bz2")):
+            data = bz2.decompress(data)
+        return cls(json_db=json.loads(data), **kwargs)
 
     def _load_cards_from_db(self):
         for entry in self._db:
-            if entry.get("lang", "en") not in ("en", "it"):
+            card = self.card_from_entry(entry)
+            if card is None:
                 continue
-            if (
-                "games" in entry
-                and len(entry["games"]) == 1
-                and entry["games"][0] == "mtgo"
-            ):
-                continue  # skip Online-only Expansion Promo Sets
-
-            art_key = (
-                "image_uris"
-                if "image_uris" in entry
-                else "art"
-                if "art" in entry
-                else None
-            )
-            if art_key:
-                card_imagery = CardImagery(
-                    border_crop=entry[art_key]["border_crop"],
-                    art_crop=entry[art_key]["art_crop"],
-                    large=entry[art_key]["large"],
-                    normal=entry[art_key]["normal"],
-                    small=entry[art_key]["small"],
-                )
-            else:
-                card_imagery = None
-
-            if "color_identity" in entry:
-                color_identity = [Color[v.upper()] for v in entry["color_identity"]]
-            else:
-                color_identity = None
-
-            if "colors" in entry:
-                colors = [Color[c.upper()] for c in entry["colors"]]
-            else:
-                colors = None
-
-            rarity = Rarity[entry["rarity"].upper()]
-            cid = entry["id"] if "id" in entry else entry["cid"]
-            gatherer_uri = (
-                entry["related_uris"].get("gatherer", None)
-                if "related_uris" in entry
-                else entry.get("gatherer_uri", None)
-            )
-            if "has_foil" in entry:
-                has_foil = entry["has_foil"]
-            else:
-                has_foil = "finishes" in entry and "foil" in entry["finishes"]
-
-            card = Card(
-                cid=cid,
-                scryfall_uri=entry["scryfall_uri"],
-                gatherer_uri=gatherer_uri,
-                name=entry["name"],
-                released_at=entry["released_at"],
-                lang=entry["lang"],
-                colors=colors,
-                color_identity=color_identity,
-                mana_cost=entry.get("mana_cost", None),
-                cmc=float(entry.get("cmc", 0)),
-                type_line=entry.get("type_line", None),
-                oracle_text=entry.get("oracle_text", None),
-                legalities=entry["legalities"],
-                set_code=entry["set"] if "set" in entry else entry["set_code"],
-                set_name=entry["set_name"],
-                set_type=entry["set_type"],
-                set_uri=entry["set_uri"],
-                collector_number=entry["collector_number"],
-                rarity=rarity,
-                art=card_imagery,
-                artist=entry["artist"],
-                frame=entry["frame"],
-                border_color=entry["border_color"],
-                has_foil=has_foil,
-            )
             dbentry = self.make_dbentry(card.name)
             self._cards_map.setdefault(dbentry, list())
             self._cards_map[dbentry].append(card)
 
+    @staticmethod
+    def card_from_entry(entry: dict) -> Optional[Card]:
+        """Create a Card from a single (JSON) DB entry, either in the Scryfall
+        format or as exported by Card.to_json. Entries of cards that are not
+        relevant (e.g. unsupported languages) are skipped, returning None."""
+        if entry.get("lang", "en") not in ("en", "it"):
+            return None
+        if (
+            "games" in entry
+            and len(entry["games"]) == 1
+            and entry["games"][0] == "mtgo"
+        ):
+            return None  # skip Online-only Expansion Promo Sets
+
+        art_key = (
+            "image_uris"
+            if "image_uris" in entry
+            else "art"
+            if "art" in entry
+            else None
+        )
+        if art_key:
+            card_imagery = CardImagery(
+                border_crop=entry[art_key]["border_crop"],
+                art_crop=entry[art_key]["art_crop"],
+                large=entry[art_key]["large"],
+                normal=entry[art_key]["normal"],
+                small=entry[art_key]["small"],
+            )
+        else:
+            card_imagery = None
+
+        if "color_identity" in entry:
+            color_identity = [Color[v.upper()] for v in entry["color_identity"]]
+        else:
+            color_identity = None
+
+        if "colors" in entry:
+            colors = [Color[c.upper()] for c in entry["colors"]]
+        else:
+            colors = None
+
+        rarity = Rarity[entry["rarity"].upper()]
+        cid = entry["id"] if "id" in entry else entry["cid"]
+        gatherer_uri = (
+            entry["related_uris"].get("gatherer", None)
+            if "related_uris" in entry
+            else entry.get("gatherer_uri", None)
+        )
+        if "has_foil" in entry:
+            has_foil = entry["has_foil"]
+        else:
+            has_foil = "finishes" in entry and "foil" in entry["finishes"]
+
+        return Card(
+            cid=cid,
+            scryfall_uri=entry["scryfall_uri"],
+            gatherer_uri=gatherer_uri,
+            name=entry["name"],
+            released_at=entry["released_at"],
+            lang=entry.get("lang", "en"),
+            colors=colors,
+            color_identity=color_identity,
+            mana_cost=entry.get("mana_cost", None),
+            cmc=float(entry.get("cmc", 0)),
+            type_line=entry.get("type_line", None),
+            oracle_text=entry.get("oracle_text", None),
+            legalities=entry["legalities"],
+            set_code=entry["set"] if "set" in entry else entry["set_code"],
+            set_name=entry["set_name"],
+            set_type=entry["set_type"],
+            set_uri=entry["set_uri"],
+            collector_number=entry["collector_number"],
+            rarity=rarity,
+            art=card_imagery,
+            artist=entry["artist"],
+            frame=entry["frame"],
+            border_color=entry["border_color"],
+            has_foil=has_foil,
+        )
+
+
     @staticmethod
     def make_dbentry(name: str) -> str:
         return name.lower().replace(" ", "-")
@@ -490,6 +622,53 @@ class ScryfallDB:
             sorted in ascending order by release date (old first) and collector number.
             Empty result set will be returned if no match is found in the DB.
         """
+        if self.instrumentation is None:
+            return self._lookup(
+                card_name, set_code, set_art_index, set_collector_number, unique
+            )
+        # results are materialised to account for the (otherwise lazy) sorting too
+        start = perf_counter()
+        results = tuple(
+            self._lookup(
+                card_name, set_code, set_art_index, set_collector_number, unique
+            )
+        )
+        self.instrumentation.db_lookup(
+            self._lookup_query_shape(
+                card_name, set_code, set_art_index, set_collector_number
+            ),
+            perf_counter() - start,
+            len(results),
+        )
+        return iter(results)
+
+    @staticmethod
+    def _lookup_query_shape(
+        card_name: Optional[str],
+        set_code: Optional[str],
+        set_art_index: Optional[int],
+        set_collector_number: Optional[str],
+    ) -> str:
+        """Name of the query shape of a lookup (e.g. "name+set+collector_number")"""
+        shape = list()
+        if card_name is not None:
+            shape.append("prefix" if card_name.endswith("*") else "name")
+        if set_code is not None:
+            shape.append("set")
+            if set_collector_number is not None:
+                shape.append("collector_number")
+            elif set_art_index is not None:
+                shape.append("art_index")
+        return "+".join(shape) if shape else "empty"
+
+    def _lookup(
+        self,
+        card_name: Optional[str],
+        set_code: Optional[str],
+        set_art_index: Optional[int],
+        set_collector_number: Optional[str],
+        unique: bool,
+    ) -> Generator[Card, None, None]:
 
         is_card = (card_name is not None) and len(card_name.replace("*", ""))
         is_set = set_code is not None
@@ -507,10 +686,10 @@ class ScryfallDB:
 
             if card_name.endswith("*"):  # prefix search
                 db_key = self.make_dbentry(card_name.replace("*", "").strip())
-                entries = chain.from_iterable(self._cards_map.itervalues(prefix=db_key))
+                entries = self._cards_with_prefix(db_key)
             else:
                 db_key = self.make_dbentry(card_name)
-                entries = self._cards_map.get(db_key, tuple())
+                entries = self._cards_for_entry(db_key)
 
         if is_set:  # Lookup by set_code
             set_code = set_code.lower()
@@ -550,6 +729,16 @@ class ScryfallDB:
             self._result_set(entries, index=0)
         return self._result_set(entries)
 
+    # Cards storage access: any alternative storage backend (see SQLiteScryfallDB)
+    # has to override these methods, along with all_cards and __len__
+
+    def _cards_for_entry(self, db_key: str) -> Sequence[Card]:
+        """All the cards with the given DB entry name (see make_dbentry)"""
+        return self._cards_map.get(db_key, tuple())
+
+    def _cards_with_prefix(self, db_key_prefix: str) -> Iterable[Card]:
+        return chain.from_iterable(self._cards_map.itervalues(prefix=db_key_prefix))
+
     @staticmethod
     def _result_set(
         entries: Sequence[Card], index: int = None
@@ -566,6 +755,59 @@ class ScryfallDB:
                 for e in entries:
                     yield e
 
+    def latest_printing(self, card_name: str, release_date: date) -> Optional[Card]:
+        """Return the newest printing of the card released no later than
+        the given date (if any), among the preferred sets.
+        Among printings released on the same date, the one with the highest
+        collector number is returned."""
+        db_key = self.make_dbentry(card_name)
+        if db_key not in self._release_index:
+            self._release_index[db_key] = self._build_release_index(card_name)
+        ordinals, printings = self._release_index[db_key]
+        position = bisect_right(ordinals, release_date.toordinal())
+        if not position:
+            return None
+        return printings[position - 1]
+
+    def _build_release_index(self, card_name: str) -> tuple[list[int], list[Card]]:
+        ordinals = list()
+        printings = list()
+        previous_key = None
+        # lookup results come sorted by release date and collector number
+        for card in self.lookup(card_name=card_name, unique=False):
+            key = (card.release_date, card.collector_number)
+            ordinals.append(card.release_date.toordinal())
+            # on ties, keep the first printing found in the DB
+            printings.append(printings[-1] if key == previous_key else card)
+            previous_key = key
+        return ordinals, printings
+
+    def card_by_id(self, cid: str) -> Optional[Card]:
+        """Return the card (printing) with the given Scryfall ID, if any"""
+        if self._cards_by_id is None:
+            self._cards_by_id = {card.cid: card for card in self.all_cards}
+        return self._cards_by_id.get(cid)
+
+    @classmethod
+    def card_features(cls, card: Card) -> CardFeatures:
+        """Features of the card, parsed once per distinct mana cost, type line and
+        cmc (across cards, and DB instances): cards updated in a reloaded DB are
+        parsed again, as their key changes"""
+        key = (card.mana_cost, card.type_line, card.cmc)
+        features = cls._card_features.get(key)
+        if features is None:
+            features = cls._card_features[key] = CardFeatures.from_card(card)
+        return features
+
+    def precompute_card_features(self) -> int:
+        """Parse the features of all the cards in the DB upfront (e.g. before
+        forking worker processes), returning the number of cards"""
+        no_cards = 0
+        for card in self.all_cards:
+            self.card_features(card)
+            no_cards += 1
+        return no_cards
+
     def __len__(self) -> int:
         return sum(map(len, self._cards_map.values()))
 
@@ -586,6 +828,38 @@ class ScryfallDB:
             codename_seq.add((set_code, set_name))
         return {code: name for code, name in codename_seq}
 
+    @property
+    def version(self) -> str:
+        """Fingerprint of the cards in the DB (computed once), changing whenever
+        cards are added, removed, or any of their printing details change."""
+        if self._version is None:
+            self._version = self.fingerprint(self.all_cards)
+        return self._version
+
+    @staticmethod
+    def fingerprint(cards: Iterable[Card]) -> str:
+        digest = hashlib.sha256()
+        for card in sorted(cards, key=lambda c: c.cid):
+            digest.update(
+                f"{card.cid}|{card.name}|{card.set_code}|{card.collector_number}|"
+                f"{card.released_at}|{card.type_line}|{card.mana_cost}\n".encode()
+            )
+        return digest.hexdigest()[:16]
+
+    @property
+    def preferred_sets(self) -> tuple[str]:
+        return tuple(self._preferred_sets or ())
+
+    @property
+    def banned_list(self) -> tuple[str]:
+        """DB entries (see make_dbentry) of banned cards"""
+        return self._banned_list
+
+    @property
+    def restricted_list(self) -> tuple[str]:
+        """DB entries (see make_dbentry) of restricted cards"""
+        return self._restricted_list
+
     @property
     def mtg_sets_map(self) -> dict[str, str]:
         """returns a dictionary mapping expansion codes to their corresponding full names"""
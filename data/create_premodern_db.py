@@ -1,5 +1,7 @@
 from argparse import ArgumentParser, BooleanOptionalAction
 import json
+import os
+import sys
 from functools import partial
 from itertools import chain
 import compress_json
@@ -232,6 +234,23 @@ if __name__ == "__main__":
         required=False,
     )
 
+    parser.add_argument(
+        "--sqlite",
+        default=None,
+        help="Name of the SQLite DB file to generate, if any (see sqlite_cards_db.py)",
+        dest="sqlite_filename",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--mmap",
+        default=None,
+        help="Name of the memory-mappable DB file to generate, if any "
+        "(see mmap_cards_db.py)",
+        dest="mmap_filename",
+        required=False,
+    )
+
     parser.add_argument(
         "-l",
         "--languages",
@@ -271,3 +290,20 @@ if __name__ == "__main__":
             args.archive_filename,
             compression_kwargs={"compresslevel": 9},
         )
+
+    if args.sqlite_filename or args.mmap_filename:
+        # SQLite and mmap DBs are built by the app modules, in the parent folder
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from data import ScryfallDB
+
+        cards_db = ScryfallDB(json_db=premodern_cards)
+        if args.sqlite_filename:
+            from sqlite_cards_db import build_sqlite_db
+
+            no_cards = build_sqlite_db(cards_db, args.sqlite_filename)
+            print(f"{no_cards} cards written to {args.sqlite_filename}")
+        if args.mmap_filename:
+            from mmap_cards_db import build_mmap_db
+
+            no_cards = build_mmap_db(cards_db, args.mmap_filename)
+            print(f"{no_cards} cards written to {args.mmap_filename}")
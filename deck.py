@@ -1,8 +1,17 @@
+import hashlib
 import json
-from collections import defaultdict
-from deck_parser import DeckSection, TokenType, Token
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Hashable, Iterable, NamedTuple, Optional
+from typing import Union
+from data import Card, CardType, Color, Rarity, ScryfallDB
+from data import MAX_CURVE_CMC, STATS_CURVE, STATS_LANDS, STATS_PIPS, STATS_SPELLS
+from data import STATS_CMC, STATS_TYPES, STATS_VECTOR_SIZE
+from deck_parser import DeckSection, TokenType, Token, DeckParser, ParseResult
 from deck_parser import MAIN_DECK, SIDEBOARD
 
+if TYPE_CHECKING:
+    from deck_formats import DeckValidator, FormatProfile
+
 
 class DeckValidationError(Exception):
     def to_html(self):
@@ -70,6 +79,46 @@ class UnknownCard(DeckValidationInfo):
         super().__init__(msg)
 
 
+COLOURLESS_ARTIFACTS = "c"
+COLOURLESS_LANDS = "land"
+
+
+class CardGroupKeys(NamedTuple):
+    """Group keys of a card, one per grouping strategy (None if the card is not
+    listed in any group)"""
+
+    colour: Optional[Union[tuple[Color, ...], str]]
+    rarity: Rarity
+    spell: str
+    cmc: float
+    card_type: str
+
+
+class DeckStats(NamedTuple):
+    """Summary of the cards in a deck section (see Deck.stats)"""
+
+    lands: int
+    spells: int
+    # copies of spells per cmc (the last bucket counting MAX_CURVE_CMC or more)
+    mana_curve: dict[int, int]
+    # coloured mana symbols per colour, across all copies
+    pips: dict[Color, int]
+    # copies per card type (and supertype)
+    types: dict[CardType, int]
+    # average cmc of spells
+    average_cmc: float
+
+    def to_json(self) -> dict:
+        return {
+            "lands": self.lands,
+            "spells": self.spells,
+            "mana_curve": {str(cmc): n for cmc, n in self.mana_curve.items()},
+            "pips": {colour.name: n for colour, n in self.pips.items()},
+            "types": {card_type.name.lower(): n for card_type, n in self.types.items()},
+            "average_cmc": round(self.average_cmc, 2),
+        }
+
+
 class Deck:
     # GROUPING CONSTANTS
     NOGROUP = "NOGROUP"
@@ -81,49 +130,165 @@ class Deck:
 
     SUPPORTED_GROUPS = (COLOUR, TYPE, SPELL, RARITY, CMC)
 
+    # grouping strategy: index of the group key (see CardGroupKeys), and sort key
+    # of groups. Colour groups are sorted by (first) colour, then colourless
+    # artifacts and lands follow.
+    _GROUPINGS = {
+        COLOUR: (
+            0,
+            lambda colour: (
+                (0, tuple(c.value for c in colour))
+                if isinstance(colour, tuple)
+                else (1 if colour == COLOURLESS_ARTIFACTS else 2, ())
+            ),
+        ),
+        RARITY: (1, lambda rarity: rarity.value),
+        SPELL: (2, lambda card_type: card_type != "Spells"),
+        CMC: (3, None),
+        TYPE: (4, None),
+    }
+    # group keys per (type line, colour identity, rarity, cmc), i.e. the card fields
+    # they are computed from (see card_group_keys)
+    _card_group_keys: dict[tuple, CardGroupKeys] = dict()
+
     def __init__(
         self,
-        tokens: list[Token],
+        tokens: Union[list[Token], ParseResult],
         name: str = "",
         main_section: DeckSection = MAIN_DECK,
         side_section: DeckSection = SIDEBOARD,
+        cards_db: Optional[ScryfallDB] = None,
     ):
         self._name = name
         self._mainboard = main_section
         self._sideboard = side_section
-        self._unknown_cards = list()
+        # cards DB to look up the legality (i.e. banned and restricted lists) of
+        # cards added to the deck (see add)
+        self._cards_db = cards_db
 
-        deck_name_token = list(
-            filter(lambda t: t.token_type == TokenType.DECK_NAME, tokens)
-        )
-        if len(deck_name_token):
-            self._name = deck_name_token[0].text
+        # Note: tokens come already regrouped for any duplicates from Deck Parser,
+        # along with aggregates computed while parsing. Plain lists of tokens are
+        # aggregated here, in a single pass.
+        if not isinstance(tokens, ParseResult):
+            tokens = ParseResult.from_tokens(tokens)
+        self._parse_result = tokens
+
+        if tokens.deck_name is not None:
+            self._name = tokens.deck_name
 
         self._deck_cards: dict[str, list[Token]] = {
-            self._mainboard.name: [],
-            self._sideboard.name: [],
+            self._mainboard.name: tokens.sections.get(self._mainboard.name, []),
+            self._sideboard.name: tokens.sections.get(self._sideboard.name, []),
         }
         # a dictionary mapping each token associated to the same card
         # (used solely in deck validation)
-        self._cards_map: dict[str, list[Token]] = defaultdict(list)
-
-        self._initialise_deck(tokens)
-
-    def _initialise_deck(self, tokens: list[Token]) -> None:
-        # Note: tokens come already regrouped for any duplicates from Deck Parser
-        tokens_for_deck = filter(lambda t: t.is_card_token_for_deck, tokens)
-        for token in tokens_for_deck:
-            section = token.deck_section
-            if section is not None:
-                key = section.name
-                self._deck_cards[key].append(token)
-                self._cards_map[token.card.name].append(token)
-
-        unknown_cards = filter(lambda t: t.is_unknown_card, tokens)
-        for token in unknown_cards:
-            self._unknown_cards.append(token)
+        self._cards_map: dict[str, list[Token]] = tokens.cards_map
+        self._unknown_cards = tokens.unknown_cards
+
+        # validation state: totals are shared with the parse result, until the deck
+        # is first modified (see _make_editable). Copy limits and the names of cards
+        # exceeding them are computed on first validation (see _validation_state).
+        self._section_totals: dict[str, int] = tokens.section_totals
+        self._banned_totals: dict[str, int] = tokens.banned_totals
+        self._card_copies: dict[str, int] = tokens.card_copies
+        self._copy_limits: Optional[dict[str, Optional[int]]] = None
+        self._too_many_copies: dict[str, None] = dict()  # (ordered set)
+        # card tokens per section, and card token keys per card name, by section card
+        # key (see Token.section_card_key): only set once the deck is editable
+        self._section_tokens: Optional[dict[str, dict[tuple, Token]]] = None
+        self._name_keys: dict[str, dict[tuple, None]] = dict()
+        self._cards_stale = False
+        # group keys of card tokens, per section (see _section_group_keys)
+        self._group_keys: dict[str, list[CardGroupKeys]] = dict()
+        # memoised deck lists (and their HTML rows) per grouping, and validation
+        self._deck_lists: dict[str, list[Token]] = dict()
+        self._deck_lists_html: dict[str, str] = dict()
+        self._validation: Optional[tuple[tuple, tuple, tuple]] = None
+        # memoised fingerprints, with and without printings (see fingerprint)
+        self._fingerprints: dict[bool, str] = dict()
+        # memoised stats per section (see stats)
+        self._stats: dict[str, DeckStats] = dict()
+
+    @classmethod
+    def card_group_keys(cls, card: Card) -> CardGroupKeys:
+        """Group keys of the card, for all the grouping strategies (computed once
+        per distinct card fields they depend on, across decks and DB instances)"""
+        key = (
+            card.type_line,
+            tuple(card.color_identity) if card.color_identity else (),
+            card.rarity,
+            card.cmc,
+        )
+        group_keys = cls._card_group_keys.get(key)
+        if group_keys is None:
+            group_keys = cls._card_group_keys[key] = cls._compute_group_keys(card)
+        return group_keys
+
+    @staticmethod
+    def _compute_group_keys(card: Card) -> CardGroupKeys:
+        type_line = card.type_line
+        color_identity = tuple(card.color_identity) if card.color_identity else ()
+        if color_identity:
+            colour = color_identity if type_line != "Land" else None
+        elif type_line == "Artifact":
+            colour = COLOURLESS_ARTIFACTS
+        elif type_line == "Land":
+            colour = COLOURLESS_LANDS
+        else:
+            colour = None  # colourless cards are listed only if artifacts or lands
+
+        card_type = type_line.lower()
+        if card_type.startswith("creature"):
+            card_type = "creature"
+        elif "enchantment" in card_type:
+            card_type = "enchantment"
+        elif "land" in card_type:
+            card_type = "land"
+
+        return CardGroupKeys(
+            colour=colour,
+            rarity=card.rarity,
+            spell="Lands" if "Land" in type_line else "Spells",
+            cmc=card.cmc,
+            card_type=card_type,
+        )
 
-    def f_group_by_colour(self) -> list[Token]:
+    def _section_group_keys(self, section_name: str) -> list[CardGroupKeys]:
+        """Group keys of all the card tokens in the section (computed once)"""
+        group_keys = self._group_keys.get(section_name)
+        if group_keys is None:
+            group_keys = [
+                self.card_group_keys(t.card) for t in self.cards[section_name]
+            ]
+            self._group_keys[section_name] = group_keys
+        return group_keys
+
+    def _group_section(
+        self, section_name: str, grouping: str
+    ) -> list[tuple[Hashable, list[Token], int]]:
+        """Bucket the card tokens in the section in a single pass, according to
+        the grouping strategy. Groups (i.e. group key, card tokens, and total
+        number of cards) are returned sorted."""
+        key_index, sort_key = self._GROUPINGS[grouping]
+        buckets: dict[Hashable, tuple[list[Token], list[int]]] = dict()
+        cards = self.cards[section_name]
+        for token, group_keys in zip(cards, self._section_group_keys(section_name)):
+            group_key = group_keys[key_index]
+            if group_key is None:
+                continue
+            bucket = buckets.get(group_key)
+            if bucket is None:
+                bucket = buckets[group_key] = (list(), [0])
+            bucket[0].append(token)
+            bucket[1][0] += token.quantity
+        return [
+            (group_key, buckets[group_key][0], buckets[group_key][1][0])
+            for group_key in sorted(buckets, key=sort_key)
+        ]
+
+    def _grouped_deck_list(
+        self, grouping: str, group_token: Callable[[Hashable, int], Token]
+    ) -> list[Token]:
         tokens = list()
         for section in (self._mainboard, self._sideboard):
             key = section.name
@@ -133,236 +298,57 @@ class Deck:
             tokens.append(
                 Token.DeckSectionToken(section_name=key, count=self.total_cards_in(key))
             )
-            colours = set(
-                [
-                    tuple(t.card.color_identity)
-                    for t in self.cards[key]
-                    if t.card.color_identity
-                ]
-            )
-            colours = sorted(colours, key=lambda ci: ci[0].value)
-            for color_identity in colours:
-                cards_token_in_group = list(
-                    filter(
-                        lambda t: t.is_card_token_for_deck
-                        and t.card.color_identity
-                        and tuple(t.card.color_identity) == color_identity
-                        and t.card.type_line != "Land",
-                        self.cards[key],
-                    )
-                )
-                total_cards = sum(t.quantity for t in cards_token_in_group)
-                if not total_cards:
-                    continue
-                color_identity_str = "".join(
-                    ["%s" % c.name.lower() for c in color_identity]
-                )
-                mana_colour = Token(
-                    token_type=TokenType.MANA_COLOUR,
-                    text=color_identity_str,
-                    quantity=total_cards,
-                )
-                tokens.append(mana_colour)
-                for card_token in cards_token_in_group:
-                    tokens.append(card_token)
-            # colorless cards
-            colourless_artifacts = list(
-                filter(
-                    lambda t: t.is_card_token_for_deck
-                    and not t.card.color_identity
-                    and t.card.type_line == "Artifact",
-                    self.cards[key],
-                )
-            )
-            total_artifacts = sum(t.quantity for t in colourless_artifacts)
-            if total_artifacts:
-                mana_colour = Token(
-                    token_type=TokenType.MANA_COLOUR,
-                    text="c",
-                    quantity=total_artifacts,
-                )
-                tokens.append(mana_colour)
-                for card_token in colourless_artifacts:
-                    tokens.append(card_token)
-
-            colourless_lands = list(
-                filter(
-                    lambda t: t.is_card_token_for_deck
-                    and not t.card.color_identity
-                    and t.card.type_line == "Land",
-                    self.cards[key],
-                )
+            groups = self._group_section(key, grouping)
+            if grouping == self.SPELL and groups and groups[0][0] != "Spells":
+                continue  # lands are listed only along with spells
+            for group_key, cards_token_in_group, total_cards in groups:
+                tokens.append(group_token(group_key, total_cards))
+                tokens.extend(cards_token_in_group)
+        return tokens
+
+    def f_group_by_colour(self) -> list[Token]:
+        def group_token(colour: Union[tuple[Color, ...], str], total: int) -> Token:
+            if not isinstance(colour, str):
+                colour = "".join(["%s" % c.name.lower() for c in colour])
+            return Token(
+                token_type=TokenType.MANA_COLOUR, text=colour, quantity=total
             )
-            total_lands = sum(t.quantity for t in colourless_lands)
-            if total_lands:
-                mana_colour = Token(
-                    token_type=TokenType.MANA_COLOUR,
-                    text="land",
-                    quantity=total_lands,
-                )
-                tokens.append(mana_colour)
-                for card_token in colourless_lands:
-                    tokens.append(card_token)
 
-        return tokens
+        return self._grouped_deck_list(self.COLOUR, group_token)
 
     def f_group_by_rarity(self) -> list[Token]:
-        tokens = list()
-        for section in (self._mainboard, self._sideboard):
-            key = section.name
-            if not len(self.cards[key]):
-                continue
-            # start with section token
-            tokens.append(
-                Token.DeckSectionToken(section_name=key, count=self.total_cards_in(key))
-            )
-            rarities = list(set([t.card.rarity for t in self.cards[key]]))
-            rarities = sorted(rarities, key=lambda r: r.value)
-            for card_rarity in rarities:
-                cards_token_in_group = list(
-                    filter(
-                        lambda t: t.is_card_token_for_deck
-                        and t.card.rarity == card_rarity,
-                        self.cards[key],
-                    )
-                )
-                total_cards = sum(t.quantity for t in cards_token_in_group)
-                rarity_token = Token(
-                    token_type=TokenType.CARD_RARITY,
-                    text=card_rarity.name.title(),
-                    quantity=total_cards,
-                )
-                tokens.append(rarity_token)
-                for card_token in cards_token_in_group:
-                    tokens.append(card_token)
-        return tokens
+        return self._grouped_deck_list(
+            self.RARITY,
+            lambda rarity, total: Token(
+                token_type=TokenType.CARD_RARITY,
+                text=rarity.name.title(),
+                quantity=total,
+            ),
+        )
 
     def f_group_by_type(self) -> list[Token]:
-        tokens = list()
-        for section in (self._mainboard, self._sideboard):
-            key = section.name
-            if not len(self.cards[key]):
-                continue
-            # start with section token
-            tokens.append(
-                Token.DeckSectionToken(section_name=key, count=self.total_cards_in(key))
-            )
-            is_land = lambda t: "Land" in t.card.type_line
-            # Spells
-            cards_token_spells = list(
-                filter(
-                    lambda t: (t.is_card_token_for_deck) and not is_land(t),
-                    self.cards[key],
-                )
-            )
-            total_cards = sum(t.quantity for t in cards_token_spells)
-            if not total_cards:
-                continue
-            spell_token = Token(
-                token_type=TokenType.CARD_TYPE,
-                text="Spells",
-                quantity=total_cards,
-            )
-            tokens.append(spell_token)
-            for card_token in cards_token_spells:
-                tokens.append(card_token)
-
-            # Lands
-            cards_token_lands = list(
-                filter(
-                    lambda t: t.is_card_token_for_deck and is_land(t),
-                    self.cards[key],
-                )
-            )
-            total_cards = sum(t.quantity for t in cards_token_lands)
-            if not total_cards:
-                continue
-            land_token = Token(
-                token_type=TokenType.CARD_TYPE,
-                text="Lands",
-                quantity=total_cards,
-            )
-            tokens.append(land_token)
-            for card_token in cards_token_lands:
-                tokens.append(card_token)
-        return tokens
+        return self._grouped_deck_list(
+            self.SPELL,
+            lambda card_type, total: Token(
+                token_type=TokenType.CARD_TYPE, text=card_type, quantity=total
+            ),
+        )
 
     def f_group_by_cmc(self) -> list[Token]:
-        tokens = list()
-        for section in (self._mainboard, self._sideboard):
-            key = section.name
-            if not len(self.cards[key]):
-                continue
-            # start with section token
-            tokens.append(
-                Token.DeckSectionToken(section_name=key, count=self.total_cards_in(key))
-            )
-            cmcs = set([t.card.cmc for t in self.cards[key]])
-            cmcs = sorted(cmcs)
-            for cmc in cmcs:
-                cards_token_in_group = list(
-                    filter(
-                        lambda t: t.is_card_token_for_deck and t.card.cmc == cmc,
-                        self.cards[key],
-                    )
-                )
-                total_cards = sum(t.quantity for t in cards_token_in_group)
-                if not total_cards:
-                    continue
-                cmc_token = Token(
-                    token_type=TokenType.CARD_CMC,
-                    text=f"CMC-{int(cmc)}",
-                    quantity=total_cards,
-                )
-                tokens.append(cmc_token)
-                for card_token in cards_token_in_group:
-                    tokens.append(card_token)
-        return tokens
+        return self._grouped_deck_list(
+            self.CMC,
+            lambda cmc, total: Token(
+                token_type=TokenType.CARD_CMC, text=f"CMC-{int(cmc)}", quantity=total
+            ),
+        )
 
     def f_group_by_type_extended(self) -> list[Token]:
-        tokens = list()
-        for section in (self._mainboard, self._sideboard):
-            key = section.name
-            if not len(self.cards[key]):
-                continue
-            # start with section token
-            tokens.append(
-                Token.DeckSectionToken(section_name=key, count=self.total_cards_in(key))
-            )
-            all_card_types = [t.card.type_line.lower() for t in self.cards[key]]
-            card_types = list()
-            for ctype in all_card_types:
-                if ctype.startswith("creature"):
-                    card_types.append("creature")
-                elif "enchantment" in ctype:
-                    card_types.append("enchantment")
-                elif "land" in ctype:
-                    card_types.append("land")
-                else:
-                    card_types.append(ctype)
-            card_types = sorted(set(card_types))
-
-            for card_type in card_types:
-                cards_token_in_group = list(
-                    filter(
-                        lambda t: t.is_card_token_for_deck
-                        and card_type in t.card.type_line.lower(),
-                        self.cards[key],
-                    )
-                )
-                total_cards = sum(t.quantity for t in cards_token_in_group)
-                if not total_cards:
-                    continue
-
-                card_type_token = Token(
-                    token_type=TokenType.CARD_TYPE,
-                    text=card_type.lower(),
-                    quantity=total_cards,
-                )
-                tokens.append(card_type_token)
-                for card_token in cards_token_in_group:
-                    tokens.append(card_token)
-        return tokens
+        return self._grouped_deck_list(
+            self.TYPE,
+            lambda card_type, total: Token(
+                token_type=TokenType.CARD_TYPE, text=card_type, quantity=total
+            ),
+        )
 
     def f_no_group(self) -> list[Token]:
         tokens = list()
@@ -379,74 +365,57 @@ class Deck:
                 tokens.append(card_token)
         return tokens
 
-    def validate(self):
-        errors = list()
-        warnings = list()
-        unknown_cards = list()
-
-        # deck section size validation
-        no_cards_in_md = sum(
-            [
-                t.quantity
-                for t in self.cards[self._mainboard.name]
-                if t.token_type != TokenType.BANNED_CARD
-            ]
-        )
-        no_cards_in_sb = sum(
-            [
-                t.quantity
-                for t in self.cards[self._sideboard.name]
-                if t.token_type != TokenType.BANNED_CARD
-            ]
-        )
-
-        md_constraint_ok = self._mainboard.min_size <= no_cards_in_md
-        sb_constraint_ok = no_cards_in_sb <= self._sideboard.max_size
-
-        if not md_constraint_ok:
-            errors.append(MinDeckSizeConstraintError(self._mainboard, no_cards_in_md))
-
-        if not sb_constraint_ok:
-            errors.append(MaxDeckSizeConstraintError(self._sideboard, no_cards_in_sb))
-
-        if no_cards_in_sb == 0:
-            warnings.append(DeckSectionEmpty(deck_section=self._sideboard))
-
-        if no_cards_in_md > 60:
-            warnings.append(
-                TooManyCardsWarning(
-                    deck_section=self._mainboard, current_size=no_cards_in_md
-                )
-            )
-
-        # check card copies
-        for card_name in self._cards_map:
-            if not len(self._cards_map[card_name]):
+    def validate(self, profile: Optional["FormatProfile"] = None):
+        """Validate the deck, returning errors, warnings and unknown cards
+        (computed once). Decks are validated according to the Premodern rules
+        (i.e. deck_formats.PREMODERN, the only definition of those rules), unless
+        another format profile is specified (see deck_formats.FormatProfile)."""
+        if profile is not None:
+            return profile.validate(self)
+        if self._validation is None:
+            self._validation = self._default_validator().validate(self)
+        return self._validation
+
+    @staticmethod
+    def _default_validator() -> "DeckValidator":
+        # imported here, as format profiles are defined on top of decks
+        from deck_formats import PREMODERN
+
+        return PREMODERN.compile()
+
+    @classmethod
+    def copy_limit(cls, card_token: Token) -> Optional[int]:
+        """Maximum number of copies of the card allowed in the deck (None if not
+        limited, i.e. lands), according to the Premodern rules"""
+        return cls._default_validator().copy_limit(card_token)
+
+    def _validation_state(self) -> None:
+        """Compute copy limits per card name, and the names of cards exceeding them
+        (once: both are then maintained as the deck is modified)"""
+        if self._copy_limits is not None:
+            return
+        self._copy_limits = dict()
+        for card_name, card_tokens in self._cards_map.items():
+            if not len(card_tokens):
                 continue
-            c_type = self._cards_map[card_name][0].card.type_line
-            if "land" in c_type.lower():
-                continue
-            no_copies = sum([t.quantity for t in self._cards_map[card_name]])
-            max_no_copies = (
-                1
-                if self._cards_map[card_name][0].token_type == TokenType.RESTRICTED_CARD
-                else 4
-            )
-            if no_copies > max_no_copies:
-                errors.append(
-                    TooManyCardCopies(card_name=card_name, current_number=no_copies)
-                )
-
-        if self._unknown_cards:
-            for token in self._unknown_cards:
-                unknown_cards.append(UnknownCard(card_name=token.text))
+            self._copy_limits[card_name] = self.copy_limit(card_tokens[0])
+            self._check_copies(card_name)
 
-        return tuple(errors), tuple(warnings), tuple(unknown_cards)
+    def _check_copies(self, card_name: str) -> None:
+        max_no_copies = self._copy_limits.get(card_name)
+        no_copies = self._card_copies.get(card_name, 0)
+        if max_no_copies is not None and no_copies > max_no_copies:
+            self._too_many_copies[card_name] = None
+        else:
+            self._too_many_copies.pop(card_name, None)
 
     def total_cards_in(self, section: str) -> int:
-        if section not in self.cards:
+        if section not in self._deck_cards:
             return 0
-        return sum([t.quantity for t in self.cards[section]])
+        return self._section_totals.get(section, 0)
+
+    def _banned_cards_in(self, section: str) -> int:
+        return self._banned_totals.get(section, 0)
 
     def __len__(self):
         return self.total_cards_in(self._mainboard.name) + self.total_cards_in(
@@ -455,11 +424,26 @@ class Deck:
 
     def deck_list(self, grouping: str) -> list[Token]:
         """Generate the deck list (i.e. list of tokens) according to the
-        specified grouping strategy"""
+        specified grouping strategy. Deck lists are computed once per grouping."""
+
+        if not grouping or grouping.upper() not in self.SUPPORTED_GROUPS:
+            grouping = self.NOGROUP
+        if grouping not in self._deck_lists:
+            self._deck_lists[grouping] = self._make_deck_list(grouping)
+        return list(self._deck_lists[grouping])
 
+    def deck_list_html(self, grouping: str) -> str:
+        """HTML table rows of the deck list, according to the specified grouping
+        strategy (rendered once per grouping)"""
         if not grouping or grouping.upper() not in self.SUPPORTED_GROUPS:
             grouping = self.NOGROUP
+        if grouping not in self._deck_lists_html:
+            self._deck_lists_html[grouping] = "".join(
+                token.to_html for token in self.deck_list(grouping)
+            )
+        return self._deck_lists_html[grouping]
 
+    def _make_deck_list(self, grouping: str) -> list[Token]:
         if grouping == self.NOGROUP:
             return self.f_no_group()
         if grouping == self.COLOUR:
@@ -492,8 +476,80 @@ class Deck:
 
     @property
     def is_valid(self) -> bool:
-        errors, *rest = self.validate()
-        return len(errors) == 0
+        """Whether the deck has no validation errors (kept up to date as the deck
+        is modified, without validating it all over again)"""
+        self._validation_state()
+        md_name, sb_name = self._mainboard.name, self._sideboard.name
+        no_cards_in_md = self.total_cards_in(md_name) - self._banned_cards_in(md_name)
+        no_cards_in_sb = self.total_cards_in(sb_name) - self._banned_cards_in(sb_name)
+        return (
+            self._mainboard.min_size <= no_cards_in_md
+            and no_cards_in_sb <= self._sideboard.max_size
+            and not self._too_many_copies
+        )
+
+    def fingerprint(self, ignore_printings: bool = False) -> str:
+        """Canonical fingerprint of the deck cards (computed once), as a hex string.
+
+        Decks with the same number of copies of each card (printing) in each deck
+        section share the same fingerprint, regardless of the order of cards, and
+        of how copies are split across lines. Cards are identified by their
+        Scryfall ID, or by their name if `ignore_printings` is set. Foil finishes,
+        deck names, and unknown cards are not taken into account.
+        """
+        fingerprint = self._fingerprints.get(ignore_printings)
+        if fingerprint is None:
+            fingerprint = self._compute_fingerprint(ignore_printings)
+            self._fingerprints[ignore_printings] = fingerprint
+        return fingerprint
+
+    def _compute_fingerprint(self, ignore_printings: bool) -> str:
+        copies: dict[tuple[str, str], int] = dict()
+        for section_name, card_tokens in self.cards.items():
+            for token in card_tokens:
+                card = token.card
+                card_key = card.name.lower() if ignore_printings else card.cid
+                key = (section_name, card_key)
+                copies[key] = copies.get(key, 0) + token.quantity
+        # order-insensitive (i.e. multiset) hash: sum of the hashes of all entries
+        total = 0
+        for (section_name, card_key), no_copies in copies.items():
+            if not no_copies:
+                continue
+            entry = f"{section_name}\x00{card_key}\x00{no_copies}".encode("utf-8")
+            digest = hashlib.blake2b(entry, digest_size=16).digest()
+            total += int.from_bytes(digest, "little")
+        return f"{total % 2**128:032x}"
+
+    def stats(self, section_name: Optional[str] = None) -> DeckStats:
+        """Mana curve, colour pips, lands and spells, and card types of the deck
+        section (Main, by default), computed once as the sum of the (precomputed)
+        stats vectors of its cards (see ScryfallDB.card_features)"""
+        section_name = section_name or self._mainboard.name
+        stats = self._stats.get(section_name)
+        if stats is None:
+            stats = self._stats[section_name] = self._compute_stats(section_name)
+        return stats
+
+    def _compute_stats(self, section_name: str) -> DeckStats:
+        totals = [0] * STATS_VECTOR_SIZE
+        card_features = ScryfallDB.card_features
+        for token in self.cards.get(section_name, ()):
+            quantity = token.quantity
+            for position, value in card_features(token.card).stats_vector:
+                totals[position] += value * quantity
+        spells = totals[STATS_SPELLS]
+        curve = totals[STATS_CURVE : STATS_CURVE + MAX_CURVE_CMC + 1]
+        pips = totals[STATS_PIPS : STATS_PIPS + len(Color)]
+        types = totals[STATS_TYPES : STATS_TYPES + len(CardType)]
+        return DeckStats(
+            lands=totals[STATS_LANDS],
+            spells=spells,
+            mana_curve={cmc: n for cmc, n in enumerate(curve) if n},
+            pips={colour: n for colour, n in zip(Color, pips) if n},
+            types={card_type: n for card_type, n in zip(CardType, types) if n},
+            average_cmc=totals[STATS_CMC] / spells if spells else 0.0,
+        )
 
     @property
     def name(self):
@@ -501,7 +557,346 @@ class Deck:
 
     @property
     def cards(self):
+        if self._cards_stale:
+            self._deck_cards = {
+                section_name: list(section_tokens.values())
+                for section_name, section_tokens in self._section_tokens.items()
+            }
+            self._cards_stale = False
         return self._deck_cards
 
     def cards_in_section(self, section_name: str) -> list[Token]:
-        return self._deck_cards.get(section_name, None)
+        return self.cards.get(section_name, None)
+
+    @property
+    def unknown_cards(self) -> list[Token]:
+        return self._unknown_cards
+
+    # =========
+    # MUTATIONS
+    # =========
+
+    def add(
+        self,
+        card: Card,
+        quantity: int = 1,
+        section_name: Optional[str] = None,
+        token_type: Optional[TokenType] = None,
+        is_foil: bool = False,
+    ) -> None:
+        """Add copies of the card (printing) to the deck section (Main, by default).
+        Unless specified, the card token type (i.e. legal, banned, or restricted)
+        is the same of any other copy of the card in the deck, or it is looked up
+        in the banned and restricted lists of the cards DB of the deck. Raise
+        ValueError if neither is available, e.g.:
+
+            >>> cards_db = ScryfallDB.from_file("data/premodern_db_compressed.bz")
+            >>> tokens = DeckParser(cards_db).parse_card_list(["56 Island"])
+            >>> deck = Deck(tokens, cards_db=cards_db)
+            >>> deck.add(next(cards_db.lookup("Land Tax")), 4)  # banned
+            >>> deck.is_valid, [str(e) for e in deck.validate()[0]]
+            (False, ['The Main does not contain at least 60 cards. Current size: 56'])
+        """
+        if quantity <= 0:
+            raise ValueError(f"Invalid number of copies: {quantity}")
+        if token_type is None:
+            token_type = self._token_type_of(card.name)
+        deck_section = self._deck_section(section_name)
+        self._make_editable()
+        new_token = Token.CardToken(
+            token_type=token_type,
+            card=card,
+            count=quantity,
+            deck_section=deck_section,
+            card_has_setcode=True,
+            is_foil=is_foil,
+        )
+        self._add_token(new_token)
+        self._deck_changed()
+
+    def remove(
+        self,
+        card: Union[Card, str],
+        quantity: int = 1,
+        section_name: Optional[str] = None,
+    ) -> None:
+        """Remove copies of the card from the deck section (Main, by default).
+        Cards can be either a specific printing, or a card name (i.e. any printing,
+        latest added first). Raise ValueError if there are not enough copies."""
+        deck_section = self._deck_section(section_name)
+        self._make_editable()
+        for token, no_copies in self._copies_to_take(card, quantity, deck_section):
+            self._remove_copies(token, no_copies)
+        self._deck_changed()
+
+    def move_to_sideboard(self, card: Union[Card, str], quantity: int = 1) -> None:
+        """Move copies of the card from the Main deck to the Sideboard (see remove)"""
+        self._move(card, quantity, self._mainboard, self._sideboard)
+
+    def move_to_mainboard(self, card: Union[Card, str], quantity: int = 1) -> None:
+        """Move copies of the card from the Sideboard to the Main deck (see remove)"""
+        self._move(card, quantity, self._sideboard, self._mainboard)
+
+    def _move(
+        self,
+        card: Union[Card, str],
+        quantity: int,
+        from_section: DeckSection,
+        to_section: DeckSection,
+    ) -> None:
+        self._make_editable()
+        for token, no_copies in self._copies_to_take(card, quantity, from_section):
+            self._remove_copies(token, no_copies)
+            self._add_token(
+                Token.CardToken(
+                    token_type=token.token_type,
+                    card=token.card,
+                    count=no_copies,
+                    deck_section=to_section,
+                    card_has_setcode=token.card_request_has_setcode,
+                    is_foil=token.is_foil,
+                )
+            )
+        self._deck_changed()
+
+    def _deck_section(self, section_name: Optional[str]) -> DeckSection:
+        if section_name is None or section_name == self._mainboard.name:
+            return self._mainboard
+        if section_name == self._sideboard.name:
+            return self._sideboard
+        raise ValueError(f"Unknown deck section: {section_name}")
+
+    def _token_type_of(self, card_name: str) -> TokenType:
+        self._make_editable()
+        for section_key in self._name_keys.get(card_name, ()):
+            section_name = self._deck_section_name(section_key)
+            return self._section_tokens[section_name][section_key].token_type
+        if self._cards_db is None:
+            raise ValueError(
+                f"Missing token type of {card_name}: the deck has no cards DB to "
+                "look up banned and restricted cards"
+            )
+        if self._cards_db.in_banned_list(card_name=card_name):
+            return TokenType.BANNED_CARD
+        if self._cards_db.in_restricted_list(card_name=card_name):
+            return TokenType.RESTRICTED_CARD
+        return TokenType.LEGAL_CARD
+
+    def _deck_section_name(self, section_card_key: tuple) -> str:
+        section = section_card_key[-1]
+        return (
+            self._mainboard.name
+            if section == self._mainboard.name.lower()
+            else self._sideboard.name
+        )
+
+    def _copies_to_take(
+        self, card: Union[Card, str], quantity: int, deck_section: DeckSection
+    ) -> list[tuple[Token, int]]:
+        """Tokens (and number of copies) to take the copies of the card from"""
+        if quantity <= 0:
+            raise ValueError(f"Invalid number of copies: {quantity}")
+        section_tokens = self._section_tokens[deck_section.name]
+        if isinstance(card, str):
+            section = deck_section.name.lower()
+            card_tokens = [
+                section_tokens[key]
+                for key in reversed(self._name_keys.get(card, {}))
+                if key[-1] == section
+            ]
+            card_name = card
+        else:
+            key = (card.name, card.set_code, card.collector_number)
+            key += (deck_section.name.lower(),)
+            card_tokens = [section_tokens[key]] if key in section_tokens else []
+            card_name = card.name
+        to_take = list()
+        remaining = quantity
+        for token in card_tokens:
+            no_copies = min(remaining, token.quantity)
+            to_take.append((token, no_copies))
+            remaining -= no_copies
+            if not remaining:
+                return to_take
+        raise ValueError(
+            f"Not enough copies of {card_name} in {deck_section.name}: "
+            f"{quantity - remaining} (requested: {quantity})"
+        )
+
+    def _make_editable(self) -> None:
+        """Take ownership of the deck state, until now shared with the parse result:
+        card tokens are copied (as tokens are not modified once created), and
+        indexed by their section card key (merging any duplicate)."""
+        if self._section_tokens is not None:
+            return
+        self._validation_state()
+        self._section_totals = dict(self._section_totals)
+        self._banned_totals = dict(self._banned_totals)
+        self._card_copies = dict(self._card_copies)
+        self._section_tokens = dict()
+        for section_name, card_tokens in self._deck_cards.items():
+            section_tokens = self._section_tokens[section_name] = dict()
+            for token in card_tokens:
+                key = token.section_card_key
+                if key in section_tokens:
+                    section_tokens[key].quantity += token.quantity
+                    section_tokens[key].text = None
+                    continue
+                section_tokens[key] = Token.CardToken(
+                    token_type=token.token_type,
+                    card=token.card,
+                    count=token.quantity,
+                    deck_section=token.deck_section,
+                    card_has_setcode=token.card_request_has_setcode,
+                    is_foil=token.is_foil,
+                )
+                self._name_keys.setdefault(token.card.name, dict())[key] = None
+        self._cards_map = None  # superseded by the editable state
+        self._cards_stale = True
+
+    def _add_token(self, new_token: Token) -> None:
+        card_name = new_token.card.name
+        section_name = new_token.deck_section.name
+        section_tokens = self._section_tokens[section_name]
+        key = new_token.section_card_key
+        token = section_tokens.get(key)
+        if token is None:
+            section_tokens[key] = new_token
+            self._name_keys.setdefault(card_name, dict())[key] = None
+            self._cards_stale = True
+        else:
+            token.quantity += new_token.quantity
+            token.text = None  # formatted again, with the new quantity
+        if card_name not in self._copy_limits:
+            self._copy_limits[card_name] = self.copy_limit(new_token)
+        self._update_totals(new_token, new_token.quantity)
+
+    def _remove_copies(self, token: Token, no_copies: int) -> None:
+        token.quantity -= no_copies
+        token.text = None
+        if not token.quantity:
+            key = token.section_card_key
+            del self._section_tokens[token.deck_section.name][key]
+            name_keys = self._name_keys[token.card.name]
+            del name_keys[key]
+            if not name_keys:
+                del self._name_keys[token.card.name]
+                del self._copy_limits[token.card.name]
+            self._cards_stale = True
+        self._update_totals(token, -no_copies)
+
+    def _update_totals(self, token: Token, delta: int) -> None:
+        card_name = token.card.name
+        section_name = token.deck_section.name
+        self._section_totals[section_name] = (
+            self._section_totals.get(section_name, 0) + delta
+        )
+        if token.token_type == TokenType.BANNED_CARD:
+            self._banned_totals[section_name] = (
+                self._banned_totals.get(section_name, 0) + delta
+            )
+        self._card_copies[card_name] = self._card_copies.get(card_name, 0) + delta
+        if not self._card_copies[card_name]:
+            del self._card_copies[card_name]
+        self._check_copies(card_name)
+
+    def _deck_changed(self) -> None:
+        # drop memoised deck lists and validation (group keys are kept aligned
+        # with section tokens)
+        self._group_keys.clear()
+        self._deck_lists.clear()
+        self._deck_lists_html.clear()
+        self._validation = None
+        self._fingerprints.clear()
+        self._stats.clear()
+
+
+@dataclass
+class DocumentDeck:
+    """A Deck found in a multi-deck document, along with its source line range
+    (zero-based, end line excluded). If the deck list could not be parsed,
+    deck is None and error is set."""
+
+    start: int
+    end: int
+    deck: Optional[Deck] = None
+    error: Optional[str] = None
+
+
+class DeckSession:
+    """Keep the last parsed deck list, along with its Deck: presenting the same
+    deck list again (e.g. with another grouping) skips parsing altogether."""
+
+    def __init__(self, cards_db: ScryfallDB):
+        self._cards_db = cards_db
+        self._deck_parsers: dict[bool, DeckParser] = dict()
+        self._last_key: Optional[tuple[tuple[str, ...], bool]] = None
+        self._last_deck: Optional[Deck] = None
+
+    @property
+    def last_deck(self) -> Optional[Deck]:
+        return self._last_deck
+
+    def deck(
+        self, deck_list: Union[str, Iterable[str]], optimise_card_art: bool = False
+    ) -> Deck:
+        """Return the Deck of the deck list, parsing it only if the deck list
+        (or parsing options) changed since the last call."""
+        if isinstance(deck_list, str):
+            deck_list = deck_list.split("\n")
+        deck_list = tuple(line.strip() for line in deck_list)
+        key = (deck_list, optimise_card_art)
+        if key != self._last_key:
+            if optimise_card_art not in self._deck_parsers:
+                self._deck_parsers[optimise_card_art] = DeckParser(
+                    cards_db=self._cards_db, optimise_card_art=optimise_card_art
+                )
+            deck_parser = self._deck_parsers[optimise_card_art]
+            self._last_deck = Deck(
+                tokens=deck_parser.parse_card_list(deck_list), cards_db=self._cards_db
+            )
+            self._last_key = key
+        return self._last_deck
+
+
+def parse_decks_document(
+    deck_parser: DeckParser,
+    document: Union[str, Iterable[str]],
+    workers: int = 1,
+    chunksize: int = 1,
+) -> list[DocumentDeck]:
+    """Split a document containing multiple deck lists (e.g. all the decks
+    of an event) and parse each one independently - in parallel, if more than
+    one worker is requested (see DeckParser.parse_many)."""
+    spans = deck_parser.split_decklists(document)
+    results = deck_parser.parse_many(
+        [span.lines for span in spans], workers=workers, chunksize=chunksize
+    )
+    document_decks = list()
+    for span, result in zip(spans, results):
+        deck = (
+            Deck(tokens=result.tokens, cards_db=deck_parser.cards_db)
+            if result.ok
+            else None
+        )
+        document_decks.append(
+            DocumentDeck(start=span.start, end=span.end, deck=deck, error=result.error)
+        )
+    return document_decks
+
+
+def group_by_fingerprint(
+    decks: Iterable[Deck], ignore_printings: bool = False
+) -> dict[str, list[Deck]]:
+    """Group decks by their fingerprint (see Deck.fingerprint), e.g. to find
+    identical deck registrations across events. Groups (and decks within
+    each group) are in order of first appearance."""
+    groups: dict[str, list[Deck]] = dict()
+    for deck in decks:
+        fingerprint = deck.fingerprint(ignore_printings)
+        group = groups.get(fingerprint)
+        if group is None:
+            groups[fingerprint] = [deck]
+        else:
+            group.append(deck)
+    return groups
@@ -0,0 +1,309 @@
+"""
+Metagame analytics over a corpus of (parsed) decks.
+
+Decks are turned into a sparse deck-by-card matrix of card copies (see
+DeckCardMatrix), in compressed sparse row (CSR) form: card columns are indexed by
+canonical card name (see ScryfallDB.make_dbentry), across all the cards in the
+cards DB, so that matrices (and results) of different corpora line up.
+
+MetagameAnalytics computes aggregates on the matrix:
+- card inclusion rates (i.e. the share of decks playing each card);
+- average copies of each card (in the decks playing it);
+- card co-occurrences (i.e. the number of decks playing both cards);
+- colour shares (i.e. the share of decks playing each colour).
+
+Aggregates are vectorised with NumPy (and co-occurrences with SciPy sparse
+matrices) when available, otherwise computed in pure Python, with the same
+results. Reports are cached to disk (see cached_report), keyed by the cards DB
+version and the fingerprints of all the decks (see Deck.fingerprint), e.g.:
+
+    report = cached_report(decks, cards_db, cache_dir="analytics_cache")
+    report["inclusion_rates"]["Dark Ritual"]
+"""
+from array import array
+import hashlib
+import json
+import os
+import tempfile
+from typing import Iterable, Optional, Sequence
+
+from data import Color, ScryfallDB
+from deck import Deck
+from deck_parser import MAIN_DECK
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+try:
+    from scipy import sparse
+except ImportError:  # optional dependency
+    sparse = None
+
+REPORT_VERSION = 1
+
+COLOURS = tuple(Color)
+
+
+class CardColumns:
+    """Matrix columns of all the cards in the cards DB (one per card name, in DB
+    order), along with the colours of each card (as a bit mask of Color values)"""
+
+    def __init__(self, cards_db: ScryfallDB):
+        self.db_version = cards_db.version
+        self._make_dbentry = cards_db.make_dbentry
+        self.index: dict[str, int] = dict()  # canonical card name: column
+        self.names: list[str] = list()
+        self.colour_masks = array("B")
+        for card in cards_db.all_cards:
+            db_key = cards_db.make_dbentry(card.name)
+            if db_key in self.index:
+                continue
+            self.index[db_key] = len(self.names)
+            self.names.append(card.name)
+            mask = 0
+            for colour in card.colors or ():
+                mask |= 1 << colour.value
+            self.colour_masks.append(mask)
+        # rank of each column by card name (i.e. in card name order)
+        self.name_ranks = array("q", bytes(8 * len(self.names)))
+        by_name = sorted(range(len(self.names)), key=self.names.__getitem__)
+        for rank, column in enumerate(by_name):
+            self.name_ranks[column] = rank
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def column(self, card_name: str) -> Optional[int]:
+        return self.index.get(self._make_dbentry(card_name))
+
+
+class DeckCardMatrix:
+    """Sparse (CSR) deck-by-card matrix of the number of copies of each card,
+    in the given deck sections (Main deck only, by default)"""
+
+    def __init__(
+        self,
+        decks: Iterable[Deck],
+        columns: CardColumns,
+        sections: Sequence[str] = (MAIN_DECK.name,),
+    ):
+        self.columns = columns
+        self.sections = tuple(sections)
+        self.indptr = array("q", [0])
+        self.indices = array("q")
+        self.data = array("q")
+        for deck in decks:
+            copies: dict[int, int] = dict()
+            for section_name in self.sections:
+                for token in deck.cards.get(section_name, ()):
+                    column = columns.column(token.card.name)
+                    copies[column] = copies.get(column, 0) + token.quantity
+            for column in sorted(copies):
+                if copies[column]:
+                    self.indices.append(column)
+                    self.data.append(copies[column])
+            self.indptr.append(len(self.indices))
+
+    @property
+    def no_decks(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.no_decks, len(self.columns)
+
+    def deck_columns(self, deck_index: int) -> array:
+        return self.indices[self.indptr[deck_index] : self.indptr[deck_index + 1]]
+
+    def to_scipy(self):
+        """Return the matrix as a SciPy sparse CSR matrix (requires SciPy)"""
+        if sparse is None:
+            raise ImportError("SciPy is required to export the deck-card matrix")
+        return sparse.csr_matrix(
+            (
+                np.frombuffer(self.data, dtype=np.int64).copy(),
+                np.frombuffer(self.indices, dtype=np.int64).copy(),
+                np.frombuffer(self.indptr, dtype=np.int64).copy(),
+            ),
+            shape=self.shape,
+        )
+
+
+class MetagameAnalytics:
+    """Aggregates over a deck-by-card matrix. Cards not played in any deck are
+    left out of all the results."""
+
+    def __init__(self, matrix: DeckCardMatrix):
+        self.matrix = matrix
+
+    def _card_totals(self) -> tuple[list[int], list[int]]:
+        """Number of decks playing each card, and total copies of each card"""
+        matrix = self.matrix
+        no_columns = len(matrix.columns)
+        if np is not None:
+            indices = np.frombuffer(matrix.indices, dtype=np.int64)
+            data = np.frombuffer(matrix.data, dtype=np.int64)
+            no_decks = np.bincount(indices, minlength=no_columns)
+            no_copies = np.bincount(indices, weights=data, minlength=no_columns)
+            return no_decks.tolist(), no_copies.astype(np.int64).tolist()
+        no_decks = [0] * no_columns
+        no_copies = [0] * no_columns
+        for column, copies in zip(matrix.indices, matrix.data):
+            no_decks[column] += 1
+            no_copies[column] += copies
+        return no_decks, no_copies
+
+    def inclusion_rates(self) -> dict[str, float]:
+        """Share of decks playing each card, by card name"""
+        total = self.matrix.no_decks
+        names = self.matrix.columns.names
+        no_decks, _ = self._card_totals()
+        return {names[c]: n / total for c, n in enumerate(no_decks) if n}
+
+    def average_copies(self) -> dict[str, float]:
+        """Average number of copies of each card in the decks playing it"""
+        names = self.matrix.columns.names
+        no_decks, no_copies = self._card_totals()
+        return {names[c]: no_copies[c] / n for c, n in enumerate(no_decks) if n}
+
+    def co_occurrences(self, min_decks: int = 1) -> dict[tuple[str, str], int]:
+        """Number of decks playing both cards, for each pair of cards (sorted by
+        name) played together in at least `min_decks` decks"""
+        matrix = self.matrix
+        names = matrix.columns.names
+        ranks = matrix.columns.name_ranks
+        if sparse is not None:
+            played = (matrix.to_scipy() > 0).astype(np.int64)
+            counts = sparse.triu(played.T @ played, k=1).tocoo()
+            selected = counts.data >= min_decks
+            first, second = counts.row[selected], counts.col[selected]
+            ranks = np.frombuffer(ranks, dtype=np.int64)
+            swap = ranks[first] > ranks[second]
+            first, second = np.where(swap, second, first), np.where(swap, first, second)
+            names = np.array(names, dtype=object)
+            return dict(
+                zip(
+                    zip(names[first].tolist(), names[second].tolist()),
+                    counts.data[selected].tolist(),
+                )
+            )
+        pairs: dict[tuple[int, int], int] = dict()
+        for deck_index in range(matrix.no_decks):
+            columns = matrix.deck_columns(deck_index)
+            for i, a in enumerate(columns):
+                for b in columns[i + 1 :]:
+                    pairs[a, b] = pairs.get((a, b), 0) + 1
+        co_occurrences = dict()
+        for (a, b), n in pairs.items():
+            if n >= min_decks:
+                if ranks[a] > ranks[b]:
+                    a, b = b, a
+                co_occurrences[names[a], names[b]] = n
+        return co_occurrences
+
+    def colour_shares(self) -> dict[str, float]:
+        """Share of decks playing (any card of) each colour, by colour symbol"""
+        matrix = self.matrix
+        total = matrix.no_decks
+        colour_masks = matrix.columns.colour_masks
+        if not total:
+            return {colour.name: 0.0 for colour in COLOURS}
+        if np is not None:
+            indptr = np.frombuffer(matrix.indptr, dtype=np.int64)
+            indices = np.frombuffer(matrix.indices, dtype=np.int64)
+            deck_ids = np.repeat(np.arange(total), np.diff(indptr))
+            masks = np.frombuffer(colour_masks, dtype=np.uint8)[indices]
+            shares = dict()
+            for colour in COLOURS:
+                has_colour = (masks >> colour.value) & 1
+                no_cards = np.bincount(deck_ids, weights=has_colour, minlength=total)
+                shares[colour.name] = int(np.count_nonzero(no_cards)) / total
+            return shares
+        no_decks = [0] * len(COLOURS)
+        for deck_index in range(total):
+            deck_mask = 0
+            for column in matrix.deck_columns(deck_index):
+                deck_mask |= colour_masks[column]
+            for colour in COLOURS:
+                no_decks[colour.value] += (deck_mask >> colour.value) & 1
+        return {colour.name: no_decks[colour.value] / total for colour in COLOURS}
+
+    def report(self, min_co_occurrences: int = 2) -> dict:
+        """All the aggregates, as a JSON-serialisable dictionary (co-occurrences
+        as [card name, card name, no. of decks] entries)"""
+        return {
+            "version": REPORT_VERSION,
+            "db_version": self.matrix.columns.db_version,
+            "sections": list(self.matrix.sections),
+            "decks": self.matrix.no_decks,
+            "inclusion_rates": self.inclusion_rates(),
+            "average_copies": self.average_copies(),
+            "co_occurrences": [
+                [a, b, n]
+                for (a, b), n in sorted(self.co_occurrences(min_co_occurrences).items())
+            ],
+            "colour_shares": self.colour_shares(),
+        }
+
+
+# =============
+# REPORTS CACHE
+# =============
+
+_COLUMNS_CACHE: dict[int, CardColumns] = dict()
+
+
+def card_columns(cards_db: ScryfallDB) -> CardColumns:
+    """Card columns of the cards DB (built once per DB instance)"""
+    columns = _COLUMNS_CACHE.get(id(cards_db))
+    if columns is None or columns.db_version != cards_db.version:
+        columns = _COLUMNS_CACHE[id(cards_db)] = CardColumns(cards_db)
+    return columns
+
+
+def report_key(
+    decks: Iterable[Deck],
+    cards_db: ScryfallDB,
+    sections: Sequence[str] = (MAIN_DECK.name,),
+    min_co_occurrences: int = 2,
+) -> str:
+    """Cache key of the report of the decks: the cards DB version, the report
+    options, and the fingerprints of all the decks (in any order)"""
+    digest = hashlib.sha256()
+    digest.update(cards_db.version.encode("utf-8"))
+    options = [REPORT_VERSION, list(sections), min_co_occurrences]
+    digest.update(json.dumps(options).encode("utf-8"))
+    for fingerprint in sorted(deck.fingerprint() for deck in decks):
+        digest.update(fingerprint.encode("ascii"))
+    return digest.hexdigest()
+
+
+def cached_report(
+    decks: Iterable[Deck],
+    cards_db: ScryfallDB,
+    cache_dir: str,
+    sections: Sequence[str] = (MAIN_DECK.name,),
+    min_co_occurrences: int = 2,
+) -> dict:
+    """Return the report of the decks (see MetagameAnalytics.report) from the
+    cache folder, if any. Otherwise, compute the report and store it."""
+    decks = list(decks)
+    key = report_key(decks, cards_db, sections, min_co_occurrences)
+    report_filepath = os.path.join(cache_dir, f"{key}.json")
+    try:
+        with open(report_filepath, encoding="utf-8") as report_file:
+            return json.load(report_file)
+    except (OSError, ValueError):
+        pass  # not cached (or unreadable)
+
+    matrix = DeckCardMatrix(decks, card_columns(cards_db), sections)
+    report = MetagameAnalytics(matrix).report(min_co_occurrences)
+    os.makedirs(cache_dir, exist_ok=True)
+    # written atomically, as the cache folder may be shared by many processes
+    fd, tmp_filepath = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as tmp_file:
+        json.dump(report, tmp_file)
+    os.replace(tmp_filepath, report_filepath)
+    return report
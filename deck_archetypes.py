@@ -0,0 +1,223 @@
+"""
+Archetype recognition against a library of labelled reference decks.
+
+Decks are compared on the cards of their Main deck (basic lands excluded), by
+cosine similarity of their card copies, weighted by the inverse document
+frequency (IDF) of each card in the library: cards played by many references
+(e.g. staples) weigh less than cards defining an archetype. The library keeps
+an inverted index of references by card, therefore only the references sharing
+cards with the deck are scored. Each archetype scores as its most similar
+reference (i.e. nearest neighbour), e.g.:
+
+    library = ArchetypeLibrary.from_directory("archetypes", deck_parser)
+    library.classify(deck, k=3)  # [ArchetypeMatch("Goblins", 0.93, ...), ...]
+
+Libraries are loaded from folders of deck list files (one sub-folder per
+archetype, see from_directory), or from JSON files (see save).
+"""
+import json
+import math
+import os
+from typing import Iterable, NamedTuple, Optional
+
+from data import ScryfallDB
+from deck import Deck
+from deck_parser import DeckParser, MAIN_DECK
+
+LIBRARY_VERSION = 1
+
+DECK_LIST_EXTENSIONS = (".txt", ".dec", ".dck", ".dek")
+
+
+class ArchetypeMatch(NamedTuple):
+    archetype: str
+    # cosine similarity (0 to 1) with the most similar reference deck
+    score: float
+    reference: str
+
+    def to_json(self) -> dict:
+        return {
+            "archetype": self.archetype,
+            "score": round(self.score, 4),
+            "reference": self.reference,
+        }
+
+
+class _Reference(NamedTuple):
+    archetype: str
+    name: str
+    cards: dict[str, int]  # copies by card DB entry (see ScryfallDB.make_dbentry)
+
+
+def deck_card_copies(deck: Deck) -> dict[str, int]:
+    """Copies of each card in the Main deck (basic lands excluded), by card DB
+    entry (see ScryfallDB.make_dbentry)"""
+    copies: dict[str, int] = dict()
+    for token in deck.cards.get(MAIN_DECK.name, ()):
+        card = token.card
+        if card.type_line and "Basic Land" in card.type_line:
+            continue
+        key = ScryfallDB.make_dbentry(card.name)
+        copies[key] = copies.get(key, 0) + token.quantity
+    return copies
+
+
+class ArchetypeLibrary:
+    """Labelled reference decks, indexed by card"""
+
+    def __init__(self):
+        self._references: list[_Reference] = list()
+        # card DB entry: [(reference index, copies), ...]
+        self._postings: dict[str, list[tuple[int, int]]] = dict()
+        # card weights (IDF), and reference norms: computed on first classification
+        # after references are added (see _update_weights)
+        self._weights: Optional[dict[str, float]] = None
+        self._norms: list[float] = list()
+
+    def __len__(self) -> int:
+        return len(self._references)
+
+    @property
+    def archetypes(self) -> list[str]:
+        return sorted({reference.archetype for reference in self._references})
+
+    def add(self, archetype: str, deck: Deck, name: Optional[str] = None) -> None:
+        """Add the deck to the library, as a reference of the archetype"""
+        name = name or deck.name or archetype
+        self.add_cards(archetype, name, deck_card_copies(deck))
+
+    def add_cards(self, archetype: str, name: str, cards: dict[str, int]) -> None:
+        """Add a reference of the archetype by its card copies (see
+        deck_card_copies)"""
+        index = len(self._references)
+        self._references.append(_Reference(archetype, name, cards))
+        for key, copies in cards.items():
+            self._postings.setdefault(key, list()).append((index, copies))
+        self._weights = None
+
+    def _update_weights(self) -> None:
+        no_references = len(self._references)
+        self._weights = {
+            key: math.log(1 + no_references / len(postings))
+            for key, postings in self._postings.items()
+        }
+        weights = self._weights
+        self._norms = [
+            math.sqrt(
+                sum((copies * weights[key]) ** 2 for key, copies in ref.cards.items())
+            )
+            for ref in self._references
+        ]
+
+    # ==============
+    # CLASSIFICATION
+    # ==============
+
+    def classify(self, deck: Deck, k: int = 3) -> list[ArchetypeMatch]:
+        """Return the (up to) k archetypes most similar to the deck, by score"""
+        return self.classify_cards(deck_card_copies(deck), k)
+
+    def classify_cards(
+        self, cards: dict[str, int], k: int = 3
+    ) -> list[ArchetypeMatch]:
+        """Classify a deck by its card copies (see deck_card_copies)"""
+        if self._weights is None:
+            self._update_weights()
+        weights = self._weights
+        postings = self._postings
+        dot_products: dict[int, float] = dict()
+        squared_norm = 0.0
+        for key, copies in cards.items():
+            weight = weights.get(key)
+            if weight is None:  # card not in any reference
+                # weighted as if it was in a single reference
+                squared_norm += (copies * math.log(1 + len(self._references))) ** 2
+                continue
+            squared_norm += (copies * weight) ** 2
+            weight *= weight * copies
+            for index, ref_copies in postings[key]:
+                dot_products[index] = (
+                    dot_products.get(index, 0.0) + weight * ref_copies
+                )
+        if not dot_products:
+            return []
+
+        norm = math.sqrt(squared_norm)
+        best: dict[str, tuple[float, int]] = dict()  # archetype: (score, reference)
+        for index, dot_product in dot_products.items():
+            score = dot_product / (norm * self._norms[index])
+            archetype = self._references[index].archetype
+            if archetype not in best or score > best[archetype][0]:
+                best[archetype] = (score, index)
+        top = sorted(best.items(), key=lambda item: (-item[1][0], item[0]))[:k]
+        return [
+            ArchetypeMatch(archetype, min(score, 1.0), self._references[index].name)
+            for archetype, (score, index) in top
+        ]
+
+    def classify_all(
+        self, decks: Iterable[Deck], k: int = 3
+    ) -> list[list[ArchetypeMatch]]:
+        return [self.classify(deck, k) for deck in decks]
+
+    # =========
+    # LOAD/SAVE
+    # =========
+
+    @classmethod
+    def from_directory(
+        cls, dirpath: str, deck_parser: DeckParser
+    ) -> "ArchetypeLibrary":
+        """Load the library from a folder of deck list files, with a sub-folder
+        per archetype (named after the archetype)"""
+        library = cls()
+        for archetype in sorted(os.listdir(dirpath)):
+            archetype_dirpath = os.path.join(dirpath, archetype)
+            if not os.path.isdir(archetype_dirpath):
+                continue
+            for filename in sorted(os.listdir(archetype_dirpath)):
+                if not filename.lower().endswith(DECK_LIST_EXTENSIONS):
+                    continue
+                filepath = os.path.join(archetype_dirpath, filename)
+                with open(filepath, encoding="utf-8", errors="replace") as dl_file:
+                    lines = dl_file.read().splitlines()
+                deck = Deck(deck_parser.parse_card_list(lines))
+                library.add(archetype, deck, name=os.path.splitext(filename)[0])
+        return library
+
+    def to_json(self) -> dict:
+        return {
+            "version": LIBRARY_VERSION,
+            "references": [
+                {"archetype": ref.archetype, "name": ref.name, "cards": ref.cards}
+                for ref in self._references
+            ],
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "ArchetypeLibrary":
+        if data.get("version") != LIBRARY_VERSION:
+            raise ValueError(
+                f"Unsupported archetype library version: {data.get('version')}"
+            )
+        library = cls()
+        for ref in data["references"]:
+            library.add_cards(ref["archetype"], ref["name"], ref["cards"])
+        return library
+
+    def save(self, filepath: str) -> None:
+        with open(filepath, "w", encoding="utf-8") as json_file:
+            json.dump(self.to_json(), json_file)
+
+    @classmethod
+    def load(
+        cls, path: str, deck_parser: Optional[DeckParser] = None
+    ) -> "ArchetypeLibrary":
+        """Load the library from a JSON file (see save), or from a folder of
+        deck list files (see from_directory: requires a deck parser)"""
+        if os.path.isdir(path):
+            if deck_parser is None:
+                raise ValueError("A deck parser is required to load deck list files")
+            return cls.from_directory(path, deck_parser)
+        with open(path, encoding="utf-8") as json_file:
+            return cls.from_json(json.load(json_file))
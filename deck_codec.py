@@ -0,0 +1,243 @@
+"""
+Compact serialisation of decks, referencing cards by their (Scryfall) ID.
+
+Full card records (see Deck.mainboard_to_json) make each stored deck dozens of KB,
+whereas decks are entirely defined by their card (printing) IDs, along with
+quantities, deck sections and foil flags: card records are looked up again
+from the cards DB on load (see ScryfallDB.card_by_id), and card token types
+(i.e. banned and restricted cards) are recomputed from the cards DB lists.
+Unknown cards are kept (as text), so that loaded decks validate the same.
+
+Two encodings are supported:
+- JSON (see encode_deck), e.g.:
+    {"v": 1, "name": "Goblins",
+     "sections": {"Main": [[cid, 4], [foil_cid, 1, 1], ...], "Sideboard": [...]},
+     "unknown": [["Unknown card", 2]]}
+- binary (see encode_deck_binary): the magic bytes and format version,
+  then the deck name, the deck sections, and the unknown cards. Strings are
+  UTF-8 encoded (prefixed by their length), card IDs are stored as 16-byte
+  UUIDs, and all the integers (i.e. lengths, counts, quantities) are unsigned
+  LEB128 varints. Card quantities carry the foil flag in their lowest bit.
+
+Usage:
+    payload = encode_deck_binary(deck)
+    deck = decode_deck_binary(payload, cards_db)
+    decks = list(load_decks(payloads, cards_db))  # JSON or binary payloads
+"""
+import json
+from typing import Iterable, Iterator, Union
+
+from data import ScryfallDB
+from deck import Deck
+from deck_parser import DeckSection, ParseResult, Token, TokenType
+from deck_parser import MAIN_DECK, SIDEBOARD
+
+FORMAT_VERSION = 1
+MAGIC = b"PMDK"
+
+DECK_SECTIONS = {MAIN_DECK.name: MAIN_DECK, SIDEBOARD.name: SIDEBOARD}
+
+
+class DeckDecodeError(ValueError):
+    pass
+
+
+# =========
+# ENCODING
+# =========
+
+
+def encode_deck(deck: Deck) -> dict:
+    """Return the compact (JSON-serialisable) representation of the deck"""
+    sections = dict()
+    for section_name, card_tokens in deck.cards.items():
+        entries = list()
+        for token in card_tokens:
+            entry = [token.card.cid, token.quantity]
+            if token.is_foil:
+                entry.append(1)
+            entries.append(entry)
+        sections[section_name] = entries
+    data = {"v": FORMAT_VERSION, "name": deck.name, "sections": sections}
+    if deck.unknown_cards:
+        data["unknown"] = [[t.text, t.quantity] for t in deck.unknown_cards]
+    return data
+
+
+def _cid_to_bytes(cid: str) -> bytes:
+    # Scryfall IDs are UUIDs (i.e. 32 hex digits, and hyphens)
+    data = bytes.fromhex(cid.replace("-", ""))
+    if len(data) != 16:
+        raise ValueError(f"Not a UUID card ID: {cid}")
+    return data
+
+
+def _cid_from_bytes(data: bytes) -> str:
+    h = data.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def _write_varint(buffer: bytearray, value: int) -> None:
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _write_string(buffer: bytearray, value: str) -> None:
+    data = value.encode("utf-8")
+    _write_varint(buffer, len(data))
+    buffer += data
+
+
+def encode_deck_binary(deck: Deck) -> bytes:
+    """Return the compact binary representation of the deck"""
+    buffer = bytearray(MAGIC)
+    _write_varint(buffer, FORMAT_VERSION)
+    _write_string(buffer, deck.name)
+    deck_cards = deck.cards
+    _write_varint(buffer, len(deck_cards))
+    for section_name, card_tokens in deck_cards.items():
+        _write_string(buffer, section_name)
+        _write_varint(buffer, len(card_tokens))
+        for token in card_tokens:
+            buffer += _cid_to_bytes(token.card.cid)
+            _write_varint(buffer, token.quantity << 1 | token.is_foil)
+    unknown_cards = deck.unknown_cards
+    _write_varint(buffer, len(unknown_cards))
+    for token in unknown_cards:
+        _write_string(buffer, token.text)
+        _write_varint(buffer, token.quantity)
+    return bytes(buffer)
+
+
+# =========
+# DECODING
+# =========
+
+
+class _DeckBuilder:
+    """Rebuild a deck from card IDs, and unknown card entries"""
+
+    def __init__(self, cards_db: ScryfallDB):
+        self._cards_db = cards_db
+        self._result = ParseResult()
+
+    def add_card(
+        self, section: DeckSection, cid: str, quantity: int, is_foil: bool
+    ) -> None:
+        cards_db = self._cards_db
+        card = cards_db.card_by_id(cid)
+        if card is None:
+            raise DeckDecodeError(f"Unknown card ID: {cid}")
+        if cards_db.in_banned_list(card_name=card.name):
+            token_type = TokenType.BANNED_CARD
+        elif cards_db.in_restricted_list(card_name=card.name):
+            token_type = TokenType.RESTRICTED_CARD
+        else:
+            token_type = TokenType.LEGAL_CARD
+        self._result.add(
+            Token.CardToken(
+                token_type=token_type,
+                card=card,
+                count=quantity,
+                deck_section=section,
+                card_has_setcode=True,
+                is_foil=is_foil,
+            )
+        )
+
+    def add_unknown_card(self, text: str, quantity: int) -> None:
+        self._result.add(
+            Token(token_type=TokenType.UNKNOWN_CARD, quantity=quantity, text=text)
+        )
+
+    def deck(self, name: str) -> Deck:
+        return Deck(self._result, name=name, cards_db=self._cards_db)
+
+
+def _deck_section(section_name: str) -> DeckSection:
+    section = DECK_SECTIONS.get(section_name)
+    if section is None:
+        raise DeckDecodeError(f"Unknown deck section: {section_name}")
+    return section
+
+
+def decode_deck(data: Union[dict, str], cards_db: ScryfallDB) -> Deck:
+    """Rebuild the deck from its compact (JSON) representation"""
+    if isinstance(data, str):
+        data = json.loads(data)
+    if data.get("v") != FORMAT_VERSION:
+        raise DeckDecodeError(f"Unsupported deck format version: {data.get('v')}")
+    builder = _DeckBuilder(cards_db)
+    for section_name, entries in data["sections"].items():
+        section = _deck_section(section_name)
+        for entry in entries:
+            builder.add_card(section, entry[0], entry[1], len(entry) > 2)
+    for text, quantity in data.get("unknown", ()):
+        builder.add_unknown_card(text, quantity)
+    return builder.deck(data["name"])
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self._data = data
+        self._position = 0
+
+    def varint(self) -> int:
+        data = self._data
+        value = shift = 0
+        while True:
+            byte = data[self._position]
+            self._position += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def bytes(self, size: int) -> bytes:
+        start = self._position
+        self._position += size
+        if self._position > len(self._data):
+            raise IndexError("read past the end of data")
+        return self._data[start : self._position]
+
+    def string(self) -> str:
+        return self.bytes(self.varint()).decode("utf-8")
+
+
+def decode_deck_binary(data: bytes, cards_db: ScryfallDB) -> Deck:
+    """Rebuild the deck from its compact binary representation"""
+    if data[: len(MAGIC)] != MAGIC:
+        raise DeckDecodeError("Not a compact (binary) deck")
+    reader = _Reader(data)
+    reader.bytes(len(MAGIC))
+    try:
+        version = reader.varint()
+        if version != FORMAT_VERSION:
+            raise DeckDecodeError(f"Unsupported deck format version: {version}")
+        builder = _DeckBuilder(cards_db)
+        name = reader.string()
+        for _ in range(reader.varint()):
+            section = _deck_section(reader.string())
+            for _ in range(reader.varint()):
+                cid = _cid_from_bytes(reader.bytes(16))
+                quantity = reader.varint()
+                builder.add_card(section, cid, quantity >> 1, bool(quantity & 1))
+        for _ in range(reader.varint()):
+            text = reader.string()
+            builder.add_unknown_card(text, reader.varint())
+    except (IndexError, UnicodeDecodeError) as e:
+        raise DeckDecodeError(f"Truncated or corrupted deck data: {e}") from e
+    return builder.deck(name)
+
+
+def load_decks(
+    payloads: Iterable[Union[bytes, dict, str]], cards_db: ScryfallDB
+) -> Iterator[Deck]:
+    """Lazily rebuild decks from their compact representations (binary or JSON)"""
+    for payload in payloads:
+        if isinstance(payload, (bytes, bytearray)):
+            yield decode_deck_binary(payload, cards_db)
+        else:
+            yield decode_deck(payload, cards_db)
@@ -3,8 +3,6 @@ from typing import Optional
 from string import ascii_uppercase
 import base64
 
-from js import document
-
 from deck_parser import DeckSection, SIDEBOARD, MAIN_DECK, Token
 from deck import Deck
 from data import ScryfallDB, Card
@@ -251,6 +249,9 @@ def export_deck(exporter: DeckExporter, deck:Deck, id_target: str):
     Utility function to exploit a generic DeckExporter instance to download the deck list.
     """
 
+    # imported here, so that exporters can also be used outside the browser
+    from js import document
+
     decklist = exporter.export(deck)
     enc_decklist = base64.b64encode(decklist.encode("utf-8")).decode("utf-8")
     deck_name = deck.name.lower().replace(" ", "_") if deck.name else "premodern_deck"
@@ -0,0 +1,262 @@
+"""
+Declarative format profiles for deck validation (e.g. Premodern, Old School, Pauper).
+
+A FormatProfile describes the deck construction rules of a format: deck section
+sizes, copy limits (and card types exempted from them), banned and restricted
+cards, card legality (as reported by Scryfall), and allowed sets.
+Profiles compile into a DeckValidator, checking all the rules in a single pass
+over the card tokens of a deck, e.g.:
+
+    errors, warnings, unknown_cards = deck.validate(OLD_SCHOOL)
+    reports = validate_decks(decks, PAUPER)  # batch mode
+"""
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from data import Card, CardType, ScryfallDB
+from deck import Deck, DeckValidationError, UnknownCard
+from deck import MaxDeckSizeConstraintError, MinDeckSizeConstraintError
+from deck import DeckSectionEmpty, TooManyCardCopies, TooManyCardsWarning
+from deck_parser import DeckSection, Token, TokenType, MAIN_DECK, SIDEBOARD
+
+# Scryfall legality values
+LEGAL = "legal"
+RESTRICTED = "restricted"
+BANNED = "banned"
+
+
+class BannedCardError(DeckValidationError):
+    def __init__(self, card_name: str, format_name: str):
+        super().__init__(f"The card {card_name} is banned in {format_name}.")
+
+
+class CardNotLegalError(DeckValidationError):
+    def __init__(self, card_name: str, format_name: str):
+        super().__init__(f"The card {card_name} is not legal in {format_name}.")
+
+
+class CardSetNotAllowedError(DeckValidationError):
+    def __init__(self, card_name: str, set_code: str, format_name: str):
+        super().__init__(
+            f"The card {card_name} [{set_code.upper()}] is from a set "
+            f"not allowed in {format_name}."
+        )
+
+
+@dataclass(frozen=True)
+class FormatProfile:
+    """Deck construction rules of a format.
+
+    Banned and restricted cards are taken from the Scryfall card legalities
+    in the `legality` format, if set; otherwise, from the card tokens (i.e. as
+    marked by the cards DB when parsing). Either way, cards in the `banned` and
+    `restricted` lists are banned and restricted too. Banned cards do not count
+    towards deck sizes, and they are reported as errors if `report_banned` is set.
+    Cards of any of the `unlimited_copies` types (parsed from their type line,
+    see ScryfallDB.card_features) have no copy limit: e.g. CardType.BASIC for
+    basic lands, snow-covered ones included.
+    """
+
+    name: str
+    legality: Optional[str] = None
+    main_min_size: int = 60
+    main_max_size: Optional[int] = None
+    sideboard_max_size: int = 15
+    max_copies: int = 4
+    restricted_max_copies: int = 1
+    unlimited_copies: CardType = CardType.BASIC
+    banned: tuple[str, ...] = ()
+    restricted: tuple[str, ...] = ()
+    allowed_sets: Optional[frozenset[str]] = None
+    report_banned: bool = True
+
+    def to_json(self) -> dict:
+        """Canonical (JSON-serialisable) form of the profile, e.g. for cache keys:
+        allowed sets are sorted, and card types are stored as their bitmask"""
+        json_repr = asdict(self)
+        json_repr["unlimited_copies"] = int(self.unlimited_copies)
+        if self.allowed_sets is not None:
+            json_repr["allowed_sets"] = sorted(self.allowed_sets)
+        return json_repr
+
+    def compile(self) -> "DeckValidator":
+        return _compile(self)
+
+    def validate(self, deck: Deck) -> tuple[tuple, tuple, tuple]:
+        return self.compile().validate(deck)
+
+
+PREMODERN = FormatProfile(
+    name="Premodern",
+    # Note: any land (e.g. Wasteland) has no copy limit, as decks have always been
+    # validated so far, whereas the Premodern rules only exempt basic lands.
+    unlimited_copies=CardType.LAND,
+    # banned cards are marked in the deck list instead (see Token.repr_tag)
+    report_banned=False,
+)
+OLD_SCHOOL = FormatProfile(name="Old School", legality="oldschool")
+PAUPER = FormatProfile(name="Pauper", legality="pauper")
+
+FORMAT_PROFILES = {
+    "premodern": PREMODERN,
+    "oldschool": OLD_SCHOOL,
+    "pauper": PAUPER,
+}
+
+# card rule outcomes (see DeckValidator._card_rules)
+_ALLOWED = 0
+_BANNED = 1
+_NOT_LEGAL = 2
+_SET_NOT_ALLOWED = 3
+
+
+class DeckValidator:
+    """Format profile rules, compiled to be checked in a single pass over the card
+    tokens of each deck. Card rule outcomes are cached, therefore validators are
+    meant to be reused across decks (see validate_decks)."""
+
+    def __init__(self, profile: FormatProfile):
+        self.profile = profile
+        self._main = DeckSection(
+            MAIN_DECK.name,
+            min_size=profile.main_min_size,
+            max_size=profile.main_max_size or MAIN_DECK.max_size,
+        )
+        self._sideboard = DeckSection(
+            SIDEBOARD.name, min_size=0, max_size=profile.sideboard_max_size
+        )
+        self._banned = frozenset(name.lower() for name in profile.banned)
+        self._restricted = frozenset(name.lower() for name in profile.restricted)
+        # (card ID, token type): (rule outcome, copy limit)
+        self._card_rules_cache: dict[tuple[str, TokenType], tuple[int, Optional[int]]]
+        self._card_rules_cache = dict()
+
+    def _card_rules(self, token: Token) -> tuple[int, Optional[int]]:
+        """Rule outcome of the card (printing), and its copy limit (if any)"""
+        card: Card = token.card
+        cache_key = (card.cid, token.token_type)
+        rules = self._card_rules_cache.get(cache_key)
+        if rules is not None:
+            return rules
+
+        profile = self.profile
+        name = card.name.lower()
+        if profile.legality is not None:
+            legality = (card.legalities or {}).get(profile.legality, LEGAL)
+        elif token.token_type == TokenType.BANNED_CARD:
+            legality = BANNED
+        elif token.token_type == TokenType.RESTRICTED_CARD:
+            legality = RESTRICTED
+        else:
+            legality = LEGAL
+        if name in self._banned:
+            legality = BANNED
+        elif name in self._restricted and legality == LEGAL:
+            legality = RESTRICTED
+
+        if legality == BANNED:
+            outcome = _BANNED
+        elif legality not in (LEGAL, RESTRICTED):
+            outcome = _NOT_LEGAL
+        elif profile.allowed_sets is not None and (
+            card.set_code not in profile.allowed_sets
+        ):
+            outcome = _SET_NOT_ALLOWED
+        else:
+            outcome = _ALLOWED
+
+        type_mask = ScryfallDB.card_features(card).type_mask
+        if type_mask & profile.unlimited_copies:
+            copy_limit = None
+        elif legality == RESTRICTED:
+            copy_limit = profile.restricted_max_copies
+        else:
+            copy_limit = profile.max_copies
+
+        rules = self._card_rules_cache[cache_key] = (outcome, copy_limit)
+        return rules
+
+    def copy_limit(self, token: Token) -> Optional[int]:
+        """Maximum number of copies of the card allowed in the deck (None if not
+        limited)"""
+        return self._card_rules(token)[1]
+
+    def validate(self, deck: Deck) -> tuple[tuple, tuple, tuple]:
+        """Validate the deck, returning errors, warnings and unknown cards
+        (as Deck.validate)"""
+        format_name = self.profile.name
+        section_totals = {self._main.name: 0, self._sideboard.name: 0}
+        card_copies: dict[str, int] = dict()
+        copy_limits: dict[str, Optional[int]] = dict()
+        card_errors = list()
+        for section_name, card_tokens in deck.cards.items():
+            if section_name not in section_totals:
+                continue
+            total = 0
+            for token in card_tokens:
+                outcome, copy_limit = self._card_rules(token)
+                card_name = token.card.name
+                card_copies[card_name] = card_copies.get(card_name, 0) + token.quantity
+                if card_name not in copy_limits:
+                    copy_limits[card_name] = copy_limit
+                if outcome == _BANNED:
+                    if self.profile.report_banned:
+                        card_errors.append(BannedCardError(card_name, format_name))
+                    continue  # banned cards do not count towards deck sizes
+                if outcome == _NOT_LEGAL:
+                    card_errors.append(CardNotLegalError(card_name, format_name))
+                elif outcome == _SET_NOT_ALLOWED:
+                    card_errors.append(
+                        CardSetNotAllowedError(
+                            card_name, token.card.set_code, format_name
+                        )
+                    )
+                total += token.quantity
+            section_totals[section_name] = total
+
+        errors = list()
+        warnings = list()
+        no_cards_in_md = section_totals[self._main.name]
+        no_cards_in_sb = section_totals[self._sideboard.name]
+        if no_cards_in_md < self._main.min_size:
+            errors.append(MinDeckSizeConstraintError(self._main, no_cards_in_md))
+        if self.profile.main_max_size and no_cards_in_md > self._main.max_size:
+            errors.append(MaxDeckSizeConstraintError(self._main, no_cards_in_md))
+        if no_cards_in_sb > self._sideboard.max_size:
+            errors.append(MaxDeckSizeConstraintError(self._sideboard, no_cards_in_sb))
+        if no_cards_in_sb == 0:
+            warnings.append(DeckSectionEmpty(deck_section=self._sideboard))
+        if not self.profile.main_max_size and no_cards_in_md > self._main.min_size:
+            warnings.append(
+                TooManyCardsWarning(
+                    deck_section=self._main, current_size=no_cards_in_md
+                )
+            )
+
+        for card_name, no_copies in card_copies.items():
+            copy_limit = copy_limits[card_name]
+            if copy_limit is not None and no_copies > copy_limit:
+                errors.append(
+                    TooManyCardCopies(card_name=card_name, current_number=no_copies)
+                )
+        errors.extend(card_errors)
+
+        unknown_cards = tuple(
+            UnknownCard(card_name=token.text) for token in deck.unknown_cards
+        )
+        return tuple(errors), tuple(warnings), unknown_cards
+
+
+@lru_cache(maxsize=None)
+def _compile(profile: FormatProfile) -> DeckValidator:
+    return DeckValidator(profile)
+
+
+def validate_decks(
+    decks: Iterable[Deck], profile: FormatProfile
+) -> list[tuple[tuple, tuple, tuple]]:
+    """Validate many decks against the format profile (compiled once, so that
+    card rule outcomes are shared across decks)"""
+    validator = profile.compile()
+    return [validator.validate(deck) for deck in decks]
@@ -1,12 +1,14 @@
 import datetime
 import re
-from dataclasses import dataclass
+import sys
+from time import perf_counter
+from dataclasses import dataclass, field
 from enum import Enum
 from collections import defaultdict
-from itertools import filterfalse
-from typing import Iterable
+from typing import Iterable, Iterator
 from typing import Optional, AnyStr, Union
 from data import Card, ScryfallDB
+from instrumentation import ParserInstrumentation
 
 
 class TokenType(Enum):
@@ -41,18 +43,126 @@ SIDEBOARD = DeckSection("Sideboard", min_size=0, max_size=15)
 
 
 @dataclass
+class BatchParseResult:
+    """Outcome of parsing a single deck list in a batch (see DeckParser.parse_many).
+    Exactly one between tokens and error is set."""
+
+    index: int
+    tokens: Optional["ParseResult"] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class DeckListSpan:
+    """A single deck list found in a multi-deck document (see DeckParser.split_decklists).
+    Line numbers are zero-based, and the end line is excluded (as in lines[start:end])."""
+
+    start: int
+    end: int
+    lines: list[str]
+
+
+# Token Type Categories
+CARD_TOKEN_TYPES = frozenset(
+    (TokenType.LEGAL_CARD, TokenType.BANNED_CARD, TokenType.RESTRICTED_CARD)
+)
+DECK_TOKEN_TYPES = CARD_TOKEN_TYPES | {TokenType.DECK_NAME}
+CARD_PLACEHOLDER_TOKEN_TYPES = frozenset(
+    (
+        TokenType.CARD_RARITY,
+        TokenType.CARD_CMC,
+        TokenType.MANA_COLOUR,
+        TokenType.CARD_TYPE,
+    )
+)
+DECK_METADATA_TOKEN_TYPES = frozenset((TokenType.DECK_NAME, TokenType.DECK_SECTION_NAME))
+MESSAGE_TOKEN_TYPES = frozenset(
+    (TokenType.COMMENT, TokenType.UNKNOWN_TEXT, TokenType.WARNING_MESSAGE)
+)
+
+
 class Token:
-    token_type: TokenType
-    quantity: int = 0
-    text: Optional[str] = None
-    card: Optional[Card] = None
-    is_foil: bool = False
-    deck_section: Optional[DeckSection] = None
-    card_request_has_setcode: bool = True
-
-    def __post_init__(self):
-        if self.card is not None:
-            self.text = f"{self.quantity} {self.card.name} [{self.card.set_code}] #{self.card.collector_number}"
+    """Parsed token of a deck list.
+
+    Tokens are slotted to keep large batches compact. The display text of card
+    tokens is only formatted when first read, and the identity key used to regroup
+    duplicates (see section_card_key) is computed once. Tokens are not meant to be
+    modified once created.
+    """
+
+    __slots__ = (
+        "token_type",
+        "quantity",
+        "card",
+        "is_foil",
+        "deck_section",
+        "card_request_has_setcode",
+        "_text",
+        "_section_card_key",
+    )
+
+    # rendered mana symbol tags per mana cost (see mana_symbol_tag)
+    _mana_symbol_tags: dict[Optional[str], str] = dict()
+
+    def __init__(
+        self,
+        token_type: TokenType,
+        quantity: int = 0,
+        text: Optional[str] = None,
+        card: Optional[Card] = None,
+        is_foil: bool = False,
+        deck_section: Optional[DeckSection] = None,
+        card_request_has_setcode: bool = True,
+    ):
+        self.token_type = token_type
+        self.quantity = quantity
+        self.card = card
+        self.is_foil = is_foil
+        self.deck_section = deck_section
+        self.card_request_has_setcode = card_request_has_setcode
+        # card tokens' text is formatted lazily from the card
+        self._text = text if card is None else None
+        self._section_card_key = None
+
+    @property
+    def text(self) -> Optional[str]:
+        if self._text is None and self.card is not None:
+            self._text = f"{self.quantity} {self.card.name} [{self.card.set_code}] #{self.card.collector_number}"
+        return self._text
+
+    @text.setter
+    def text(self, value: Optional[str]) -> None:
+        self._text = value
+
+    def _fields(self) -> tuple:
+        return (
+            self.token_type,
+            self.quantity,
+            self.text,
+            self.card,
+            self.is_foil,
+            self.deck_section,
+            self.card_request_has_setcode,
+        )
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None  # mutable, as a dataclass
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(token_type={self.token_type!r}, "
+            f"quantity={self.quantity!r}, text={self.text!r}, card={self.card!r}, "
+            f"is_foil={self.is_foil!r}, deck_section={self.deck_section!r}, "
+            f"card_request_has_setcode={self.card_request_has_setcode!r})"
+        )
 
     # ===============
     # Factory Methods
@@ -120,41 +230,23 @@ class Token:
 
     @property
     def is_card_token(self):
-        return self.token_type in (
-            TokenType.LEGAL_CARD,
-            TokenType.BANNED_CARD,
-            TokenType.RESTRICTED_CARD,
-        )
+        return self.token_type in CARD_TOKEN_TYPES
 
     @property
     def is_card_token_for_deck(self):
-        return self.token_type in (
-            TokenType.LEGAL_CARD,
-            TokenType.RESTRICTED_CARD,
-            TokenType.BANNED_CARD,
-        )
+        return self.token_type in CARD_TOKEN_TYPES
 
     @property
     def is_token_for_deck(self):
-        return self.token_type in (
-            TokenType.LEGAL_CARD,
-            TokenType.BANNED_CARD,
-            TokenType.RESTRICTED_CARD,
-            TokenType.DECK_NAME,
-        )
+        return self.token_type in DECK_TOKEN_TYPES
 
     @property
     def is_card_placeholder_token(self):
-        return self.token_type in (
-            TokenType.CARD_RARITY,
-            TokenType.CARD_CMC,
-            TokenType.MANA_COLOUR,
-            TokenType.CARD_TYPE,
-        )
+        return self.token_type in CARD_PLACEHOLDER_TOKEN_TYPES
 
     @property
     def is_deck_metadata_token(self):
-        return self.token_type in (TokenType.DECK_NAME, TokenType.DECK_SECTION_NAME)
+        return self.token_type in DECK_METADATA_TOKEN_TYPES
 
     @property
     def is_deck_section(self):
@@ -162,21 +254,32 @@ class Token:
 
     @property
     def is_message_token(self):
-        return self.token_type in (
-            TokenType.COMMENT,
-            TokenType.UNKNOWN_TEXT,
-            TokenType.WARNING_MESSAGE,
-        )
+        return self.token_type in MESSAGE_TOKEN_TYPES
 
     @property
     def is_unknown_card(self):
         return self.token_type == TokenType.UNKNOWN_CARD
 
     @property
-    def card_key(self) -> str:
+    def card_key(self) -> Optional[tuple[str, str, str]]:
+        """Identity of the card printing, as (card name, set code, collector number)"""
         if not self.is_card_token or self.card is None:
-            return ""
-        return f"{self.card.name}-{self.card.set_code}-{self.card.collector_number}"
+            return None
+        return self.card.name, self.card.set_code, self.card.collector_number
+
+    @property
+    def section_card_key(self) -> Optional[tuple[str, str, str, str]]:
+        """Identity of the card printing within its deck section, as
+        (card name, set code, collector number, deck section name).
+        The key is computed once, and cached."""
+        if self._section_card_key is None:
+            card_key = self.card_key
+            if card_key is None or self.deck_section is None:
+                return None
+            self._section_card_key = card_key + (
+                sys.intern(self.deck_section.name.lower()),
+            )
+        return self._section_card_key
 
     @property
     def foil_marker(self):
@@ -189,6 +292,15 @@ class Token:
         if self.card is None:
             return ""
         mana_cost = self.card.mana_cost
+        tag = self._mana_symbol_tags.get(mana_cost)
+        if tag is None:
+            tag = self._mana_symbol_tags[mana_cost] = self._render_mana_symbols(
+                mana_cost
+            )
+        return tag
+
+    @staticmethod
+    def _render_mana_symbols(mana_cost: Optional[str]) -> str:
         if not mana_cost:
             return ""  # for cards w/ no mana cost (e.g. lands)
         mana_syms = mana_cost.replace("}", "-").replace("{", "").split("-")
@@ -230,6 +342,23 @@ class Token:
             return ""
         return ""
 
+    def to_json(self) -> dict:
+        j_repr = {
+            "token_type": self.token_type.name,
+            "text": self.text,
+            "quantity": self.quantity,
+        }
+        if self.deck_section is not None:
+            j_repr["deck_section"] = self.deck_section.name
+        if self.card is not None:
+            j_repr["card"] = {
+                "name": self.card.name,
+                "set_code": self.card.set_code,
+                "collector_number": self.card.collector_number,
+            }
+            j_repr["is_foil"] = self.is_foil
+        return j_repr
+
     @property
     def repr_tag(self):
         if self.is_card_token:
@@ -326,6 +455,95 @@ class Token:
         return table_row_tag.format(cells=td_tag)
 
 
+@dataclass
+class ParseResult:
+    """Result of parsing a deck list: the sequence of parsed tokens, along with
+    aggregates maintained as each token is added (see DeckParser.parse_card_list).
+
+    The result behaves as a (read-only) sequence of tokens.
+    """
+
+    tokens: list[Token] = field(default_factory=list)
+    # first deck name found in the list (if any)
+    deck_name: Optional[str] = None
+    # card tokens per deck section name, in order of detection
+    sections: dict[str, list[Token]] = field(default_factory=dict)
+    # total number of cards, and of banned cards, per deck section name
+    section_totals: dict[str, int] = field(default_factory=dict)
+    banned_totals: dict[str, int] = field(default_factory=dict)
+    # card tokens, and total number of copies, per card name (across sections)
+    cards_map: dict[str, list[Token]] = field(default_factory=dict)
+    card_copies: dict[str, int] = field(default_factory=dict)
+    unknown_cards: list[Token] = field(default_factory=list)
+
+    @classmethod
+    def from_tokens(cls, tokens: Iterable[Token]) -> "ParseResult":
+        result = cls()
+        for token in tokens:
+            result.add(token)
+        return result
+
+    def add(self, token: Token) -> None:
+        self.tokens.append(token)
+        if token.is_unknown_card:
+            self.unknown_cards.append(token)
+        elif token.token_type == TokenType.DECK_NAME:
+            if self.deck_name is None:
+                self.deck_name = token.text
+        elif token.is_card_token_for_deck and token.deck_section is not None:
+            section = token.deck_section.name
+            card_name = token.card.name
+            self.sections.setdefault(section, list()).append(token)
+            self.section_totals[section] = (
+                self.section_totals.get(section, 0) + token.quantity
+            )
+            if token.token_type == TokenType.BANNED_CARD:
+                self.banned_totals[section] = (
+                    self.banned_totals.get(section, 0) + token.quantity
+                )
+            self.cards_map.setdefault(card_name, list()).append(token)
+            self.card_copies[card_name] = (
+                self.card_copies.get(card_name, 0) + token.quantity
+            )
+
+    def __iter__(self) -> Iterator[Token]:
+        return iter(self.tokens)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __getitem__(self, index):
+        return self.tokens[index]
+
+
+@dataclass
+class _SectionEditionStats:
+    """Running counters of card copies (and release date) per set code in a deck section,
+    for card tokens with (reference) or without (to harmonise) a set code in the request.
+    Basic lands are not counted. Used in card art harmonisation."""
+
+    reference_tokens: int = 0
+    tokens_to_harmonise: int = 0
+    reference_copies: dict[str, int] = field(default_factory=dict)
+    reference_release_dates: dict[str, datetime.date] = field(default_factory=dict)
+    harmonise_copies: dict[str, int] = field(default_factory=dict)
+    harmonise_release_dates: dict[str, datetime.date] = field(default_factory=dict)
+
+    def add(self, token: Token) -> None:
+        if token.card_request_has_setcode:
+            self.reference_tokens += 1
+            copies, release_dates = self.reference_copies, self.reference_release_dates
+        else:
+            self.tokens_to_harmonise += 1
+            copies, release_dates = self.harmonise_copies, self.harmonise_release_dates
+        if token.card.type_line.lower().startswith("basic land"):
+            return
+        set_code = token.card.set_code
+        copies.setdefault(set_code, 0)
+        copies[set_code] += token.quantity
+        release_dates[set_code] = token.card.release_date
+
+
 class DeckParser:
     """"""
 
@@ -336,6 +554,16 @@ class DeckParser:
     ASTERISK = "* "  # Note the blank space after asterisk!
     NO_COLLECTOR_NUMBER = None
 
+    # Line normalisation
+    # ==================
+    # curly single quotes to plain apostrophe
+    CHARS_FOLDING_TABLE = str.maketrans({chr(8216): "'", chr(8217): "'"})
+    REX_URL = r"(?P<protocol>((https|ftp|file|http):))(?P<sep>((//|\\)+))(?P<url>([\w\d:#@%/;$~_?+-=\\.&]*))"
+    URL_PATTERN = re.compile(REX_URL, re.IGNORECASE)
+    URL_MARKER = ":"  # any URL has a protocol, so no colon means no link to purge
+    SINGLE_SLASH = "/"
+    DECKSTATS_COMMANDER = "#!Commander"
+
     # Core Matching Patterns (initialised in Constructor)
     # ===================================================
     REGRP_DECKNAME = "deckName"
@@ -344,6 +572,12 @@ class DeckParser:
         % REGRP_DECKNAME
     )
     DECK_NAME_PATTERN = re.compile(REX_DECK_NAME, re.IGNORECASE)
+    DECK_NAME_MARKERS = (":", "=")
+
+    # Lines starting with a card count (e.g. "4 Island", "SB: 2 Pyroblast", "* 4 Island").
+    # Used as cheap hint of card lines when splitting multi-deck documents.
+    REX_CARD_LINE_HINT = r"^\s*(\*\s*)?((MB|MD|SB)\s*:\s*)?\d"
+    CARD_LINE_HINT_PATTERN = re.compile(REX_CARD_LINE_HINT, re.IGNORECASE)
 
     #  Group placeholders
     REGRP_TOKEN = "token"
@@ -491,6 +725,17 @@ class DeckParser:
     )
     CARD_ONLY_PATTERN = re.compile(REX_CARDONLY)
 
+    # card patterns names, as reported by instrumentation
+    CARD_PATTERN_NAMES = {
+        CARD_SET_PATTERN: "card_set",
+        SET_CARD_PATTERN: "set_card",
+        CARD_SET_COLLNO_PATTERN: "card_set_collno",
+        SET_CARD_COLLNO_PATTERN: "set_card_collno",
+        CARD_COLLNO_SET_PATTERN: "card_collno_set",
+        SET_COLLNO_CARD_XMAGE_PATTERN: "set_collno_card_xmage",
+        CARD_ONLY_PATTERN: "card_only",
+    }
+
     CARD_TYPES = [
         "artifacts",
         "enchantments",
@@ -506,19 +751,71 @@ class DeckParser:
 
     DECK_SECTIONS = ("side", "sideboard", "sb", "main", "card", "mainboard", "deck")
 
-    def __init__(self, cards_db: ScryfallDB, optimise_card_art: bool = False):
+    def __init__(
+        self,
+        cards_db: ScryfallDB,
+        optimise_card_art: bool = False,
+        instrumentation: Optional[ParserInstrumentation] = None,
+    ):
         self._db = cards_db
         self._optimise_card_art = optimise_card_art
+        # optional per-stage timings and counters (see ParserInstrumentation)
+        self.instrumentation = instrumentation
 
     @property
     def card_types(self):
         return self.CARD_TYPES
 
-    def parse_card_list(self, deck_list: list[str]) -> list[Token]:
+    @property
+    def cards_db(self) -> ScryfallDB:
+        return self._db
+
+    @property
+    def optimise_card_art(self) -> bool:
+        return self._optimise_card_art
+
+    def parse_card_list(self, deck_list: Iterable[str]) -> ParseResult:
+        return ParseResult.from_tokens(self.parse_lines(deck_list))
+
+    def parse_lines(self, lines: Union[str, Iterable[str]]) -> list[Token]:
+        """Parse deck list lines, consumed lazily, into the final list of tokens.
+
+        Note: this is not a streaming API. Any later line can still change the
+        tokens parsed so far: deck names are moved to the top, the Main section
+        header may be inserted before all the cards, copies of a card are
+        regrouped across the whole section, and card art is harmonised across
+        the whole deck. Therefore, tokens are only returned (all at once) when
+        the input is exhausted. Multi-deck documents can be streamed one deck
+        list at a time instead (see iter_decklists).
+
+        Parameters
+        ----------
+        lines: str or Iterable[str]
+            Any iterable of text lines (e.g. a list, or an open file object).
+            Lines are consumed one at a time, with a single line of look-ahead
+            (required to detect the sideboard empty-line separator), so the input
+            text is never materialised in memory. A whole text block is also
+            accepted, and split into lines.
+
+        Return
+        ------
+            List of parsed tokens.
+        """
+        if isinstance(lines, str):
+            lines = lines.splitlines()
+        lines = iter(lines)
+
         tokens = list()
         current_deck_section = MAIN_DECK
-
-        for line_no, line in enumerate(deck_list):
+        # running counters to avoid rescanning tokens at every line
+        legal_cards_in_main = 0
+        has_main_section_token = False
+        all_cards_in_main = True
+
+        next_line = next(lines, None)
+        while next_line is not None:
+            line = next_line.rstrip("\r\n")
+            next_line = next(lines, None)
             if not line and not line.strip():
                 # lookahead to see if this is the sideboard empty-line separator
                 # for this to happen, these are the conditions to hold:
@@ -530,48 +827,25 @@ class DeckParser:
                     len(tokens)  # there is at least one token
                     and current_deck_section.name
                     == MAIN_DECK.name  # current section is MD
-                    and sum(
-                        [
-                            t.quantity
-                            for t in filter(
-                                lambda t: t.token_type == TokenType.LEGAL_CARD
-                                and t.deck_section.name == MAIN_DECK.name,
-                                tokens,
-                            )
-                        ]
-                    )
-                    >= 60  # there are at least 60 cards in MD
-                    and line_no + 1
-                    < len(deck_list)  # not last line and there is a next line
+                    and legal_cards_in_main >= 60  # there are at least 60 cards in MD
+                    and next_line is not None  # not last line and there is a next line
                 ):
                     # look_ahead
-                    token_ahead, _ = self._parse_line(
-                        deck_list[line_no + 1], current_deck_section
+                    token_ahead = self._look_ahead(
+                        next_line.rstrip("\r\n"), current_deck_section
                     )
                     if (
                         token_ahead is not None
                         and token_ahead.token_type == TokenType.LEGAL_CARD
                     ):
                         current_deck_section = SIDEBOARD
-                        any_mb_token = (
-                            len(
-                                list(
-                                    filter(
-                                        lambda t: t.token_type
-                                        == TokenType.DECK_SECTION_NAME
-                                        and t.text == MAIN_DECK.name,
-                                        tokens,
-                                    )
-                                )
-                            )
-                            > 0
-                        )
-                        if not any_mb_token:
+                        if not has_main_section_token:
                             md_token = Token.DeckSectionToken(MAIN_DECK.name)
                             if tokens[0].token_type == TokenType.DECK_NAME:
                                 tokens.insert(1, md_token)
                             else:
                                 tokens.insert(0, md_token)
+                            has_main_section_token = True
                         tokens.append(Token.DeckSectionToken(SIDEBOARD.name))
                         continue  # skip to next line to parse (again)
 
@@ -582,6 +856,12 @@ class DeckParser:
             if section.name != current_deck_section.name:
                 current_deck_section = section
 
+            if token.is_card_token:
+                if token.deck_section.name != MAIN_DECK.name:
+                    all_cards_in_main = False
+                elif token.token_type == TokenType.LEGAL_CARD:
+                    legal_cards_in_main += token.quantity
+
             if (
                 not token.is_token_for_deck
                 and token.token_type != TokenType.DECK_SECTION_NAME
@@ -597,6 +877,8 @@ class DeckParser:
                 current_deck_section = (
                     MAIN_DECK if token.text == MAIN_DECK.name else SIDEBOARD
                 )
+                if token.text == MAIN_DECK.name:
+                    has_main_section_token = True
                 tokens.append(token)
                 continue
 
@@ -604,51 +886,183 @@ class DeckParser:
 
         # Last validation
         # if all tokens in Main and there is no MainDeck Token Deck Section in list
-        if (
-            tokens
-            and all(
-                [
-                    True
-                    if t.deck_section is not None
-                    and t.deck_section.name == MAIN_DECK.name
-                    else False
-                    for t in filter(lambda t: t.is_card_token, tokens)
-                ]
-            )
-            and len(
-                list(
-                    filter(
-                        lambda t: t.token_type == TokenType.DECK_SECTION_NAME
-                        and t.text == MAIN_DECK.name,
-                        tokens,
-                    )
-                )
-            )
-            == 0
-        ):
+        if tokens and all_cards_in_main and not has_main_section_token:
             md_token = Token.DeckSectionToken(MAIN_DECK.name)
             if tokens[0].token_type == TokenType.DECK_SECTION_NAME:
                 tokens.insert(1, md_token)
             else:
                 tokens.insert(0, md_token)
 
+        instrumentation = self.instrumentation
+        start = perf_counter() if instrumentation is not None else 0.0
         tokens = self._regroup_any_duplicate_card_entry_per_section(tokens)
+        if instrumentation is not None:
+            instrumentation.add_stage_time(
+                instrumentation.REGROUP, perf_counter() - start
+            )
         if self._optimise_card_art:
+            start = perf_counter() if instrumentation is not None else 0.0
             tokens = self._harmonise_card_art(tokens)
+            if instrumentation is not None:
+                instrumentation.add_stage_time(
+                    instrumentation.HARMONISE, perf_counter() - start
+                )
         return tokens
 
+    @classmethod
+    def split_decklists(cls, lines: Union[str, Iterable[str]]) -> list[DeckListSpan]:
+        """Split a document containing multiple deck lists, each one headed with a
+        deck name line (e.g. "Deck: Goblins" or "Name=Replenish"), in a single scan.
+
+        A deck name line (commented ones included, e.g. "// Name: Goblins") starts
+        a new deck list only if the current one already contains card lines.
+        The new deck list starts at the first non-blank line following the last
+        card line, so that any header or preamble line preceding the deck name
+        (e.g. "[metadata]" in Forge format, or comments) is kept with its deck.
+        Blank documents produce no deck list.
+        """
+        return list(cls.iter_decklist_spans(lines))
+
+    @classmethod
+    def iter_decklist_spans(
+        cls, lines: Union[str, Iterable[str]]
+    ) -> Iterator[DeckListSpan]:
+        """Split a multi-deck document lazily (as split_decklists): each deck list
+        is yielded as soon as the next one starts, so that only the lines of a
+        single deck list (and of the preamble of the next one) are kept in memory.
+        """
+        if isinstance(lines, str):
+            lines = lines.splitlines()
+
+        current_lines = list()
+        start = 0
+        has_card_lines = False
+        # index (in current_lines) of the first non-blank line after the last card
+        # line, i.e. where the preamble of the next deck list (if any) starts
+        preamble_index = None
+        for line in lines:
+            line = line.rstrip("\r\n")
+            if (
+                has_card_lines
+                and any(marker in line for marker in cls.DECK_NAME_MARKERS)
+                and cls.DECK_NAME_PATTERN.search(line.strip())
+            ):
+                end = len(current_lines) if preamble_index is None else preamble_index
+                yield DeckListSpan(start, start + end, current_lines[:end])
+                current_lines = current_lines[end:]
+                start += end
+                has_card_lines = False
+                preamble_index = None
+            elif cls.CARD_LINE_HINT_PATTERN.match(line):
+                has_card_lines = True
+                preamble_index = None
+            elif has_card_lines and preamble_index is None and line.strip():
+                preamble_index = len(current_lines)
+            current_lines.append(line)
+
+        if any(line.strip() for line in current_lines):
+            yield DeckListSpan(start, start + len(current_lines), current_lines)
+
+    def iter_decklists(
+        self, lines: Union[str, Iterable[str]]
+    ) -> Iterator[tuple[DeckListSpan, ParseResult]]:
+        """Parse a multi-deck document (e.g. an open file with all the deck lists
+        of an event) one deck list at a time, streaming: the tokens of each deck
+        list are yielded, along with its span in the document, as soon as the
+        next deck list starts (see iter_decklist_spans). Memory is bounded by the
+        largest deck list, rather than by the whole document."""
+        for span in self.iter_decklist_spans(lines):
+            yield span, self.parse_card_list(span.lines)
+
+    def parse_many(
+        self,
+        decklists: Iterable[Union[str, Iterable[str]]],
+        workers: Optional[int] = None,
+        chunksize: int = 8,
+    ) -> list[BatchParseResult]:
+        """Parse a batch of deck lists (e.g. all the registrations of a tournament)
+        on a pool of worker processes.
+
+        Parameters
+        ----------
+        decklists: Iterable
+            Sequence of deck lists, each one in any form accepted by `parse_lines`.
+        workers: int (default None)
+            Number of worker processes (defaults to the number of CPUs).
+            With a single worker, deck lists are parsed in the current process.
+        chunksize: int (default 8)
+            Number of deck lists sent to a worker process at a time.
+
+        Return
+        ------
+            List of BatchParseResult, in the same order of input deck lists.
+            A deck list failing to parse is reported in its own result, and
+            does not stop the batch.
+
+        Note: Worker processes are forked whenever the platform allows it,
+        so that the cards DB is inherited by all workers, and never loaded
+        (nor pickled) again.
+        Any instrumentation only collects data of deck lists parsed in the
+        current process, i.e. with a single worker.
+        """
+        # imported here as worker processes are not available in the browser
+        import multiprocessing
+        import os
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        entries = enumerate(decklists)
+        if workers <= 1:
+            return list(map(self._parse_batch_entry, entries))
+
+        if "fork" in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context("fork")
+        else:
+            mp_context = multiprocessing.get_context()
+        # deck lists are sent to workers as text, or lists of lines: any other
+        # iterable (e.g. file objects, generators) is read here, as it cannot be
+        # pickled. Deck lists failing to be read are reported in their own result.
+        read_failures: dict[int, BatchParseResult] = dict()
+
+        def picklable_entries():
+            for index, deck_list in entries:
+                if not isinstance(deck_list, (str, list)):
+                    try:
+                        deck_list = list(deck_list)
+                    except Exception as e:
+                        read_failures[index] = BatchParseResult(
+                            index=index, error=f"{type(e).__name__}: {e}"
+                        )
+                        deck_list = []
+                yield index, deck_list
+
+        with mp_context.Pool(
+            processes=workers, initializer=_init_batch_worker, initargs=(self,)
+        ) as pool:
+            results = list(
+                pool.imap(
+                    _parse_in_batch_worker,
+                    picklable_entries(),
+                    chunksize=max(1, chunksize),
+                )
+            )
+        return [read_failures.get(result.index, result) for result in results]
+
+    def _parse_batch_entry(
+        self, entry: tuple[int, Union[str, Iterable[str]]]
+    ) -> BatchParseResult:
+        index, deck_list = entry
+        try:
+            tokens = self.parse_card_list(deck_list)
+        except Exception as e:
+            return BatchParseResult(index=index, error=f"{type(e).__name__}: {e}")
+        return BatchParseResult(index=index, tokens=tokens)
+
     @staticmethod
     def _get_pivot_release_date(
-        reference_tokens: Iterable[Token],
+        card_stats_per_edition: dict[str, int],
+        set_release_date: dict[str, datetime.date],
     ) -> Optional[datetime.date]:
-        card_stats_per_edition = dict()
-        set_release_date = dict()
-        for t in reference_tokens:
-            key = t.card.set_code
-            card_stats_per_edition.setdefault(key, 0)
-            card_stats_per_edition[key] += t.quantity
-            set_release_date[key] = t.card.release_date
-
         # regroup by card count
         card_edition_by_count = {}
         for set_code, quantity in card_stats_per_edition.items():
@@ -683,89 +1097,74 @@ class DeckParser:
         if not pivot_candidates:
             return None
 
-        return sorted(pivot_candidates)[0]  # oldest set code among pivots
+        return min(pivot_candidates)  # oldest set code among pivots
 
     def _harmonise_card_art(self, tokens: list[Token]) -> list[Token]:
-        optimised_tokens = list()
-        card_tokens = list(filter(lambda t: t.is_card_token, tokens))
-        deck_sections_in_list = set([t.deck_section.name for t in card_tokens])
-
-        token_remap: dict[str, dict[str, Token]] = dict()
-
-        for section in deck_sections_in_list:
-            # this will be a dictionary indexed on token card key
-            token_remap[section] = dict()
-
-            cards_in_section = list(
-                filter(lambda t: t.deck_section.name == section, card_tokens)
-            )
-            tokens_to_harmonise = list(
-                filterfalse(lambda t: t.card_request_has_setcode, cards_in_section)
-            )
-            reference_tokens = list(
-                filter(lambda t: t.card_request_has_setcode, cards_in_section)
-            )
+        # single pass on card tokens to gather running counters per deck section
+        no_card_tokens = 0
+        sections_stats: dict[str, _SectionEditionStats] = defaultdict(
+            _SectionEditionStats
+        )
+        for token in tokens:
+            if not token.is_card_token:
+                continue
+            no_card_tokens += 1
+            section_stats = sections_stats[token.deck_section.name]
+            section_stats.add(token)
 
+        pivot_release_dates: dict[str, datetime.date] = dict()
+        for section, section_stats in sections_stats.items():
+            if not section_stats.tokens_to_harmonise:
+                continue
             # if reference tokens account for less than the 50% of the whole card list
             # consider the whole list as tokens of reference.
             # Note: This will have impact on how set code will be chosen. Card tokens with
             # already specified sets won't be affected by the harmonisation
-            if len(reference_tokens) < (len(card_tokens) // 2):
-                reference_tokens.extend(tokens_to_harmonise)
+            if section_stats.reference_tokens < (no_card_tokens // 2):
+                card_stats_per_edition = dict(section_stats.reference_copies)
+                for set_code, quantity in section_stats.harmonise_copies.items():
+                    card_stats_per_edition.setdefault(set_code, 0)
+                    card_stats_per_edition[set_code] += quantity
+                set_release_date = {
+                    **section_stats.reference_release_dates,
+                    **section_stats.harmonise_release_dates,
+                }
+            else:
+                card_stats_per_edition = section_stats.reference_copies
+                set_release_date = section_stats.reference_release_dates
 
-            # exclude basic lands in the count of reference!
-            reference_tokens = filterfalse(
-                lambda t: t.card.type_line.lower().startswith("basic land"),
-                reference_tokens,
+            pivot_card_edition = self._get_pivot_release_date(
+                card_stats_per_edition, set_release_date
             )
+            if pivot_card_edition is not None:
+                pivot_release_dates[section] = pivot_card_edition
 
-            pivot_card_edition = self._get_pivot_release_date(reference_tokens)
-
-            if pivot_card_edition is None:
-                continue
-
-            for token in tokens_to_harmonise:
-                tkey = token.card_key
-                replace_candidate = None
-                cards_candidate = filter(
-                    lambda c: c.release_date <= pivot_card_edition,
-                    self._db.lookup(card_name=token.card.name),
-                )
-                cards_candidate = sorted(
-                    cards_candidate,
-                    key=lambda c: (c.release_date, c.collector_number),
-                    reverse=True,
-                )
-                if len(cards_candidate):
-                    alternate_card = cards_candidate[0]
-                    replace_token = Token.CardToken(
-                        token_type=token.token_type,
-                        card=alternate_card,
-                        count=token.quantity,
-                        card_has_setcode=True,
-                        deck_section=token.deck_section,
-                        is_foil=token.is_foil,
-                    )
-                    token_remap[section][tkey] = replace_token
-
+        optimised_tokens = list()
         for token in tokens:
-            if not token.is_card_token:
-                optimised_tokens.append(token)
-                continue
-            if token.card_request_has_setcode:
+            if not token.is_card_token or token.card_request_has_setcode:
                 # not harmonised, so ready to add in the same order
                 optimised_tokens.append(token)
                 continue
             # now look for alternatives
-            deck_section_name = token.deck_section.name
-            token_card_key = token.card_key
-            if (
-                deck_section_name in token_remap
-                and token_card_key in token_remap[deck_section_name]
-            ):
-                optimised_tokens.append(token_remap[deck_section_name][token_card_key])
-            else:
+            pivot_card_edition = pivot_release_dates.get(token.deck_section.name, None)
+            alternate_card = (
+                self._db.latest_printing(token.card.name, pivot_card_edition)
+                if pivot_card_edition is not None
+                else None
+            )
+            if alternate_card is None:
                 optimised_tokens.append(token)
+                continue
+            optimised_tokens.append(
+                Token.CardToken(
+                    token_type=token.token_type,
+                    card=alternate_card,
+                    count=token.quantity,
+                    card_has_setcode=True,
+                    deck_section=token.deck_section,
+                    is_foil=token.is_foil,
+                )
+            )
         return optimised_tokens
 
     @staticmethod
@@ -777,8 +1176,7 @@ class DeckParser:
         for token in filter(
             lambda t: t.is_card_token_for_deck and t.deck_section is not None, tokens
         ):
-            section_card_key = f"{token.card_key}-{token.deck_section.name.lower()}"
-            card_tokens_map[section_card_key].append(token)
+            card_tokens_map[token.section_card_key].append(token)
 
         grouped_tokens = list()
         cards_already_added = set()
@@ -787,7 +1185,7 @@ class DeckParser:
                 grouped_tokens.append(token)
                 continue
 
-            section_card_key = f"{token.card_key}-{token.deck_section.name.lower()}"
+            section_card_key = token.section_card_key
             if len(card_tokens_map[section_card_key]) == 1:
                 grouped_tokens.append(token)
                 continue
@@ -810,35 +1208,83 @@ class DeckParser:
             cards_already_added.add(section_card_key)
         return grouped_tokens
 
-    def _parse_line(
-        self, line: str, deck_section: DeckSection
-    ) -> tuple[Optional[Token], DeckSection]:
+    @classmethod
+    def normalise_line(cls, line: str) -> Optional[tuple[str, str]]:
+        """Normalise a single line of a deck list, before any token matching.
+
+        Curly quotes are folded, links are purged, markdown list markers are
+        dropped and single-slash split card names are rewritten with a double
+        slash. Link and slash passes only run if the line may contain any.
+
+        Return
+        ------
+            None if the line has to be skipped (e.g. empty lines), otherwise
+            the pair of (text to parse, reference text). The reference text keeps
+            comment markers, and it is used for comments and unknown text tokens.
+        """
         if not line or not line.strip():
-            return None, deck_section
-        ref_line = line.strip().replace(chr(8216), "'").replace(chr(8217), "'")
-        ref_line = self._purge_all_links(ref_line)
+            return None
+        ref_line = line.strip().translate(cls.CHARS_FOLDING_TABLE)
+        ref_line = cls._purge_all_links(ref_line)
 
-        if line.startswith(self.LINE_COMMENT_DELIMITER_OR_MD_HEADER):
-            line = line.replace(self.LINE_COMMENT_DELIMITER_OR_MD_HEADER, "")
+        if line.startswith(cls.LINE_COMMENT_DELIMITER_OR_MD_HEADER):
+            line = line.replace(cls.LINE_COMMENT_DELIMITER_OR_MD_HEADER, "")
         else:
             line = ref_line.strip()
 
         # Some websites export split-card names with a single slash. Replace with double slash
-        line = self.SEARCH_SINGLE_SLASH.sub(" // ", line)
-        if line.startswith(self.ASTERISK):  # Markdown card-list (tapped out md export)
+        if cls.SINGLE_SLASH in line:
+            line = cls.SEARCH_SINGLE_SLASH.sub(" // ", line)
+        if line.startswith(cls.ASTERISK):  # Markdown card-list (tapped out md export)
             line = line[2:]
 
         # == Patches to Corner Cases
         # ===========================
         # FIX Commander in Deckstats Export
-        if line.endswith("#!Commander"):
-            return None, deck_section  # Just skip this line
+        if line.endswith(cls.DECKSTATS_COMMANDER):
+            return None  # Just skip this line
+        return line, ref_line
+
+    def _parse_line(
+        self, line: str, deck_section: DeckSection
+    ) -> tuple[Optional[Token], DeckSection]:
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return self._tokenise_line(line, deck_section)
+
+        instrumentation.start_line()
+        token, deck_section = self._tokenise_line(line, deck_section)
+        instrumentation.end_line(line, token.token_type.name if token else None)
+        return token, deck_section
+
+    def _look_ahead(self, line: str, deck_section: DeckSection) -> Optional[Token]:
+        # the line ahead is parsed again in turn: its stages are timed, but the line
+        # is only counted (and traced) then
+        if self.instrumentation is not None:
+            self.instrumentation.start_line()
+        token, _ = self._tokenise_line(line, deck_section)
+        return token
+
+    def _tokenise_line(
+        self, line: str, deck_section: DeckSection
+    ) -> tuple[Optional[Token], DeckSection]:
+        instrumentation = self.instrumentation
+        normalised = self.normalise_line(line)
+        if instrumentation is not None:
+            instrumentation.lap(instrumentation.NORMALISE)
+        if normalised is None:
+            return None, deck_section
+        line, ref_line = normalised
 
         token, deck_section = self._parse_card_token(line, deck_section)
+        if instrumentation is not None:
+            instrumentation.lap(instrumentation.CARD_LOOKUP)
 
         if token:
             return token, deck_section
         token = self._parse_non_card_token(line)
+        if instrumentation is not None:
+            instrumentation.lap(instrumentation.NON_CARD_PATTERNS)
         if token:
             return token, deck_section
 
@@ -855,6 +1301,9 @@ class DeckParser:
     ) -> Optional[tuple[Token, DeckSection]]:
         line = text.strip()
         matchers = self._get_regex_matchers(line)
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            instrumentation.lap(instrumentation.CARD_PATTERNS)
         # ultimately, we will return an unknown_card_token (or None)
         # if no card will be matched with the input request text
         unknown_card_token = None
@@ -962,6 +1411,10 @@ class DeckParser:
                         ),
                         card_deck_section,
                     )
+                if instrumentation is not None:
+                    instrumentation.card_pattern_resolved(
+                        self.CARD_PATTERN_NAMES[matcher.re]
+                    )
                 return (
                     self._new_card_token(
                         card=matched_card,
@@ -977,6 +1430,10 @@ class DeckParser:
             # At this stage, we know the card name exists in the DB so a Card MUST be found
             # and exact card will be returned based on the Preferred sets specified in the DB
             card = next(self._db.lookup(card_name=card_name, unique=True))
+            if instrumentation is not None:
+                instrumentation.card_pattern_resolved(
+                    self.CARD_PATTERN_NAMES[matcher.re]
+                )
             return (
                 self._new_card_token(
                     card=card,
@@ -1017,17 +1474,16 @@ class DeckParser:
     # PARSE CARD TOKEN UTILITY METHODS
     # ================================
 
-    @staticmethod
-    def _purge_all_links(line: str) -> str:
+    @classmethod
+    def _purge_all_links(cls, line: str) -> str:
         """purge any html/URL link present in lines.
         useful to get rid of amenities of MD decklist export"""
 
-        url_pattern = r"(?P<protocol>((https|ftp|file|http):))(?P<sep>((//|\\)+))(?P<url>([\w\d:#@%/;$~_?+-=\\.&]*))"
-        pattern = re.compile(url_pattern, re.IGNORECASE)
-        matcher = pattern.search(line)
-        if matcher:
-            for group in matcher.groups():
-                line = line.replace(group, "").strip()
+        if cls.URL_MARKER in line:
+            matcher = cls.URL_PATTERN.search(line)
+            if matcher:
+                for group in matcher.groups():
+                    line = line.replace(group, "").strip()
         if line.endswith("()"):
             return line[:-2]
         return line
@@ -1043,6 +1499,7 @@ class DeckParser:
 
     def _get_regex_matchers(self, line: str) -> list[re.Match[AnyStr]]:
         matches = list()
+        instrumentation = self.instrumentation
         patterns_with_coll_number = (
             self.CARD_SET_COLLNO_PATTERN,
             self.SET_CARD_COLLNO_PATTERN,
@@ -1052,11 +1509,16 @@ class DeckParser:
 
         for pattern in patterns_with_coll_number:
             match = pattern.search(line)
-            if (
+            is_hit = bool(
                 match
                 and self._get_rex_group(match, self.REGRP_SET)
                 and self._get_rex_group(match, self.REGRP_COLLNR)
-            ):
+            )
+            if instrumentation is not None:
+                instrumentation.card_pattern_attempt(
+                    self.CARD_PATTERN_NAMES[pattern], is_hit
+                )
+            if is_hit:
                 matches.append(match)
 
         other_patterns = (
@@ -1067,6 +1529,10 @@ class DeckParser:
 
         for pattern in other_patterns:
             match = pattern.search(line)
+            if instrumentation is not None:
+                instrumentation.card_pattern_attempt(
+                    self.CARD_PATTERN_NAMES[pattern], match is not None
+                )
             if match:
                 matches.append(match)
 
@@ -1085,52 +1551,6 @@ class DeckParser:
 
     # -------------------------------------------------------------------------
 
-    def _parse_non_card_token(self, text: str) -> Optional[Token]:
-        if self._is_deck_section_name(text):
-            token_text = self._noncard_token_match(text)
-            return Token.DeckSectionToken(token_text)
-
-        if self._is_card_cmc_token(text):
-            token_text = self._get_cardcmc_match(text)
-            return Token(token_type=TokenType.CARD_CMC, text=token_text)
-
-        if self._is_card_rarity_token(text):
-            token_match = self._card_rarity_token_match(text)
-            if token_match and len(token_match.strip()):
-                return Token(token_type=TokenType.CARD_RARITY, text=token_match)
-            return None
-
-        if self._is_card_type(text):
-            token_match = self._noncard_token_match(text)
-            return Token(token_type=TokenType.CARD_TYPE, text=token_match)
-
-        if self._is_mana_token(text):
-            token_match = self._get_mana_token_match(text)
-            return Token(token_type=TokenType.MANA_COLOUR, text=token_match)
-
-        if self._is_deck_name(text):
-            deck_name = self._deck_name_match(text)
-            return Token(token_type=TokenType.DECK_NAME, text=deck_name.strip())
-
-        return None
-
-    def _get_cardcmc_match(self, text: str) -> str:
-        matched_token = self._card_cmc_token_match(text)
-        matched_token = matched_token.upper()
-        if "CC" in matched_token:
-            matched_token = matched_token.replace("CC", "").strip()
-        else:
-            matched_token = matched_token.replace("CMC", "").strip()
-        return f"CMC: {matched_token}"
-
-    def _get_mana_token_match(self, text: str) -> str:
-        first_mana, *second_mana = self._mana_token_match(text)
-        token_text = "{%s}%s" % (
-            first_mana,
-            "{%s}" % second_mana if second_mana else "",
-        )
-        return token_text
-
     # ====================================
     # PARSE NON-CARD TOKEN UTILITY METHODS
     # ====================================
@@ -1141,87 +1561,84 @@ class DeckParser:
     # The use of these tokens has been borrowed by Deckstats.net format export.
     # -----------------------------------------------------------------------------
 
-    def _is_deck_section_name(self, text: str) -> bool:
-        non_card_token = self._noncard_token_match(text)
-        if not non_card_token:
-            return False
-        return non_card_token.lower() in self.DECK_SECTIONS
-
-    def _is_deck_name(self, text: str) -> bool:
+    def _parse_non_card_token(self, text: str) -> Optional[Token]:
+        """Classify the line in a single pass, running each non-card pattern at most
+        once. Precedence order is: deck section, CMC, rarity, card type, mana colour,
+        and deck name."""
         if not text:
-            return False
+            return None
         line = text.strip()
-        match = self.DECK_NAME_PATTERN.search(line)
-        return match is not None
 
-    def _is_card_type(self, text: str) -> bool:
-        non_card_token = self._noncard_token_match(text)
-        if not non_card_token:
-            return False
-        return non_card_token.lower() in self.CARD_TYPES
+        noncard_match = self.NONCARD_PATTERN.search(line)
+        non_card_token = noncard_match.group(self.REGRP_TOKEN) if noncard_match else ""
+        non_card_token_lower = non_card_token.lower()
+        if non_card_token_lower in self.DECK_SECTIONS:
+            return Token.DeckSectionToken(non_card_token)
 
-    def _is_card_rarity_token(self, text: str) -> bool:
-        return len(self._card_rarity_token_match(text)) > 0
+        cmc_match = self.CMC_PATTERN.search(line)
+        if cmc_match:
+            return Token(
+                token_type=TokenType.CARD_CMC, text=self._cmc_token_text(cmc_match)
+            )
 
-    def _is_card_cmc_token(self, text: str) -> bool:
-        return len(self._card_cmc_token_match(text)) > 0
+        rarity_match = self.CARD_RARITY_PATTERN.search(line)
+        if rarity_match and rarity_match.group(self.REGRP_TOKEN):
+            rarity = rarity_match.group(self.REGRP_TOKEN)
+            if rarity.strip():
+                return Token(token_type=TokenType.CARD_RARITY, text=rarity)
+            return None
 
-    def _is_mana_token(self, text: str) -> bool:
-        return len(self._mana_token_match(text)) > 0
+        if non_card_token and non_card_token_lower in self.CARD_TYPES:
+            return Token(token_type=TokenType.CARD_TYPE, text=non_card_token)
 
-    # ---- MATCH METHODS ------
+        mana_match = self.MANA_PATTERN.search(line)
+        if mana_match:
+            return Token(
+                token_type=TokenType.MANA_COLOUR, text=self._mana_token_text(mana_match)
+            )
 
-    def _noncard_token_match(self, text: str) -> str:
-        if not text:
-            return ""
-        line = text.strip()
-        match = self.NONCARD_PATTERN.search(line)
-        if not match:
-            return ""
-        return match.group(self.REGRP_TOKEN)
+        deck_name_match = self.DECK_NAME_PATTERN.search(line)
+        if deck_name_match:
+            deck_name = deck_name_match.group(self.REGRP_DECKNAME)
+            return Token(token_type=TokenType.DECK_NAME, text=deck_name.strip())
 
-    def _card_rarity_token_match(self, text: str) -> str:
-        if not text:
-            return ""
-        line = text.strip()
-        card_rarity_match = self.CARD_RARITY_PATTERN.search(line)
-        if not card_rarity_match:
-            return ""
-        return card_rarity_match.group(self.REGRP_TOKEN)
+        return None
 
-    def _card_cmc_token_match(self, text: str) -> str:
-        if not text:
-            return ""
-        line = text.strip()
-        token_match = self.CMC_PATTERN.search(line)
-        if not token_match:
-            return ""
-        return token_match.group(self.REGRP_TOKEN)
+    def _cmc_token_text(self, cmc_match: re.Match[AnyStr]) -> str:
+        matched_token = cmc_match.group(self.REGRP_TOKEN).upper()
+        if "CC" in matched_token:
+            matched_token = matched_token.replace("CC", "").strip()
+        else:
+            matched_token = matched_token.replace("CMC", "").strip()
+        return f"CMC: {matched_token}"
 
-    def _mana_token_match(self, text: str) -> Union[str, tuple[str, str]]:
-        if not text:
-            return ""
-        line = text.strip()
-        match = self.MANA_PATTERN.search(line)
-        if not match:
-            return ""
-        first_mana = match.group(self.REGRP_COLR1)
-        mana_symbol_match = self.MANA_SYMBOL_PATTERN.search(first_mana)
-        if mana_symbol_match:
-            first_mana = mana_symbol_match.group(self.REGRP_MANA)
+    def _mana_token_text(self, mana_match: re.Match[AnyStr]) -> str:
+        token_text = ""
+        for group in (self.REGRP_COLR1, self.REGRP_COLR2):
+            mana = mana_match.group(group)
+            if not mana:
+                continue  # single colour
+            mana_symbol_match = self.MANA_SYMBOL_PATTERN.search(mana)
+            if mana_symbol_match:
+                mana = mana_symbol_match.group(self.REGRP_MANA)
+            token_text += "{%s}" % mana
+        return token_text
 
-        second_mana = match.group(self.REGRP_COLR2)
-        mana_symbol_match = self.MANA_SYMBOL_PATTERN.search(second_mana)
-        if mana_symbol_match:
-            second_mana = mana_symbol_match.group(self.REGRP_MANA)
 
-        return first_mana, second_mana
+# ====================
+# Batch Parser Workers
+# ====================
 
-    def _deck_name_match(self, text: str) -> str:
-        if not text:
-            return ""
-        line = text.strip()
-        match = self.DECK_NAME_PATTERN.search(line)
-        if match:
-            return match.group(self.REGRP_DECKNAME)
-        return ""
+# Deck Parser instance in each worker process (see DeckParser.parse_many)
+_BATCH_PARSER: Optional[DeckParser] = None
+
+
+def _init_batch_worker(deck_parser: DeckParser) -> None:
+    global _BATCH_PARSER
+    _BATCH_PARSER = deck_parser
+
+
+def _parse_in_batch_worker(
+    entry: tuple[int, Union[str, Iterable[str]]]
+) -> BatchParseResult:
+    return _BATCH_PARSER._parse_batch_entry(entry)
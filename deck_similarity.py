@@ -0,0 +1,230 @@
+"""
+Near-duplicate deck detection, with MinHash signatures and LSH (banding).
+
+Decks are sets of (card name, copy index) shingles, across all deck sections:
+e.g. "4 Dark Ritual" is dark-ritual#1 ... dark-ritual#4. Therefore, the Jaccard
+similarity of two decks is the share of card copies they have in common.
+Exact duplicates are found by fingerprint instead (see Deck.fingerprint).
+
+MinHash signatures estimate the Jaccard similarity of decks (i.e. the share of
+equal signature values), and the LSH index groups signatures into buckets, band
+by band: decks sharing any bucket are candidate near-duplicates, whereas all the
+other pairs of decks are never compared. With b bands of r rows each, pairs of
+decks of similarity s are candidates with probability 1 - (1 - s^r)^b,
+i.e. the similarity threshold is about (1/b)^(1/r), e.g.:
+
+    pairs = near_duplicates(decks, threshold=0.8)
+    for pair in pairs:  # most similar first
+        print(decks[pair.first].name, decks[pair.second].name, pair.similarity)
+"""
+from hashlib import blake2b
+from operator import eq
+import random
+from typing import Hashable, Iterable, NamedTuple, Optional, Sequence
+
+from data import ScryfallDB
+from deck import Deck
+
+# MinHash permutations are (a * x + b) mod p, on 32-bit shingle hashes x
+_MERSENNE_PRIME = (1 << 31) - 1
+# signature values of empty shingle sets (i.e. out of the range of hash values)
+_EMPTY_VALUE = _MERSENNE_PRIME
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 16  # i.e. 8 rows per band: threshold of about 0.7
+
+
+class NearDuplicate(NamedTuple):
+    first: Hashable
+    second: Hashable
+    # estimated Jaccard similarity
+    similarity: float
+
+
+def _deck_card_copies(deck: Deck) -> dict[str, int]:
+    copies: dict[str, int] = dict()
+    for card_tokens in deck.cards.values():
+        for token in card_tokens:
+            key = ScryfallDB.make_dbentry(token.card.name)
+            copies[key] = copies.get(key, 0) + token.quantity
+    return copies
+
+
+def _shingle(card_key: str, copy_index: int) -> str:
+    return f"{card_key}#{copy_index}"
+
+
+def deck_shingles(deck: Deck) -> list[str]:
+    """(card name, copy index) shingles of the deck, across all deck sections"""
+    return [
+        _shingle(key, i)
+        for key, no_copies in _deck_card_copies(deck).items()
+        for i in range(1, no_copies + 1)
+    ]
+
+
+class MinHasher:
+    """MinHash signatures of `num_perm` values. Hash values of each shingle
+    (under all the permutations) are computed once, and cached: as shingles of
+    a card always come in a run (i.e. from the first to the n-th copy), so are
+    the minimum hash values of n copies of each card."""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1):
+        self.num_perm = num_perm
+        rnd = random.Random(seed)
+        self._permutations = [
+            (rnd.randrange(1, _MERSENNE_PRIME), rnd.randrange(_MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._shingle_hashes: dict[str, tuple[int, ...]] = dict()
+        self._copies_hashes: dict[tuple[str, int], tuple[int, ...]] = dict()
+
+    def _hashes(self, shingle: str) -> tuple[int, ...]:
+        hashes = self._shingle_hashes.get(shingle)
+        if hashes is None:
+            x = int.from_bytes(
+                blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little"
+            )
+            hashes = self._shingle_hashes[shingle] = tuple(
+                (a * x + b) % _MERSENNE_PRIME for a, b in self._permutations
+            )
+        return hashes
+
+    def _copies_hashes_of(self, card_key: str, no_copies: int) -> tuple[int, ...]:
+        """Minimum hash values of the shingles of the first n copies of the card"""
+        hashes = self._copies_hashes.get((card_key, no_copies))
+        if hashes is None:
+            hashes = self._hashes(_shingle(card_key, no_copies))
+            if no_copies > 1:
+                hashes = tuple(
+                    map(min, hashes, self._copies_hashes_of(card_key, no_copies - 1))
+                )
+            self._copies_hashes[card_key, no_copies] = hashes
+        return hashes
+
+    def _signature(self, hashes: list[tuple[int, ...]]) -> tuple[int, ...]:
+        if not hashes:
+            return (_EMPTY_VALUE,) * self.num_perm
+        return tuple(map(min, *hashes)) if len(hashes) > 1 else hashes[0]
+
+    def signature(self, shingles: Iterable[str]) -> tuple[int, ...]:
+        return self._signature([self._hashes(shingle) for shingle in shingles])
+
+    def deck_signature(self, deck: Deck) -> tuple[int, ...]:
+        """Signature of the shingles of the deck (see deck_shingles)"""
+        return self._signature(
+            [
+                self._copies_hashes_of(key, no_copies)
+                for key, no_copies in _deck_card_copies(deck).items()
+                if no_copies > 0
+            ]
+        )
+
+
+def estimate_similarity(signature: Sequence[int], other: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return sum(map(eq, signature, other)) / len(signature)
+
+
+class LSHIndex:
+    """Locality-sensitive hashing (banding) index of MinHash signatures.
+    Signatures of empty shingle sets (e.g. decks with no known cards) are kept,
+    but never bucketed: they are not near-duplicates of any other signature."""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, bands: int = DEFAULT_BANDS):
+        if num_perm % bands:
+            raise ValueError(
+                f"Cannot split {num_perm} signature values in {bands} bands"
+            )
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._signatures: dict[Hashable, tuple[int, ...]] = dict()
+        # a dict of buckets (i.e. keys of signatures) per band
+        self._buckets: list[dict[tuple[int, ...], list[Hashable]]] = [
+            dict() for _ in range(bands)
+        ]
+
+    @property
+    def threshold(self) -> float:
+        """(Approximate) similarity threshold of candidate pairs"""
+        return (1 / self.bands) ** (1 / self.rows)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    @staticmethod
+    def _is_empty(signature: tuple[int, ...]) -> bool:
+        return signature[0] == _EMPTY_VALUE
+
+    def _bands(self, signature: tuple[int, ...]) -> Iterable[tuple[int, ...]]:
+        rows = self.rows
+        return (signature[i : i + rows] for i in range(0, rows * self.bands, rows))
+
+    def add(self, key: Hashable, signature: tuple[int, ...]) -> None:
+        if key in self._signatures:
+            raise KeyError(f"Duplicate key: {key}")
+        self._signatures[key] = signature
+        if self._is_empty(signature):
+            return  # e.g. decks with no known cards: never near-duplicates
+        for buckets, band in zip(self._buckets, self._bands(signature)):
+            bucket = buckets.get(band)
+            if bucket is None:
+                buckets[band] = [key]
+            else:
+                bucket.append(key)
+
+    def query(self, signature: tuple[int, ...]) -> set[Hashable]:
+        """Keys of the signatures sharing any bucket with the signature"""
+        candidates = set()
+        if self._is_empty(signature):
+            return candidates
+        for buckets, band in zip(self._buckets, self._bands(signature)):
+            candidates.update(buckets.get(band, ()))
+        return candidates
+
+    def candidate_pairs(self) -> set[tuple[Hashable, Hashable]]:
+        """Pairs of keys sharing any bucket, in order of insertion"""
+        pairs = set()
+        for buckets in self._buckets:
+            for bucket in buckets.values():
+                for i, first in enumerate(bucket):
+                    for second in bucket[i + 1 :]:
+                        pairs.add((first, second))
+        return pairs
+
+    def near_duplicates(
+        self, threshold: Optional[float] = None
+    ) -> list[NearDuplicate]:
+        """Candidate pairs of (estimated) similarity at least `threshold` (the
+        index threshold, by default), most similar first (then in order of
+        insertion)"""
+        if threshold is None:
+            threshold = self.threshold
+        signatures = self._signatures
+        pairs = list()
+        for first, second in self.candidate_pairs():
+            similarity = estimate_similarity(signatures[first], signatures[second])
+            if similarity >= threshold:
+                pairs.append(NearDuplicate(first, second, similarity))
+        order = {key: i for i, key in enumerate(signatures)}
+        pairs.sort(
+            key=lambda pair: (-pair.similarity, order[pair.first], order[pair.second])
+        )
+        return pairs
+
+
+def near_duplicates(
+    decks: Sequence[Deck],
+    threshold: float = 0.8,
+    num_perm: int = DEFAULT_NUM_PERM,
+    bands: int = DEFAULT_BANDS,
+    seed: int = 1,
+) -> list[NearDuplicate]:
+    """Pairs of (indices of) decks of estimated Jaccard similarity at least
+    `threshold`, most similar first. Pairs below the LSH threshold of the
+    `bands` (see LSHIndex.threshold) are likely to be missed."""
+    hasher = MinHasher(num_perm, seed=seed)
+    index = LSHIndex(num_perm, bands)
+    for deck_index, deck in enumerate(decks):
+        index.add(deck_index, hasher.deck_signature(deck))
+    return index.near_duplicates(threshold)
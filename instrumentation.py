@@ -0,0 +1,160 @@
+import json
+from collections import defaultdict
+from time import perf_counter
+from typing import Any, Optional
+
+
+class ParserInstrumentation:
+    """
+    Optional instrumentation of deck list parsing, collecting per-stage wall times
+    and counters from a DeckParser (and, optionally, from its ScryfallDB).
+
+    The very same instance can be shared by the parser and the DB, e.g.:
+
+        instrumentation = ParserInstrumentation(trace=True)
+        cards_db.instrumentation = instrumentation
+        deck_parser = DeckParser(cards_db, instrumentation=instrumentation)
+        deck_parser.parse_card_list(deck_list)
+        print(instrumentation.to_json(indent=2))
+
+    Collected data:
+    - stages: wall time (in seconds) spent in each parsing stage, i.e. line
+      normalisation, card patterns matching, card DB lookups, non-card patterns
+      matching, regrouping of duplicates, and card art harmonisation;
+    - patterns: per card pattern, the number of attempts, hits (i.e. usable matches),
+      and how many times the match eventually resolved the line into a card token;
+    - lookups: DB lookups per query shape (e.g. "name+set"), with time spent
+      and the number of lookups returning no card;
+    - lines: parsed lines per resulting token type (e.g. UNKNOWN_CARD, UNKNOWN_TEXT),
+      or SKIPPED for those producing no token at all;
+    - trace (only in trace mode): one record per parsed line, with the matched card
+      pattern (if any), the resulting token type, and the time spent on the line.
+
+    When no instrumentation is set (the default), parser and DB only pay for
+    a None check on each hook.
+    """
+
+    NORMALISE = "normalise"
+    CARD_PATTERNS = "card_patterns"
+    CARD_LOOKUP = "card_lookup"
+    NON_CARD_PATTERNS = "non_card_patterns"
+    REGROUP = "regroup"
+    HARMONISE = "harmonise"
+
+    STAGES = (
+        NORMALISE,
+        CARD_PATTERNS,
+        CARD_LOOKUP,
+        NON_CARD_PATTERNS,
+        REGROUP,
+        HARMONISE,
+    )
+
+    SKIPPED_LINE = "SKIPPED"
+
+    def __init__(self, trace: bool = False):
+        self._trace_enabled = trace
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard any data collected so far."""
+        self.stage_times: dict[str, float] = dict.fromkeys(self.STAGES, 0.0)
+        self.pattern_attempts: dict[str, int] = defaultdict(int)
+        self.pattern_hits: dict[str, int] = defaultdict(int)
+        self.pattern_resolved: dict[str, int] = defaultdict(int)
+        self.lookup_counts: dict[str, int] = defaultdict(int)
+        self.lookup_times: dict[str, float] = defaultdict(float)
+        self.lookup_misses: dict[str, int] = defaultdict(int)
+        self.line_counts: dict[str, int] = defaultdict(int)
+        self.trace: Optional[list[dict[str, Any]]] = (
+            list() if self._trace_enabled else None
+        )
+        self._line_start = 0.0
+        self._mark = 0.0
+        self._matched_pattern = None
+
+    @property
+    def trace_enabled(self) -> bool:
+        return self._trace_enabled
+
+    # =============
+    # PARSER HOOKS
+    # =============
+
+    def start_line(self) -> None:
+        self._line_start = self._mark = perf_counter()
+        self._matched_pattern = None
+
+    def lap(self, stage: str) -> None:
+        """Account the time elapsed since the last lap (or line start) to stage."""
+        now = perf_counter()
+        self.stage_times[stage] += now - self._mark
+        self._mark = now
+
+    def end_line(self, line: str, token_type_name: Optional[str]) -> None:
+        line_type = token_type_name if token_type_name else self.SKIPPED_LINE
+        self.line_counts[line_type] += 1
+        if self.trace is not None:
+            self.trace.append(
+                {
+                    "line": line,
+                    "pattern": self._matched_pattern,
+                    "token_type": token_type_name,
+                    "seconds": perf_counter() - self._line_start,
+                }
+            )
+
+    def add_stage_time(self, stage: str, elapsed: float) -> None:
+        self.stage_times[stage] += elapsed
+
+    def card_pattern_attempt(self, pattern_name: str, hit: bool) -> None:
+        self.pattern_attempts[pattern_name] += 1
+        if hit:
+            self.pattern_hits[pattern_name] += 1
+
+    def card_pattern_resolved(self, pattern_name: str) -> None:
+        self.pattern_resolved[pattern_name] += 1
+        self._matched_pattern = pattern_name
+
+    # ==========
+    # DB HOOKS
+    # ==========
+
+    def db_lookup(self, query_shape: str, elapsed: float, no_results: int) -> None:
+        self.lookup_counts[query_shape] += 1
+        self.lookup_times[query_shape] += elapsed
+        if not no_results:
+            self.lookup_misses[query_shape] += 1
+
+    # ========
+    # EXPORT
+    # ========
+
+    def to_dict(self) -> dict[str, Any]:
+        stats = {
+            "stages": dict(self.stage_times),
+            "patterns": {
+                name: {
+                    "attempts": attempts,
+                    "hits": self.pattern_hits.get(name, 0),
+                    "resolved": self.pattern_resolved.get(name, 0),
+                }
+                for name, attempts in self.pattern_attempts.items()
+            },
+            "lookups": {
+                shape: {
+                    "count": count,
+                    "seconds": self.lookup_times[shape],
+                    "misses": self.lookup_misses.get(shape, 0),
+                }
+                for shape, count in self.lookup_counts.items()
+            },
+            "lines": dict(self.line_counts),
+        }
+        if self.trace is not None:
+            stats["trace"] = list(self.trace)
+        return stats
+
+    def to_json(self, **kwargs) -> str:
+        """JSON dump of to_dict; keyword arguments are passed through to json.dumps"""
+        return json.dumps(self.to_dict(), **kwargs)
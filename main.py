@@ -4,8 +4,7 @@ from functools import partial
 
 import pyodide.ffi
 
-from deck_parser import DeckParser
-from deck import Deck
+from deck import Deck, DeckSession
 from data import ScryfallDB, SCRYFALL_DEFAULT_CARDS_URL
 from deck_export import DECK_EXPORTERS, export_deck
 from deck_export import (
@@ -69,6 +68,9 @@ GROUPING = {
 }
 
 CARDS_DB = None
+DECK_SESSION = None
+# deck whose messages (and download listeners) are currently rendered, if any
+RENDERED_DECK = None
 
 
 async def init_db(*args):
@@ -87,24 +89,25 @@ async def init_db(*args):
     return CARDS_DB
 
 
+async def init_session() -> DeckSession:
+    global DECK_SESSION
+    if DECK_SESSION is None:
+        DECK_SESSION = DeckSession(cards_db=await init_db())
+    return DECK_SESSION
+
+
 async def parse_deck_list(grouping: str):
-    cards_db = await init_db()
+    global RENDERED_DECK
+    session = await init_session()
 
     optimise_card_art = document.getElementById("optimise_cardlist").checked
-    deck_parser = DeckParser(cards_db=cards_db, optimise_card_art=optimise_card_art)
-
     card_list = document.getElementById("card_list_entry").value
-    card_list = [l.strip() for l in card_list.split("\n")]
 
-    tokens = deck_parser.parse_card_list(card_list)
-    deck = Deck(tokens=tokens)
-    display_tokens = deck.deck_list(grouping=grouping)
-
-    if display_tokens:
-        rows = ""
-        for token in display_tokens:
-            rows += token.to_html
+    # the deck list is parsed (and validated) again only if it changed
+    deck = session.deck(card_list, optimise_card_art=optimise_card_art)
+    rows = deck.deck_list_html(grouping=grouping)
 
+    if rows:
         document.getElementById("card_list_parsed").innerHTML = rows
         document.getElementById("card_list_parsed").style.display = "table"
         document.getElementById("instructions").style.display = "none"
@@ -113,6 +116,9 @@ async def parse_deck_list(grouping: str):
         # call JS function to initialise previews
         initialise_previews()
 
+        if deck is RENDERED_DECK:
+            return  # same deck (e.g. regrouped): messages are already up to date
+
         deck_name_badge = (
             ""
             if not deck.name
@@ -157,8 +163,10 @@ async def parse_deck_list(grouping: str):
 
         document.getElementById("messages").innerHTML = msg
         document.getElementById("col-messages").style.display = "inline"
+        RENDERED_DECK = deck
 
     else:
+        RENDERED_DECK = None  # messages and downloads are hidden
         document.getElementById("card_list_parsed").innerHTML = ""
         document.getElementById("col-messages").style.display = "none"
         document.getElementById("card_list_parsed").style.display = "none"
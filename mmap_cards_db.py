@@ -0,0 +1,490 @@
+"""
+Memory-mapped, read-only cards DB, shared across worker processes.
+
+MmapScryfallDB exposes the very same API of ScryfallDB on a binary file built
+offline (see build_mmap_db), which every process maps in memory (read-only):
+file pages are shared through the OS page cache, and no card is loaded upfront,
+so opening the DB costs (almost) nothing, in any number of worker processes.
+
+File layout (all integers are little-endian):
+- header: magic, format version, section sizes and offsets, DB version;
+- records: one fixed-width record per card (see RECORD), in the same order
+  as the in-memory DB iterates over cards (i.e. in card name trie order).
+  Numeric and enumerated fields are stored as they are, whereas strings are
+  references (offset and length) to the string heap;
+- keys: card name DB entries (see ScryfallDB.make_dbentry) sorted by their
+  UTF-8 bytes, each with the range of its records (for prefix searches);
+- hash table: open addressing (linear probing) table of positions in keys,
+  by CRC32 of the DB entry (for exact searches);
+- sets: set code and name references, of all the sets in the DB;
+- string heap: UTF-8 strings (de-duplicated).
+
+Cards are returned as CardView objects: a Card (sub)class decoding fields
+from the mapped file on access, without copying the file buffer.
+
+The file is built from a JSON cards DB file, e.g.:
+    python mmap_cards_db.py data/premodern_db_compressed.bz data/premodern_db.mmap
+"""
+from argparse import ArgumentParser
+from bisect import bisect_left
+from dataclasses import fields
+from datetime import date, datetime
+import json
+import mmap
+import os
+import struct
+from typing import Iterable, Optional, Sequence
+import zlib
+
+from data import Card, CardImagery, Color, Rarity, ScryfallDB
+
+MAGIC = b"PMCARDS\x00"
+FORMAT_VERSION = 1
+
+# magic, format version, no. of records, keys, hash slots, and sets;
+# offsets of records, keys, hash table, sets, and string heap;
+# DB version (string reference)
+HEADER = struct.Struct("<8sIIIII5QII")
+
+STRING_FIELDS = (
+    "cid",
+    "scryfall_uri",
+    "gatherer_uri",
+    "name",
+    "mana_cost",
+    "type_line",
+    "oracle_text",
+    "legalities",  # JSON encoded
+    "lang",
+    "set_code",
+    "set_name",
+    "set_type",
+    "set_uri",
+    "collector_number",
+    "artist",
+    "frame",
+    "border_color",
+    "border_crop",  # art (imagery) fields
+    "art_crop",
+    "large",
+    "normal",
+    "small",
+)
+ART_FIELDS = ("border_crop", "art_crop", "large", "normal", "small")
+
+# string references (offset, length); then release date (ordinal), cmc,
+# colors and color identity (see encode_colors), rarity, and flags
+RECORD = struct.Struct("<" + "II" * len(STRING_FIELDS) + "IdIIBB")
+NUMERIC_FIELDS_OFFSET = 8 * len(STRING_FIELDS)
+NUMERIC_FIELDS = struct.Struct("<IdIIBB")
+
+KEY = struct.Struct("<IIII")  # DB entry string reference, first record, count
+SLOT = struct.Struct("<I")  # position in keys + 1 (0 for empty slots)
+SET = struct.Struct("<IIII")  # set code, and set name string references
+
+NULL_LENGTH = 0xFFFFFFFF  # length of None string references
+
+FLAG_HAS_FOIL = 1
+FLAG_HAS_ART = 2
+
+# colors are encoded in 32 bits: presence (i.e. not None) flag (bit 31),
+# the number of colors (bits 0-2), and 3 bits per color (in the card order)
+_COLORS_PRESENT = 1 << 31
+
+
+def encode_colors(colors: Optional[list[Color]]) -> int:
+    if colors is None:
+        return 0
+    code = _COLORS_PRESENT | len(colors)
+    for i, color in enumerate(colors):
+        code |= color.value << (3 + 3 * i)
+    return code
+
+
+def decode_colors(code: int) -> Optional[list[Color]]:
+    if not code & _COLORS_PRESENT:
+        return None
+    return [Color((code >> (3 + 3 * i)) & 7) for i in range(code & 7)]
+
+
+def _hash_slot(db_key: bytes, no_slots: int) -> int:
+    return zlib.crc32(db_key) & (no_slots - 1)
+
+
+# =============
+# Build (offline)
+# =============
+
+
+class _StringHeap:
+    def __init__(self):
+        self._refs: dict[str, tuple[int, int]] = dict()
+        self._chunks: list[bytes] = list()
+        self.size = 0
+
+    def ref(self, value: Optional[str]) -> tuple[int, int]:
+        if value is None:
+            return 0, NULL_LENGTH
+        ref = self._refs.get(value)
+        if ref is None:
+            data = value.encode("utf-8")
+            ref = self._refs[value] = (self.size, len(data))
+            self._chunks.append(data)
+            self.size += len(data)
+        return ref
+
+    def to_bytes(self) -> bytes:
+        return b"".join(self._chunks)
+
+
+def _card_strings(card: Card) -> tuple[Optional[str], ...]:
+    values = list()
+    for field_name in STRING_FIELDS:
+        if field_name in ART_FIELDS:
+            values.append(getattr(card.art, field_name) if card.art else None)
+        elif field_name == "legalities":
+            values.append(json.dumps(card.legalities, separators=(",", ":")))
+        else:
+            values.append(getattr(card, field_name))
+    return tuple(values)
+
+
+def build_mmap_db(cards_db: ScryfallDB, db_filepath: str) -> int:
+    """Write all the cards in the DB to a new memory-mappable file, returning
+    the number of cards written. The file is replaced atomically, so processes
+    still mapping the previous file are not affected."""
+    heap = _StringHeap()
+    records = bytearray()
+    key_ranges: dict[str, list[int]] = dict()  # db_key: [first record, count]
+    no_records = 0
+    for card in cards_db.all_cards:
+        db_key = cards_db.make_dbentry(card.name)
+        key_range = key_ranges.setdefault(db_key, [no_records, 0])
+        if key_range[0] + key_range[1] != no_records:
+            raise ValueError(f"Cards of {db_key} are not contiguous in the DB")
+        key_range[1] += 1
+        flags = (FLAG_HAS_FOIL if card.has_foil else 0) | (
+            FLAG_HAS_ART if card.art else 0
+        )
+        records += RECORD.pack(
+            *(n for value in _card_strings(card) for n in heap.ref(value)),
+            date.fromisoformat(card.released_at).toordinal(),
+            card.cmc,
+            encode_colors(card.colors),
+            encode_colors(card.color_identity),
+            card.rarity.value,
+            flags,
+        )
+        no_records += 1
+
+    sorted_keys = sorted(key_ranges, key=lambda k: k.encode("utf-8"))
+    keys = bytearray()
+    for db_key in sorted_keys:
+        keys += KEY.pack(*heap.ref(db_key), *key_ranges[db_key])
+
+    no_slots = 1
+    while no_slots < 2 * len(sorted_keys):
+        no_slots *= 2
+    slots = [0] * no_slots
+    for position, db_key in enumerate(sorted_keys):
+        slot = _hash_slot(db_key.encode("utf-8"), no_slots)
+        while slots[slot]:
+            slot = (slot + 1) & (no_slots - 1)
+        slots[slot] = position + 1
+    hash_table = b"".join(SLOT.pack(s) for s in slots)
+
+    mtg_sets = sorted(cards_db.mtg_sets_map.items())
+    sets = b"".join(
+        SET.pack(*heap.ref(set_code), *heap.ref(set_name))
+        for set_code, set_name in mtg_sets
+    )
+    version_ref = heap.ref(cards_db.version)
+
+    records_offset = HEADER.size
+    keys_offset = records_offset + len(records)
+    slots_offset = keys_offset + len(keys)
+    sets_offset = slots_offset + len(hash_table)
+    heap_offset = sets_offset + len(sets)
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        no_records,
+        len(sorted_keys),
+        no_slots,
+        len(mtg_sets),
+        records_offset,
+        keys_offset,
+        slots_offset,
+        sets_offset,
+        heap_offset,
+        *version_ref,
+    )
+    tmp_filepath = f"{db_filepath}.{os.getpid()}.tmp"
+    with open(tmp_filepath, "wb") as db_file:
+        for section in (header, records, keys, hash_table, sets, heap.to_bytes()):
+            db_file.write(section)
+    os.replace(tmp_filepath, db_filepath)
+    return no_records
+
+
+# =====
+# Views
+# =====
+
+
+def _string_property(index: int) -> property:
+    def getter(self: "CardView") -> Optional[str]:
+        return self._store.string_at(self._offset + 8 * index)
+
+    return property(getter)
+
+
+class CardView(Card):
+    """Card whose fields are decoded on access from a memory-mapped record.
+    Views are read-only, and equal to each other if they refer to the same record."""
+
+    __slots__ = ("_store", "_offset")
+
+    def __init__(self, store: "MmapScryfallDB", offset: int):
+        self._store = store
+        self._offset = offset
+
+    def _numeric_fields(self) -> tuple:
+        return NUMERIC_FIELDS.unpack_from(
+            self._store.buffer, self._offset + NUMERIC_FIELDS_OFFSET
+        )
+
+    @property
+    def released_at(self) -> str:
+        return date.fromordinal(self._numeric_fields()[0]).isoformat()
+
+    @property
+    def release_date(self) -> datetime:
+        return datetime.fromordinal(self._numeric_fields()[0])
+
+    @property
+    def cmc(self) -> float:
+        return self._numeric_fields()[1]
+
+    @property
+    def colors(self) -> Optional[list[Color]]:
+        return decode_colors(self._numeric_fields()[2])
+
+    @property
+    def color_identity(self) -> Optional[list[Color]]:
+        return decode_colors(self._numeric_fields()[3])
+
+    @property
+    def rarity(self) -> Rarity:
+        return Rarity(self._numeric_fields()[4])
+
+    @property
+    def has_foil(self) -> bool:
+        return bool(self._numeric_fields()[5] & FLAG_HAS_FOIL)
+
+    @property
+    def legalities(self) -> dict[str, str]:
+        return json.loads(self._store.string_at(self._offset + 8 * _LEGALITIES))
+
+    @property
+    def art(self) -> Optional[CardImagery]:
+        if not self._numeric_fields()[5] & FLAG_HAS_ART:
+            return None
+        return CardImagery(
+            *(
+                self._store.string_at(self._offset + 8 * STRING_FIELDS.index(f))
+                for f in ART_FIELDS
+            )
+        )
+
+    def __eq__(self, other):
+        if isinstance(other, CardView) and other._store is self._store:
+            return other._offset == self._offset
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def to_json(self):
+        json_repr = {}
+        for card_field in fields(Card):
+            if not card_field.init:
+                continue  # i.e. release_date
+            field_value = getattr(self, card_field.name)
+            if field_value is None:
+                continue
+            if card_field.name in ("colors", "color_identity"):
+                field_value = [c.to_json() for c in field_value]
+            elif card_field.name in ("art", "rarity"):
+                field_value = field_value.to_json()
+            json_repr[card_field.name] = field_value
+        return json_repr
+
+
+for _index, _field_name in enumerate(STRING_FIELDS):
+    if _field_name not in ART_FIELDS and _field_name != "legalities":
+        setattr(CardView, _field_name, _string_property(_index))
+_LEGALITIES = STRING_FIELDS.index("legalities")
+
+
+# =======
+# Cards DB
+# =======
+
+
+class _SortedKeys(Sequence[bytes]):
+    """DB entries (as UTF-8 bytes) in the keys section, for bisection"""
+
+    def __init__(self, store: "MmapScryfallDB"):
+        self._store = store
+
+    def __len__(self) -> int:
+        return self._store.no_keys
+
+    def __getitem__(self, position: int) -> bytes:
+        key_offset, key_length, _, _ = self._store.key_at(position)
+        return self._store.bytes_at(key_offset, key_length)
+
+
+class MmapScryfallDB(ScryfallDB):
+    """ScryfallDB on a memory-mapped file (see build_mmap_db).
+
+    The mapping is inherited by forked processes, which therefore share the
+    very same (physical) memory pages of the file."""
+
+    def __init__(self, db_filepath: str, **kwargs):
+        self._db_filepath = db_filepath
+        with open(db_filepath, "rb") as db_file:
+            self.buffer = mmap.mmap(db_file.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            format_version,
+            self.no_records,
+            self.no_keys,
+            self._no_slots,
+            self._no_sets,
+            self._records_offset,
+            self._keys_offset,
+            self._slots_offset,
+            self._sets_offset,
+            self._heap_offset,
+            *version_ref,
+        ) = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported cards DB file: {db_filepath}")
+        self._sorted_keys = _SortedKeys(self)
+        super().__init__(json_db=(), **kwargs)
+        self._version = self.bytes_at(*version_ref).decode("utf-8")
+
+    @classmethod
+    def from_file(cls, db_filepath: str, **kwargs) -> "MmapScryfallDB":
+        return cls(db_filepath, **kwargs)
+
+    # ================
+    # Buffer decoding
+    # ================
+
+    def bytes_at(self, heap_offset: int, length: int) -> bytes:
+        start = self._heap_offset + heap_offset
+        return self.buffer[start : start + length]
+
+    def string_at(self, ref_offset: int) -> Optional[str]:
+        heap_offset, length = struct.unpack_from("<II", self.buffer, ref_offset)
+        if length == NULL_LENGTH:
+            return None
+        start = self._heap_offset + heap_offset
+        return str(memoryview(self.buffer)[start : start + length], "utf-8")
+
+    def key_at(self, position: int) -> tuple[int, int, int, int]:
+        return KEY.unpack_from(self.buffer, self._keys_offset + KEY.size * position)
+
+    def _views(self, first: int, count: int) -> tuple[CardView, ...]:
+        start = self._records_offset + RECORD.size * first
+        return tuple(
+            CardView(self, start + RECORD.size * i) for i in range(count)
+        )
+
+    # ==============
+    # Cards storage
+    # ==============
+
+    def _load_cards_from_db(self):
+        pass  # cards are decoded on access
+
+    def _cards_for_entry(self, db_key: str) -> Sequence[Card]:
+        key = db_key.encode("utf-8")
+        slot = _hash_slot(key, self._no_slots)
+        while True:
+            (position,) = SLOT.unpack_from(
+                self.buffer, self._slots_offset + SLOT.size * slot
+            )
+            if not position:
+                return tuple()
+            key_offset, key_length, first, count = self.key_at(position - 1)
+            if key_length == len(key) and self.bytes_at(key_offset, key_length) == key:
+                return self._views(first, count)
+            slot = (slot + 1) & (self._no_slots - 1)
+
+    def _cards_with_prefix(self, db_key_prefix: str) -> Iterable[Card]:
+        prefix = db_key_prefix.encode("utf-8")
+        position = bisect_left(self._sorted_keys, prefix)
+        ranges = list()
+        while position < self.no_keys and self._sorted_keys[position].startswith(
+            prefix
+        ):
+            ranges.append(self.key_at(position)[2:])
+            position += 1
+        ranges.sort()  # in records (i.e. card name trie) order
+        return [card for first, count in ranges for card in self._views(first, count)]
+
+    def card_by_id(self, cid: str) -> Optional[Card]:
+        # card IDs are not indexed in the file: the index of record offsets
+        # is built (per process) on first use
+        if self._cards_by_id is None:
+            self._cards_by_id = {
+                self.string_at(offset): offset
+                for offset in range(
+                    self._records_offset,
+                    self._records_offset + RECORD.size * self.no_records,
+                    RECORD.size,
+                )
+            }
+        offset = self._cards_by_id.get(cid)
+        return CardView(self, offset) if offset is not None else None
+
+    def __len__(self) -> int:
+        return self.no_records
+
+    @property
+    def all_cards(self) -> Iterable[Card]:
+        for offset in range(
+            self._records_offset,
+            self._records_offset + RECORD.size * self.no_records,
+            RECORD.size,
+        ):
+            yield CardView(self, offset)
+
+    def _init_mtg_sets_map(self) -> dict[str, str]:
+        mtg_sets = dict()
+        for index in range(self._no_sets):
+            offset = self._sets_offset + SET.size * index
+            mtg_sets[self.string_at(offset)] = self.string_at(offset + 8)
+        return mtg_sets
+
+    @property
+    def version(self) -> str:
+        return self._version
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(
+        description="Convert a (JSON, or bz2-compressed JSON) cards DB file "
+        "to a memory-mappable cards DB file."
+    )
+    parser.add_argument("json_db_filepath", help="Input cards DB file")
+    parser.add_argument("mmap_db_filepath", help="Output cards DB file")
+    args = parser.parse_args()
+
+    written = build_mmap_db(
+        ScryfallDB.from_file(args.json_db_filepath), args.mmap_db_filepath
+    )
+    print(f"{written} cards written to {args.mmap_db_filepath}")
@@ -0,0 +1,329 @@
+"""
+Persistent, content-addressed cache of parsed and validated deck lists (on SQLite).
+
+Entries are keyed by a hash of the normalised deck list text, along with the cards
+DB version (see ScryfallDB.version) and the parser options affecting the outcome
+(i.e. card art harmonisation, preferred sets, banned and restricted lists).
+Therefore, resubmitting the same list (even with different line endings, trailing
+spaces or extra blank lines) is a hit, whereas any update to the cards DB
+automatically invalidates all the entries computed against the previous version.
+
+The cache is bounded in size: least recently used entries are evicted first.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Iterable, Optional, Union
+
+from deck import Deck
+from deck_formats import FormatProfile
+from deck_parser import DeckParser, ParseResult, Token, TokenType
+from deck_parser import MAIN_DECK, SIDEBOARD
+
+DECK_SECTIONS = {MAIN_DECK.name: MAIN_DECK, SIDEBOARD.name: SIDEBOARD}
+
+
+@dataclass
+class CachedDeck:
+    """Parsed tokens of a deck list, along with its validation report (i.e. error,
+    warning, and unknown card messages)"""
+
+    tokens: ParseResult
+    errors: list[str]
+    warnings: list[str]
+    unknown_cards: list[str]
+    cache_hit: bool = False
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.errors
+
+
+class ResultCache:
+    """SQLite-backed cache of CachedDeck entries, bounded to `max_bytes` of payload.
+
+    The cache can be shared by multiple processes: each process opens its own
+    connection (lazily), and SQLite takes care of concurrent writes.
+    """
+
+    SCHEMA_VERSION = 3
+
+    def __init__(self, db_filepath: str, max_bytes: int = 64 * 1024 * 1024):
+        self._db_filepath = db_filepath
+        self._max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self._purged_versions: set[str] = set()
+        # running total of payloads size (re-synced from the DB before evicting,
+        # as other processes may be sharing the cache)
+        self._total_size = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ==========
+    # CACHE KEYS
+    # ==========
+
+    @staticmethod
+    def normalise_decklist(decklist: Union[str, Iterable[str]]) -> str:
+        """Normalise the deck list text, with no effect on parsing: line endings
+        and trailing whitespace are dropped, as well as leading and trailing
+        empty lines, and consecutive empty lines are collapsed into one.
+
+        Whitespace-only lines are kept apart from empty lines, as the parser skips
+        the former, whereas the latter may separate the Sideboard (see
+        DeckParser.parse_lines): e.g.
+
+            >>> normalise = ResultCache.normalise_decklist
+            >>> normalise(["60 Island", "   ", "4 Duress"]).splitlines()
+            ['60 Island', ' ', '4 Duress']
+            >>> normalise(["60 Island", "", "4 Duress"]).splitlines()
+            ['60 Island', '', '4 Duress']
+        """
+        if isinstance(decklist, str):
+            decklist = decklist.splitlines()
+        lines = list()
+        for line in decklist:
+            line = line.rstrip("\r\n")
+            if line and not line.strip():
+                lines.append(" ")  # whitespace-only line
+                continue
+            line = line.rstrip()
+            if not line and (not lines or not lines[-1]):
+                continue
+            lines.append(line)
+        if lines and not lines[-1]:
+            lines.pop()
+        return "\n".join(lines)
+
+    def cache_key(
+        self,
+        deck_parser: DeckParser,
+        decklist: Union[str, Iterable[str]],
+        profile: Optional[FormatProfile] = None,
+    ) -> str:
+        cards_db = deck_parser.cards_db
+        options = [
+            self.SCHEMA_VERSION,
+            deck_parser.optimise_card_art,
+            sorted(cards_db.preferred_sets),
+            sorted(cards_db.banned_list),
+            sorted(cards_db.restricted_list),
+        ]
+        if profile is not None:
+            options.append(profile.to_json())
+        options = json.dumps(options, sort_keys=True)
+        digest = hashlib.sha256()
+        digest.update(cards_db.version.encode())
+        digest.update(options.encode())
+        digest.update(self.normalise_decklist(decklist).encode("utf-8"))
+        return digest.hexdigest()
+
+    # =======
+    # STORAGE
+    # =======
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        # connections must not be shared with forked processes
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self._db_filepath, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, db_version TEXT NOT NULL, "
+                "payload BLOB NOT NULL, size INTEGER NOT NULL, "
+                "last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_last_access "
+                "ON entries (last_access)"
+            )
+            conn.commit()
+            self._conn = conn
+            self._conn_pid = os.getpid()
+            self._total_size = self._stored_size(conn)
+        return self._conn
+
+    def _purge_stale_versions(self, db_version: str) -> None:
+        """Drop all the entries computed against any other cards DB version"""
+        if db_version in self._purged_versions:
+            return
+        conn = self._connection
+        with conn:
+            conn.execute("DELETE FROM entries WHERE db_version != ?", (db_version,))
+        self._purged_versions.add(db_version)
+        self._total_size = self._stored_size(conn)
+
+    def _get_payload(self, key: str) -> Optional[bytes]:
+        conn = self._connection
+        row = conn.execute(
+            "SELECT payload FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        with conn:
+            conn.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+        return row[0]
+
+    def _put_payload(self, key: str, db_version: str, payload: bytes) -> None:
+        conn = self._connection
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, db_version, payload, len(payload), time.time()),
+            )
+            self._total_size += len(payload)
+            if self._total_size > self._max_bytes:
+                self._evict(conn)
+
+    @staticmethod
+    def _stored_size(conn: sqlite3.Connection) -> int:
+        query = "SELECT COALESCE(SUM(size), 0) FROM entries"
+        return conn.execute(query).fetchone()[0]
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Evict least recently used entries, until within the size bound"""
+        total_size = self._stored_size(conn)
+        self._total_size = total_size
+        if total_size <= self._max_bytes:
+            return
+        to_free = total_size - self._max_bytes
+        freed = 0
+        evicted = list()
+        for key, size in conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_access"
+        ):
+            evicted.append((key,))
+            freed += size
+            if freed >= to_free:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        self._total_size -= freed
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def clear(self) -> None:
+        conn = self._connection
+        with conn:
+            conn.execute("DELETE FROM entries")
+        self._total_size = 0
+
+    def close(self) -> None:
+        if self._conn is not None and self._conn_pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+    # =============
+    # SERIALISATION
+    # =============
+
+    @staticmethod
+    def _serialise(cached_deck: CachedDeck) -> bytes:
+        tokens = list()
+        for token in cached_deck.tokens:
+            card = token.card
+            tokens.append(
+                [
+                    token.token_type.name,
+                    token.quantity,
+                    token.text if card is None else None,
+                    token.deck_section.name if token.deck_section else None,
+                    token.is_foil,
+                    token.card_request_has_setcode,
+                    card and card.cid,
+                ]
+            )
+        payload = {
+            "tokens": tokens,
+            "errors": cached_deck.errors,
+            "warnings": cached_deck.warnings,
+            "unknown_cards": cached_deck.unknown_cards,
+        }
+        return zlib.compress(json.dumps(payload).encode("utf-8"), 1)
+
+    @staticmethod
+    def _deserialise(payload: bytes, deck_parser: DeckParser) -> Optional[CachedDeck]:
+        cards_db = deck_parser.cards_db
+        data = json.loads(zlib.decompress(payload))
+        tokens = list()
+        for entry in data["tokens"]:
+            token_type, quantity, text, section, is_foil, has_setcode, cid = entry
+            card = None
+            if cid is not None:
+                card = cards_db.card_by_id(cid)
+                if card is None:
+                    return None  # stale entry: treated as a miss
+            tokens.append(
+                Token(
+                    token_type=TokenType[token_type],
+                    quantity=quantity,
+                    text=text,
+                    card=card,
+                    is_foil=is_foil,
+                    deck_section=DECK_SECTIONS.get(section),
+                    card_request_has_setcode=has_setcode,
+                )
+            )
+        return CachedDeck(
+            tokens=ParseResult.from_tokens(tokens),
+            errors=data["errors"],
+            warnings=data["warnings"],
+            unknown_cards=data["unknown_cards"],
+            cache_hit=True,
+        )
+
+    # ===
+    # API
+    # ===
+
+    def get(
+        self,
+        deck_parser: DeckParser,
+        decklist: Union[str, Iterable[str]],
+        profile: Optional[FormatProfile] = None,
+    ) -> Optional[CachedDeck]:
+        """Return the parsed and validated deck list from the cache, if any"""
+        self._purge_stale_versions(deck_parser.cards_db.version)
+        payload = self._get_payload(self.cache_key(deck_parser, decklist, profile))
+        return self._deserialise(payload, deck_parser) if payload else None
+
+    def parse_and_validate(
+        self,
+        deck_parser: DeckParser,
+        decklist: Union[str, Iterable[str]],
+        profile: Optional[FormatProfile] = None,
+    ) -> CachedDeck:
+        """Return the parsed and validated deck list from the cache, if any.
+        Otherwise, parse and validate the deck list (according to the format
+        profile, if any: see Deck.validate), and store the result."""
+        if not isinstance(decklist, str):
+            decklist = list(decklist)
+        db_version = deck_parser.cards_db.version
+        self._purge_stale_versions(db_version)
+        key = self.cache_key(deck_parser, decklist, profile)
+        payload = self._get_payload(key)
+        cached_deck = self._deserialise(payload, deck_parser) if payload else None
+        if cached_deck is not None:
+            self.hits += 1
+            return cached_deck
+
+        self.misses += 1
+        tokens = deck_parser.parse_card_list(decklist)
+        errors, warnings, unknown_cards = Deck(tokens).validate(profile)
+        cached_deck = CachedDeck(
+            tokens=tokens,
+            errors=[str(e) for e in errors],
+            warnings=[str(w) for w in warnings],
+            unknown_cards=[str(u) for u in unknown_cards],
+        )
+        self._put_payload(key, db_version, self._serialise(cached_deck))
+        return cached_deck
@@ -0,0 +1,502 @@
+"""
+Long-running deck checking HTTP service, built on the standard library only
+(asyncio for the HTTP front-end, and a process pool for parsing).
+
+The cards DB is loaded once and kept warm in memory by the worker processes.
+Parsing is CPU-bound, therefore it never runs on the event loop: requests are
+queued, grouped into small batches (i.e. requests arriving within a short time
+window), and each batch is processed by a worker process in one go.
+
+Endpoints (JSON in, JSON out):
+    GET  /health     service status and counters
+    POST /parse      {"decklist": "..."} -> parsed tokens
+    POST /validate   {"decklist": "..."} -> validation report (as in cli.py)
+    POST /export     {"decklist": "...", "format": "mtg_arena"} -> report w/ export
+
+Backpressure: at most `max_pending` requests can wait for a worker. Any request
+beyond that is rejected straight away with "503 Service Unavailable", and
+a Retry-After header. Requests with bodies larger than `max_body_bytes`, or
+deck lists longer than `max_lines` are rejected with "413 Payload Too Large".
+
+Usage:
+    python service.py --port 8080 --workers 4
+"""
+from argparse import ArgumentParser, BooleanOptionalAction
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import json
+import multiprocessing
+import os
+from typing import Optional
+
+from cli import DEFAULT_DB_FILEPATH, DeckListProcessor, load_cards_db
+from data import ScryfallDB
+from deck_export import DECK_EXPORTERS
+from deck_parser import DeckParser
+
+PARSE = "parse"
+VALIDATE = "validate"
+EXPORT = "export"
+
+ACTIONS = (PARSE, VALIDATE, EXPORT)
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    422: "Unprocessable Entity",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    501: "Not Implemented",
+    503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[dict] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or dict()
+
+
+@dataclass
+class ServiceLimits:
+    max_body_bytes: int = 256 * 1024
+    max_lines: int = 1000
+    max_pending: int = 256
+    max_headers: int = 64
+    keep_alive_timeout: float = 15.0
+
+
+@dataclass
+class Job:
+    action: str
+    decklist: str
+    export_format: Optional[str] = None
+
+
+# ===========
+# WORKER SIDE
+# ===========
+
+
+class DeckWorker:
+    """Runs batches of jobs, in a worker process."""
+
+    def __init__(self, deck_parser: DeckParser, cards_db: ScryfallDB):
+        self._deck_parser = deck_parser
+        self._cards_db = cards_db
+        self._processors: dict[Optional[str], DeckListProcessor] = {
+            None: DeckListProcessor(deck_parser)
+        }
+
+    def _processor(self, export_format: Optional[str]) -> DeckListProcessor:
+        if export_format not in self._processors:
+            exporter = DECK_EXPORTERS[export_format](self._cards_db)
+            self._processors[export_format] = DeckListProcessor(
+                self._deck_parser, exporter
+            )
+        return self._processors[export_format]
+
+    def run(self, job: Job) -> dict:
+        lines = job.decklist.splitlines()
+        if job.action == PARSE:
+            try:
+                tokens = self._deck_parser.parse_card_list(lines)
+            except Exception as e:
+                return {"error": f"{type(e).__name__}: {e}"}
+            return {
+                "deck_name": tokens.deck_name,
+                "tokens": [token.to_json() for token in tokens],
+            }
+        return self._processor(job.export_format).process((dict(), lines))
+
+    def run_batch(self, jobs: list[Job]) -> list[dict]:
+        return [self.run(job) for job in jobs]
+
+
+_WORKER: Optional[DeckWorker] = None
+
+
+def _init_worker(worker: DeckWorker) -> None:
+    global _WORKER
+    _WORKER = worker
+
+
+def _run_batch_in_worker(jobs: list[Job]) -> list[dict]:
+    return _WORKER.run_batch(jobs)
+
+
+def _worker_ready() -> bool:
+    return _WORKER is not None
+
+
+# ================
+# EVENT LOOP SIDE
+# ================
+
+
+@dataclass
+class ServiceStats:
+    served: int = 0
+    rejected: int = 0
+    batches: int = 0
+    batched_jobs: int = 0
+
+
+class RequestBatcher:
+    """Groups jobs submitted within `batch_window` seconds (up to `max_batch_size`)
+    into a single call to the process pool, with at most `max_in_flight` batches
+    being processed at any time. Jobs wait in a bounded queue: when that is full,
+    submitting a job raises asyncio.QueueFull."""
+
+    def __init__(
+        self,
+        executor: ProcessPoolExecutor,
+        max_batch_size: int = 16,
+        batch_window: float = 0.005,
+        max_pending: int = 256,
+        max_in_flight: int = 1,
+        stats: Optional[ServiceStats] = None,
+    ):
+        self._executor = executor
+        self._max_batch_size = max(1, max_batch_size)
+        self._batch_window = batch_window
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._in_flight = asyncio.Semaphore(max(1, max_in_flight))
+        self._stats = stats if stats is not None else ServiceStats()
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, job: Job) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((job, future))
+        return future
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # wait for a free worker first, so that jobs keep piling up
+            # in the queue (and batches grow) while all workers are busy
+            await self._in_flight.acquire()
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._batch_window
+            while len(batch) < self._max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = asyncio.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: list[tuple[Job, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self._executor, _run_batch_in_worker, [job for job, _ in batch]
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            self._stats.batches += 1
+            self._stats.batched_jobs += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._in_flight.release()
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+    @property
+    def keep_alive(self) -> bool:
+        return self.headers.get("connection", "").lower() != "close"
+
+
+class DeckService:
+    """HTTP/1.1 front-end (with keep-alive) of the deck checking service"""
+
+    def __init__(
+        self,
+        batcher: RequestBatcher,
+        limits: Optional[ServiceLimits] = None,
+        stats: Optional[ServiceStats] = None,
+    ):
+        self._batcher = batcher
+        self._limits = limits or ServiceLimits()
+        self._stats = stats if stats is not None else ServiceStats()
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(
+                        self._read_request(reader), self._limits.keep_alive_timeout
+                    )
+                except HTTPError as e:
+                    await self._write_response(
+                        writer, e.status, {"error": str(e)}, False, e.headers
+                    )
+                    break
+                if request is None:
+                    break
+                try:
+                    status, payload = await self._route(request)
+                    headers = dict()
+                except HTTPError as e:
+                    status, payload, headers = e.status, {"error": str(e)}, e.headers
+                await self._write_response(
+                    writer, status, payload, request.keep_alive, headers
+                )
+                if not request.keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        try:
+            request_line = await reader.readline()
+        except (asyncio.LimitOverrunError, ValueError):
+            raise HTTPError(431, "Request line too long")
+        if not request_line:
+            return None  # connection closed by the client
+        try:
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+
+        headers = dict()
+        while True:
+            try:
+                header_line = await reader.readline()
+            except (asyncio.LimitOverrunError, ValueError):
+                raise HTTPError(431, "Header line too long")
+            header_line = header_line.decode("latin-1").rstrip("\r\n")
+            if not header_line:
+                break
+            if len(headers) >= self._limits.max_headers:
+                raise HTTPError(431, "Too many headers")
+            name, _, value = header_line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "transfer-encoding" in headers:
+            raise HTTPError(501, "Transfer encodings are not supported")
+        body = b""
+        if method == "POST":
+            if "content-length" not in headers:
+                raise HTTPError(411, "Content-Length is required")
+            try:
+                content_length = int(headers["content-length"])
+            except ValueError:
+                raise HTTPError(400, "Invalid Content-Length")
+            if content_length < 0:
+                raise HTTPError(400, "Invalid Content-Length")
+            if content_length > self._limits.max_body_bytes:
+                raise HTTPError(
+                    413, f"Request body exceeds {self._limits.max_body_bytes} bytes"
+                )
+            body = await reader.readexactly(content_length)
+        path = path.split("?", 1)[0]
+        return Request(method=method, path=path, headers=headers, body=body)
+
+    async def _route(self, request: Request) -> tuple[int, dict]:
+        action = request.path.strip("/")
+        if action == "health":
+            return 200, {
+                "status": "ok",
+                "pending": self._batcher.pending,
+                "served": self._stats.served,
+                "rejected": self._stats.rejected,
+                "batches": self._stats.batches,
+                "batched_jobs": self._stats.batched_jobs,
+            }
+        if action not in ACTIONS:
+            raise HTTPError(404, f"Unknown endpoint: {request.path}")
+        if request.method != "POST":
+            raise HTTPError(405, "Only POST requests are supported")
+
+        job = self._parse_job(action, request.body)
+        try:
+            future = self._batcher.submit(job)
+        except asyncio.QueueFull:
+            self._stats.rejected += 1
+            raise HTTPError(503, "Too many pending requests", {"Retry-After": "1"})
+        try:
+            result = await future
+        except Exception as e:
+            raise HTTPError(500, f"{type(e).__name__}: {e}")
+        self._stats.served += 1
+        return (422 if "error" in result else 200), result
+
+    def _parse_job(self, action: str, body: bytes) -> Job:
+        try:
+            payload = json.loads(body)
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise HTTPError(400, "Request body must be a JSON object")
+        if not isinstance(payload, dict) or not isinstance(
+            payload.get("decklist"), str
+        ):
+            raise HTTPError(400, 'Missing "decklist" text in request')
+
+        decklist = payload["decklist"]
+        # lines as split by the parser (i.e. a trailing line break adds no line)
+        if len(decklist.splitlines()) > self._limits.max_lines:
+            raise HTTPError(413, f"Deck list exceeds {self._limits.max_lines} lines")
+        export_format = payload.get("format")
+        if action == EXPORT and export_format not in DECK_EXPORTERS:
+            raise HTTPError(
+                400, f"Unknown export format; choose among {sorted(DECK_EXPORTERS)}"
+            )
+        return Job(
+            action=action,
+            decklist=decklist,
+            export_format=export_format if action == EXPORT else None,
+        )
+
+    @staticmethod
+    async def _write_response(
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: dict,
+        keep_alive: bool,
+        headers: Optional[dict] = None,
+    ) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        head = [
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        head.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+def create_executor(worker: DeckWorker, workers: int) -> ProcessPoolExecutor:
+    """Process pool whose workers (forked whenever the platform allows it)
+    inherit the already loaded cards DB."""
+    if "fork" in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context("fork")
+    else:
+        mp_context = multiprocessing.get_context()
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(worker,),
+    )
+
+
+async def start_service(
+    worker: DeckWorker,
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    workers: int = 1,
+    max_batch_size: int = 16,
+    batch_window: float = 0.005,
+    limits: Optional[ServiceLimits] = None,
+) -> tuple[asyncio.AbstractServer, asyncio.Task, ProcessPoolExecutor]:
+    """Start the service on the running event loop: return the server,
+    the batching task, and the process pool (to be shut down by the caller)"""
+    limits = limits or ServiceLimits()
+    executor = create_executor(worker, workers)
+    # start the worker processes before any socket is opened: forked workers
+    # would otherwise hold a copy of the sockets, and keep connections open
+    await asyncio.get_running_loop().run_in_executor(executor, _worker_ready)
+    stats = ServiceStats()
+    batcher = RequestBatcher(
+        executor,
+        max_batch_size=max_batch_size,
+        batch_window=batch_window,
+        max_pending=limits.max_pending,
+        max_in_flight=workers,
+        stats=stats,
+    )
+    service = DeckService(batcher, limits, stats)
+    batcher_task = asyncio.create_task(batcher.run())
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    return server, batcher_task, executor
+
+
+async def serve(worker: DeckWorker, **kwargs) -> None:
+    server, batcher_task, executor = await start_service(worker, **kwargs)
+    address = ", ".join(str(s.getsockname()) for s in server.sockets)
+    print(f"Deck service listening on {address}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batcher_task.cancel()
+        executor.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Deck checking HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--db", default=DEFAULT_DB_FILEPATH, dest="db_filepath")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=16, dest="max_batch_size")
+    parser.add_argument(
+        "--batch-window-ms", type=float, default=5.0, dest="batch_window_ms"
+    )
+    parser.add_argument("--max-pending", type=int, default=256, dest="max_pending")
+    parser.add_argument(
+        "--max-body-bytes", type=int, default=256 * 1024, dest="max_body_bytes"
+    )
+    parser.add_argument("--max-lines", type=int, default=1000, dest="max_lines")
+    parser.add_argument(
+        "--optimise-card-art",
+        default=False,
+        action=BooleanOptionalAction,
+        dest="optimise_card_art",
+    )
+    args = parser.parse_args()
+
+    cards_db = load_cards_db(args.db_filepath)
+    deck_parser = DeckParser(cards_db, optimise_card_art=args.optimise_card_art)
+    try:
+        asyncio.run(
+            serve(
+                DeckWorker(deck_parser, cards_db),
+                host=args.host,
+                port=args.port,
+                workers=args.workers,
+                max_batch_size=args.max_batch_size,
+                batch_window=args.batch_window_ms / 1000,
+                limits=ServiceLimits(
+                    max_body_bytes=args.max_body_bytes,
+                    max_lines=args.max_lines,
+                    max_pending=args.max_pending,
+                ),
+            )
+        )
+    except KeyboardInterrupt:
+        pass
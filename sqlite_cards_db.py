@@ -0,0 +1,213 @@
+"""
+SQLite-backed cards DB, for low-memory (server) deployments.
+
+SQLiteScryfallDB exposes the very same API of ScryfallDB (i.e. lookup, __contains__,
+has_set, in_banned_list, mtg_sets_map...) on an indexed SQLite file, rather than
+holding all the cards in memory: cards are loaded on lookup, and only the most
+recently looked up ones are kept in memory (in a small LRU cache).
+
+The SQLite file is built (offline) from a JSON cards DB file, e.g.:
+    python sqlite_cards_db.py data/premodern_db_compressed.bz data/premodern_db.sqlite
+or directly when extracting the Premodern cards (see data/create_premodern_db.py).
+"""
+from argparse import ArgumentParser
+from collections import OrderedDict
+from itertools import groupby
+import json
+import os
+import sqlite3
+from typing import Iterable, Optional, Sequence
+
+from data import Card, ScryfallDB
+
+SCHEMA_VERSION = 2
+
+# Card rows are stored in the same order as the in-memory DB iterates over them
+# (i.e. in card name trie order), so that both return equal results (and ties)
+# on any lookup, including prefix searches.
+_SCHEMA = (
+    "CREATE TABLE cards ("
+    "db_key TEXT NOT NULL, cid TEXT NOT NULL, set_code TEXT NOT NULL, "
+    "collector_number TEXT NOT NULL, card TEXT NOT NULL)",
+    "CREATE INDEX cards_db_key ON cards (db_key)",
+    "CREATE INDEX cards_cid ON cards (cid)",
+    "CREATE TABLE sets (set_code TEXT PRIMARY KEY, set_name TEXT NOT NULL)",
+    "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+)
+
+# (Constant) queries, so that sqlite3 re-uses their prepared statements
+_SELECT_BY_DB_KEY = "SELECT card FROM cards WHERE db_key = ? ORDER BY rowid"
+_SELECT_BY_PREFIX = (
+    "SELECT db_key, card FROM cards WHERE db_key >= ? AND db_key < ? ORDER BY rowid"
+)
+_SELECT_DB_KEY_BY_CID = "SELECT db_key FROM cards WHERE cid = ?"
+_SELECT_ALL = "SELECT card FROM cards ORDER BY rowid"
+_SELECT_COUNT = "SELECT COUNT(*) FROM cards"
+_SELECT_SETS = "SELECT set_code, set_name FROM sets"
+_SELECT_META = "SELECT value FROM meta WHERE key = ?"
+
+# upper bound (exclusive) of DB entries sharing a prefix
+_MAX_CHAR = "\U0010ffff"
+
+
+def build_sqlite_db(cards_db: ScryfallDB, db_filepath: str) -> int:
+    """Write all the cards in the DB to a new SQLite file (replacing any existing
+    one), returning the number of cards written."""
+    if os.path.exists(db_filepath):
+        os.remove(db_filepath)
+    conn = sqlite3.connect(db_filepath)
+    try:
+        with conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            conn.executemany(
+                "INSERT INTO cards VALUES (?, ?, ?, ?, ?)",
+                (
+                    (
+                        cards_db.make_dbentry(card.name),
+                        card.cid,
+                        card.set_code,
+                        card.collector_number,
+                        json.dumps(card.to_json(), separators=(",", ":")),
+                    )
+                    for card in cards_db.all_cards
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO sets VALUES (?, ?)", sorted(cards_db.mtg_sets_map.items())
+            )
+            conn.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                (
+                    ("schema_version", str(SCHEMA_VERSION)),
+                    ("version", cards_db.version),
+                ),
+            )
+        no_cards = conn.execute(_SELECT_COUNT).fetchone()[0]
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    return no_cards
+
+
+class SQLiteScryfallDB(ScryfallDB):
+    """ScryfallDB on a SQLite file (see build_sqlite_db), keeping in memory only
+    the cards of (up to) `cache_size` card names, the most recently looked up.
+
+    Connections are opened (read-only) lazily, one per process, so that
+    instances can be shared with forked worker processes.
+    """
+
+    def __init__(self, db_filepath: str, cache_size: int = 2048, **kwargs):
+        self._db_filepath = db_filepath
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self._cache_size = cache_size
+        self._cards_cache: OrderedDict[str, tuple[Card, ...]] = OrderedDict()
+        schema_version = self._meta("schema_version")
+        if schema_version != str(SCHEMA_VERSION):
+            raise ValueError(
+                f"Unsupported cards DB schema version {schema_version} "
+                f"(expected: {SCHEMA_VERSION}): {db_filepath}"
+            )
+        super().__init__(json_db=(), **kwargs)
+
+    @classmethod
+    def from_file(cls, db_filepath: str, **kwargs) -> "SQLiteScryfallDB":
+        return cls(db_filepath, **kwargs)
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        # connections must not be shared with forked processes
+        if self._conn is None or self._conn_pid != os.getpid():
+            uri = f"file:{os.path.abspath(self._db_filepath)}?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._connection.execute(_SELECT_META, (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _card(payload: str) -> Card:
+        return ScryfallDB.card_from_entry(json.loads(payload))
+
+    def _cache_put(self, db_key: str, cards: tuple[Card, ...]) -> None:
+        self._cards_cache[db_key] = cards
+        if len(self._cards_cache) > self._cache_size:
+            self._cards_cache.popitem(last=False)
+
+    # ==============
+    # Cards storage
+    # ==============
+
+    def _load_cards_from_db(self):
+        pass  # cards are loaded on lookup
+
+    def _cards_for_entry(self, db_key: str) -> Sequence[Card]:
+        cards = self._cards_cache.get(db_key)
+        if cards is not None:
+            self._cards_cache.move_to_end(db_key)
+            return cards
+        rows = self._connection.execute(_SELECT_BY_DB_KEY, (db_key,))
+        cards = tuple(self._card(payload) for (payload,) in rows)
+        self._cache_put(db_key, cards)
+        return cards
+
+    def _cards_with_prefix(self, db_key_prefix: str) -> Iterable[Card]:
+        rows = self._connection.execute(
+            _SELECT_BY_PREFIX, (db_key_prefix, db_key_prefix + _MAX_CHAR)
+        ).fetchall()
+        cards = list()
+        for db_key, key_rows in groupby(rows, key=lambda row: row[0]):
+            entry_cards = self._cards_cache.get(db_key)
+            if entry_cards is None:
+                entry_cards = tuple(self._card(payload) for _, payload in key_rows)
+                self._cache_put(db_key, entry_cards)
+            cards.extend(entry_cards)
+        return cards
+
+    def card_by_id(self, cid: str) -> Optional[Card]:
+        # looked up through the card name, to share the cards cache
+        row = self._connection.execute(_SELECT_DB_KEY_BY_CID, (cid,)).fetchone()
+        if row is None:
+            return None
+        return next(card for card in self._cards_for_entry(row[0]) if card.cid == cid)
+
+    def __len__(self) -> int:
+        return self._connection.execute(_SELECT_COUNT).fetchone()[0]
+
+    @property
+    def all_cards(self) -> Iterable[Card]:
+        # streamed from the DB: cards are not retained in memory
+        for (payload,) in self._connection.execute(_SELECT_ALL):
+            yield self._card(payload)
+
+    def _init_mtg_sets_map(self) -> dict[str, str]:
+        return dict(self._connection.execute(_SELECT_SETS))
+
+    @property
+    def version(self) -> str:
+        if self._version is None:
+            self._version = self._meta("version")
+        return self._version
+
+    def close(self) -> None:
+        if self._conn is not None and self._conn_pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(
+        description="Convert a (JSON, or bz2-compressed JSON) cards DB file to SQLite."
+    )
+    parser.add_argument("json_db_filepath", help="Input cards DB file")
+    parser.add_argument("sqlite_db_filepath", help="Output SQLite DB file")
+    args = parser.parse_args()
+
+    written = build_sqlite_db(
+        ScryfallDB.from_file(args.json_db_filepath), args.sqlite_db_filepath
+    )
+    print(f"{written} cards written to {args.sqlite_db_filepath}")